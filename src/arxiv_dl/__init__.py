@@ -1 +1 @@
-from .__main__ import download_paper
+from .__main__ import download_paper, download_papers
@@ -1,41 +1,68 @@
 import argparse
+import asyncio
 from pathlib import Path
-from typing import Optional, Union
-
-from .constants import CONSTANTS
-from .helpers import (
-    add_to_paper_list,
-    create_paper_note,
-    download_pdf,
-    get_download_dest,
+from typing import Callable, Iterable, Iterator, Optional, Tuple, Union
+
+from .batch import (
+    DEFAULT_ASYNC_JOBS,
+    MAX_ASYNC_JOBS,
+    MAX_JOBS,
+    ProcessPool,
+    Stage,
+    default_process_jobs,
+    run_pipeline,
 )
+from .constants import CONSTANTS
+from .failure_cache import configure_failure_cache, failure_cache
+from .http_cache import DEFAULT_MAX_AGE, DEFAULT_MAX_SIZE
+from .journal import Journal, new_journal_path, prune_journals
+from .metadata_cache import configure_metadata_cache
 from .models import PaperData
+from .network import (
+    DEFAULT_TIMEOUTS,
+    Deadline,
+    DeadlineExceeded,
+    add_endpoint,
+    circuit_breaker,
+    configure_archive,
+    configure_bandwidth,
+    configure_circuit_breaker,
+    configure_host_limit,
+    configure_http2,
+    configure_http_cache,
+    configure_retries,
+    configure_session,
+    configure_timeouts,
+    deadline_scope,
+    parse_endpoint,
+    parse_host_limit,
+    parse_host_rate,
+    parse_rate,
+    retry_stats,
+)
+from .pdf_store import (
+    DEFAULT_MAX_SIZE as PDF_STORE_MAX_SIZE,
+    LINK_MODES,
+    configure_pdf_store,
+)
 from .printer import console
-from .scrapers import scrape_metadata
-from .target_parser import (
-    expand_target,
-    is_alphaxiv_paper_url,
-    parse_target,
-    valid_arxiv_id,
+from .reparse import reparse_papers
+from .stages import (
+    PaperTarget,
+    download_single_paper,
+    embed_paper,
+    finalize_paper,
+    guarded,
+    iter_paper_targets,
+    resolve_paper,
+    set_verbosity,
+    setup_download_dir,
+    transfer_paper,
 )
+from .target_parser import canonical_target_key, read_targets, unique_targets
 from .updater import check_update
 
 
-def set_verbosity(
-    verbose: Optional[bool] = None,
-    verbose_level: Optional[Union[str, int]] = None,
-):
-    """
-    Note that console.set_verbose_level() will never throw an error by design, it will fallback to the default level if any error occurs.
-    """
-    if verbose_level is not None:
-        console.set_verbose_level(verbose_level)
-    elif verbose is True:
-        console.set_verbose_level("verbose")
-    else:
-        console.set_verbose_level("default")
-
-
 def download_paper(
     target: str,
     verbose: bool = False,
@@ -44,6 +71,9 @@ def download_paper(
     pdf_only: bool = False,
     set_verbose_level: Union[str, int, None] = None,
     notes_format: str = "txt",
+    jobs: int = 1,
+    scrape_jobs: Optional[int] = None,
+    download_jobs: Optional[int] = None,
     *args,
     **kwargs,
 ) -> bool:
@@ -53,123 +83,214 @@ def download_paper(
         1. Process Target: Identify the source of the paper (ArXiv, CVF, NeurIPS, OpenReview, etc.)
         2. Scrape Metadata: Extract metadata from the source website
         3. Download Paper: Download the paper PDF file and save it to the target directory
+
+    When the target expands to several papers (e.g. a Hugging Face listing),
+    they are processed concurrently if `jobs` is greater than 1. See
+    `download_papers()` for the meaning of the concurrency options.
+    """
+    results = list(
+        download_papers(
+            [target],
+            verbose=verbose,
+            download_dir=download_dir,
+            n_threads=n_threads,
+            pdf_only=pdf_only,
+            set_verbose_level=set_verbose_level,
+            notes_format=notes_format,
+            jobs=jobs,
+            scrape_jobs=scrape_jobs,
+            download_jobs=download_jobs,
+        )
+    )
+    return bool(results) and all(success for _, _, success in results)
+
+
+def download_papers(
+    targets: Iterable[str],
+    verbose: bool = False,
+    download_dir: Union[Path, str, None] = None,
+    n_threads: int = 5,
+    pdf_only: bool = False,
+    set_verbose_level: Union[str, int, None] = None,
+    notes_format: str = "txt",
+    jobs: int = 1,
+    scrape_jobs: Optional[int] = None,
+    download_jobs: Optional[int] = None,
+    journal: Optional[Journal] = None,
+    embed_jobs: Optional[int] = None,
+    deadline: Optional[float] = None,
+) -> Iterator[Tuple[int, str, bool]]:
+    """
+    Download every paper referred to by `targets`.
+
+    Targets are expanded into single papers and streamed through the stages
+    metadata (parse & scrape), transfer (PDF download), embed (PDF metadata)
+    and finalize (paper list & notes). With `jobs == 1` each paper runs
+    through all stages before the next one starts. Otherwise the stages run
+    as a pipeline connected by bounded queues, with `scrape_jobs` metadata
+    workers and `download_jobs` transfer workers (both default to `jobs`), so
+    metadata for the next papers is fetched while the current PDF is
+    downloading. PDF metadata is then embedded by a pool of `embed_jobs`
+    processes (default: `jobs`, at most one per CPU), and a paper is only
+    finalized once its embed has succeeded.
+
+    If a `journal` is given, every completed stage is recorded in it and
+    stages it already records as completed are skipped. With a `deadline`,
+    each paper has that many seconds from the start of its metadata stage;
+    its requests are then cancelled and the paper fails.
+
+    Yields:
+        (index, target, success) for every paper, in completion order.
+        Nothing is yielded if the download directory cannot be set up.
     """
     set_verbosity(verbose=verbose, verbose_level=set_verbose_level)
 
-    # Get target download directory.
-    try:
-        if download_dir is None:
-            download_dir: Path = get_download_dest()
-        else:
-            download_dir: Path = Path(download_dir).resolve()
-            download_dir.mkdir(parents=True, exist_ok=True)
-    except Exception as e:
-        console.error(
-            "Failed to set up download directory. Please check your environment configuration."
+    download_dir = setup_download_dir(download_dir)
+    if download_dir is None:
+        return
+
+    jobs = max(1, min(int(jobs), MAX_JOBS))
+    scrape_jobs = scrape_jobs or jobs
+    download_jobs = download_jobs or jobs
+    embed_jobs = embed_jobs or default_process_jobs(jobs)
+    sequential = (
+        jobs == 1 and scrape_jobs == 1 and download_jobs == 1 and embed_jobs == 1
+    )
+    paper_targets = iter_paper_targets(targets, spacing=sequential)
+    if deadline:
+        paper_targets = (
+            item._replace(deadline=Deadline(deadline)) for item in paper_targets
         )
-        return False
 
-    if not target or not isinstance(target, str):
-        console.error("Invalid input: Please provide a valid paper URL or arXiv ID.")
-        return False
+    def resolve(item: PaperTarget) -> Union[PaperData, bool]:
+        if not item.valid:
+            return False
+        if item.position:
+            console.process(*item.position, item.target)
+        return resolve_paper(item.target, journal=journal, download_dir=download_dir)
 
-    try:
-        expanded_targets = expand_target(target)
-    except Exception as err:
-        console.error(f"Failed to expand target '{target}': {err}")
+    def transfer(paper_data: PaperData) -> Union[PaperData, bool]:
+        if transfer_paper(
+            paper_data,
+            download_dir=download_dir,
+            n_threads=n_threads,
+            journal=journal,
+            embed_metadata=False,
+        ):
+            return paper_data
         return False
 
-    if not expanded_targets:
-        console.error(f"No papers found for target: {target}")
+    def embed(paper_data: PaperData) -> Union[PaperData, bool]:
+        if embed_paper(
+            paper_data, download_dir=download_dir, journal=journal, pool=embed_pool
+        ):
+            return paper_data
         return False
 
-    if len(expanded_targets) > 1:
-        console.info(f"Found {len(expanded_targets)} papers on the target page.")
-
-    success_list = []
-    for i, expanded_target in enumerate(expanded_targets):
-        if len(expanded_targets) > 1:
-            console.process(i, len(expanded_targets), expanded_target)
-        success = _download_single_paper(
-            target=expanded_target,
+    def finalize(paper_data: PaperData) -> bool:
+        return finalize_paper(
+            paper_data,
             download_dir=download_dir,
-            n_threads=n_threads,
             pdf_only=pdf_only,
             notes_format=notes_format,
+            journal=journal,
         )
-        success_list.append(success)
 
-    return all(success_list)
+    if sequential:
+        for index, item in enumerate(paper_targets):
+            if not item.valid:
+                success = False
+            else:
+                if item.position:
+                    console.process(*item.position, item.target)
+                try:
+                    with deadline_scope(item.deadline):
+                        success = download_single_paper(
+                            target=item.target,
+                            download_dir=download_dir,
+                            n_threads=n_threads,
+                            pdf_only=pdf_only,
+                            notes_format=notes_format,
+                            journal=journal,
+                        )
+                except DeadlineExceeded as e:
+                    console.error(f"Gave up on '{item.target}': {e}")
+                    success = False
+                except Exception as e:
+                    # catch any unexpected errors and continue with the next target
+                    console.error(f"Error processing '{item.target}': {e}")
+                    console.error(CONSTANTS.BUG_REPORT_MSG)
+                    success = False
+            yield index, item.target, bool(success)
+        return
+
+    stages = [
+        Stage("metadata", guarded(resolve), scrape_jobs),
+        Stage("transfer", guarded(transfer), download_jobs),
+        # one thread per worker process, so a full pool backs up the transfers
+        Stage("embed", guarded(embed), embed_jobs),
+        Stage("finalize", guarded(finalize), 1),
+    ]
+    with ProcessPool(embed_jobs) as embed_pool:
+        for index, item, success in run_pipeline(
+            stages,
+            paper_targets,
+            queue_size=2 * max(scrape_jobs, download_jobs),
+            label=lambda item: item.label,
+            scope=lambda item: deadline_scope(item.deadline),
+        ):
+            yield index, item.target, bool(success)
+
+
+async def _collect_async(
+    targets: Iterable[str], record: Callable[[int, str, bool], None], **kwargs
+) -> None:
+    """Run the asyncio engine, recording results as they complete."""
+    from .async_engine import download_papers_async
+
+    async for i, target, success in download_papers_async(targets, **kwargs):
+        record(i, target, success)
+
+
+def _iter_cli_targets(
+    targets: Iterable[str], input_file: Optional[str] = None
+) -> Iterator[str]:
+    """Chain positional targets (`-` meaning stdin) with those of an input file."""
+    for target in targets:
+        if target == "-":
+            yield from read_targets("-")
+        else:
+            yield target
+    if input_file:
+        yield from read_targets(input_file)
 
 
-def _download_single_paper(
-    target: str,
-    download_dir: Path,
-    n_threads: int,
-    pdf_only: bool,
-    notes_format: str,
-) -> bool:
-    # Filter invalid target string.
-    if not target or not isinstance(target, str):
-        console.error("Invalid input: Please provide a valid paper URL or arXiv ID.")
-        return False
+def _host_limit_arg(spec: str):
+    try:
+        return parse_host_limit(spec)
+    except ValueError as err:
+        raise argparse.ArgumentTypeError(str(err))
 
-    if (
-        not target.startswith(("http://", "https://", "www.", "huggingface.co/"))
-        and not valid_arxiv_id(target)
-        and not is_alphaxiv_paper_url(target)
-        and "arxiv" not in target.lower()
-    ):
-        console.error(
-            f"Invalid input: '{target}' is not a recognized paper URL or arXiv ID.\n"
-            "Please provide a valid URL from ArXiv, alphaXiv, ICLR Proceedings, Hugging Face Papers, CVF, ECVA, or other supported sources, "
-            "or a valid arXiv ID (e.g., '1512.03385')."
-        )
-        return False
 
-    # Identify paper source/venue.
-    paper_data: PaperData = parse_target(target)
-    if not paper_data:
-        return False
+def _rate_arg(spec: str):
+    try:
+        return parse_rate(spec)
+    except ValueError as err:
+        raise argparse.ArgumentTypeError(str(err))
 
-    # Start scraping from source website.
-    scrape_metadata(paper_data)
-    console.print_paper_info(paper_data)
 
-    # Download paper.
+def _host_rate_arg(spec: str):
     try:
-        if paper_data.pdf_url:
-            download_pdf(
-                paper_data, download_dir=download_dir, parallel_connections=n_threads
-            )
-        else:
-            console.warn("PDF download link not available for this paper.")
-    except Exception as err:
-        console.error("Failed to download the paper.")
-        return False
+        return parse_host_rate(spec)
+    except ValueError as err:
+        raise argparse.ArgumentTypeError(str(err))
 
-    # Update paper list.
-    try:
-        add_to_paper_list(paper_data, download_dir=download_dir)
-    except Exception as err:
-        console.warn(
-            "Could not update the paper tracking list, but the download completed successfully."
-        )
-        return False
 
-    # Create paper notes
+def _endpoint_arg(spec: str):
     try:
-        if not pdf_only:
-            create_paper_note(
-                paper_data, download_dir=download_dir, notes_format=notes_format
-            )
-    except Exception as err:
-        console.warn(
-            "Could not create paper notes, but the PDF was downloaded successfully."
-        )
-        return False
-
-    return True
+        return parse_endpoint(spec)
+    except ValueError as err:
+        raise argparse.ArgumentTypeError(str(err))
 
 
 def cli():
@@ -182,15 +303,18 @@ def cli():
         "  paper https://proceedings.iclr.cc/paper_files/paper/2026/hash/0021c2cb1b9b6a71ac478ea52a93b25a-Abstract-Conference.html  # Download from ICLR\n"
         "  paper 1512.03385 2103.15538             # Download multiple papers\n"
         "  paper 1512.03385 -d ~/Papers            # Specify download directory\n"
-        "  paper 1512.03385 -p                     # Download PDF only (no notes)",
+        "  paper 1512.03385 -p                     # Download PDF only (no notes)\n"
+        "  paper 1512.03385 2103.15538 -j 4        # Download up to 4 papers at once\n"
+        "  paper -i ids.txt -j 8                   # Download the papers listed in a file\n"
+        "  cat ids.txt | paper -                   # Read targets from standard input",
         formatter_class=argparse.RawTextHelpFormatter,
     )
     parser.add_argument(
         "targets",
-        nargs="+",
+        nargs="*",
         type=str,
         metavar="TARGET",
-        help="Paper URL(s) or arXiv ID(s) to download",
+        help="Paper URL(s) or arXiv ID(s) to download; '-' reads them from standard input",
     )
 
     # Create argument groups for better organization
@@ -198,6 +322,15 @@ def cli():
     behavior_group = parser.add_argument_group(title="behavior configuration")
     performance_group = parser.add_argument_group(title="Performance Options")
 
+    # Input options
+    parser.add_argument(
+        "-i",
+        "--input-file",
+        metavar="PATH",
+        type=str,
+        help="read targets from a file, one per line ('-' for standard input); blank lines and lines starting with '#' are ignored",
+    )
+
     # Output options
     output_group.add_argument(
         "-d",
@@ -226,8 +359,7 @@ def cli():
         "--n-threads",
         metavar="N",
         type=int,
-        default=1,
-        help="set the number of parallel connections for download (default: 1, max: 16)",
+        help="set the number of parallel connections for download (default: 1, max: 16; not with --async)",
     )
     verbose_subgroup = behavior_group.add_mutually_exclusive_group()
     verbose_subgroup.add_argument(
@@ -248,56 +380,403 @@ def cli():
         action="store_true",
         help="skip checking for package updates",
     )
+    behavior_group.add_argument(
+        "--resume",
+        metavar="JOURNAL",
+        type=str,
+        help="record progress in the given journal file and skip the work it records as completed; rerun an interrupted command with the same targets to resume it",
+    )
+    behavior_group.add_argument(
+        "--archive",
+        metavar="DIR",
+        type=str,
+        help="keep the raw abstract, proceedings and BibTeX pages fetched in DIR, so the metadata can later be rebuilt from them with --reparse",
+    )
+    behavior_group.add_argument(
+        "--reparse",
+        action="store_true",
+        help="instead of downloading, rebuild the paper list and notes of the download directory from the pages kept with --archive, without network access; takes no TARGET",
+    )
+
+    # Performance options
+    performance_group.add_argument(
+        "-j",
+        "--jobs",
+        metavar="N",
+        type=int,
+        help=f"set the number of papers to process concurrently (default: 1, max: {MAX_JOBS}; with --async, default: {DEFAULT_ASYNC_JOBS}, max: {MAX_ASYNC_JOBS})",
+    )
+    performance_group.add_argument(
+        "--scrape-jobs",
+        metavar="N",
+        type=int,
+        help="set the number of concurrent metadata fetches (default: same as --jobs; not with --async)",
+    )
+    performance_group.add_argument(
+        "--download-jobs",
+        metavar="N",
+        type=int,
+        help="set the number of concurrent PDF transfers (default: same as --jobs; not with --async)",
+    )
+    performance_group.add_argument(
+        "--embed-jobs",
+        metavar="N",
+        type=int,
+        help="set the number of worker processes embedding PDF metadata (default: same as --jobs, at most one per CPU)",
+    )
+    performance_group.add_argument(
+        "--async",
+        dest="use_async",
+        action="store_true",
+        help='use the asyncio download engine, suited to very large batches (requires: pip install "arxiv-dl[async]")',
+    )
+    performance_group.add_argument(
+        "--http2",
+        action="store_true",
+        help='multiplex page and metadata requests over HTTP/2 connections; PDFs keep their own connections (requires: pip install "arxiv-dl[http2]")',
+    )
+    performance_group.add_argument(
+        "--host-limit",
+        metavar="HOST=CONN[:RPS]",
+        type=_host_limit_arg,
+        action="append",
+        default=[],
+        help="cap concurrent connections (N) and requests per second (RPS) to a host, e.g. arxiv.org=2:1.5; '*' sets the default for other hosts (repeatable)",
+    )
+    performance_group.add_argument(
+        "--limit-rate",
+        metavar="RATE",
+        type=_rate_arg,
+        help="cap the total download rate in bytes per second, e.g. 500K or 2M, shared equally by concurrent downloads (default: unlimited)",
+    )
+    performance_group.add_argument(
+        "--host-rate",
+        metavar="HOST=RATE",
+        type=_host_rate_arg,
+        action="append",
+        default=[],
+        help="cap the download rate from a host, e.g. openaccess.thecvf.com=1M, shared equally by its downloads (repeatable)",
+    )
+    performance_group.add_argument(
+        "--mirror",
+        metavar="HOST=URL",
+        type=_endpoint_arg,
+        action="append",
+        default=[],
+        help="add an endpoint serving the same papers as HOST, e.g. arxiv.org=https://export.arxiv.org; the fastest endpoint is used and failing ones are skipped (repeatable)",
+    )
+    performance_group.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="neither use nor update the caches of paper metadata, source pages and papers not found, nor the PDF store",
+    )
+    performance_group.add_argument(
+        "--link-mode",
+        choices=list(LINK_MODES),
+        default="auto",
+        help="how a PDF already in the PDF store is placed in the download directory; auto tries a reflink, then a copy; hardlink shares one file between the store and every directory holding the paper (default: auto)",
+    )
+    performance_group.add_argument(
+        "--refresh",
+        action="store_true",
+        help="scrape paper metadata again instead of using cached metadata, revalidate and re-parse cached pages and retry papers recently not found; the caches are updated",
+    )
+    performance_group.add_argument(
+        "--no-parse-cache",
+        action="store_true",
+        help="parse every source page, also unchanged ones whose metadata was saved with the cached page",
+    )
+    performance_group.add_argument(
+        "--http-cache-age",
+        metavar="SECONDS",
+        type=float,
+        help=f"reuse cached pages of paper sources for this long before revalidating them with the server (default: {DEFAULT_MAX_AGE:g})",
+    )
+    performance_group.add_argument(
+        "--http-cache-size",
+        metavar="MB",
+        type=float,
+        help=f"cap the page cache size; least recently used pages are evicted first, and 0 disables the cache (default: {DEFAULT_MAX_SIZE // 2**20})",
+    )
+    performance_group.add_argument(
+        "--pdf-store-size",
+        metavar="MB",
+        type=float,
+        help=f"cap the PDF store size; least recently used papers are evicted first, and 0 disables the store (default: {PDF_STORE_MAX_SIZE // 2**20})",
+    )
+    performance_group.add_argument(
+        "--retries",
+        metavar="N",
+        type=int,
+        default=3,
+        help="retry requests failing with connection errors, timeouts, 429 or 5xx up to N times, with exponential backoff (default: 3)",
+    )
+    performance_group.add_argument(
+        "--host-failures",
+        metavar="N",
+        type=int,
+        help=f"stop sending requests to a host for a while after N consecutive failures, so queued papers from it fail fast (default: {circuit_breaker.max_failures})",
+    )
+    performance_group.add_argument(
+        "--host-cooldown",
+        metavar="SECONDS",
+        type=float,
+        help=f"how long a failing host is skipped before it is tried again (default: {circuit_breaker.cooldown:g})",
+    )
+    performance_group.add_argument(
+        "--connect-timeout",
+        metavar="SECONDS",
+        type=float,
+        help=f"set the timeout for establishing a connection (default: {DEFAULT_TIMEOUTS.connect:g})",
+    )
+    performance_group.add_argument(
+        "--read-timeout",
+        metavar="SECONDS",
+        type=float,
+        help=f"set the timeout for waiting on a response or the next chunk of a download (default: {DEFAULT_TIMEOUTS.read:g})",
+    )
+    performance_group.add_argument(
+        "--stall-timeout",
+        metavar="SECONDS",
+        type=float,
+        help=f"drop a download that receives almost nothing for this long (default: {DEFAULT_TIMEOUTS.stall:g})",
+    )
+    performance_group.add_argument(
+        "--deadline",
+        metavar="SECONDS",
+        type=float,
+        help="give up on a paper that is not done this many seconds after its processing starts (default: no limit)",
+    )
 
     args = parser.parse_args()
 
+    if args.reparse:
+        if not args.archive:
+            parser.error("--reparse requires --archive")
+        if args.targets or args.input_file:
+            parser.error("--reparse takes no TARGET or --input-file")
+    elif not args.targets and not args.input_file:
+        parser.error("at least one TARGET or --input-file is required")
+    if args.input_file and args.input_file != "-":
+        if not Path(args.input_file).expanduser().is_file():
+            parser.error(f"input file not found: {args.input_file}")
+        args.input_file = str(Path(args.input_file).expanduser())
+    if args.use_async:
+        # the async engine runs every stage of a paper in one task and streams
+        # each PDF over a single connection
+        for option, flag in (
+            ("scrape_jobs", "--scrape-jobs"),
+            ("download_jobs", "--download-jobs"),
+            ("n_threads", "-n/--n-threads"),
+        ):
+            if getattr(args, option) is not None:
+                parser.error(f"{flag} cannot be used with --async")
+        if args.jobs is None:
+            args.jobs = DEFAULT_ASYNC_JOBS
+    if args.jobs is None:
+        args.jobs = 1
+    if args.n_threads is None:
+        args.n_threads = 1
+    for option in (
+        "connect_timeout",
+        "read_timeout",
+        "stall_timeout",
+        "deadline",
+        "host_failures",
+        "host_cooldown",
+    ):
+        value = getattr(args, option)
+        if value is not None and value <= 0:
+            parser.error(f"--{option.replace('_', '-')} must be positive")
+    for option in ("http_cache_age", "http_cache_size", "pdf_store_size"):
+        value = getattr(args, option)
+        if value is not None and value < 0:
+            parser.error(f"--{option.replace('_', '-')} must not be negative")
+
     # Set verbose level
     # NOTE: setting verbose level here is necessary because it controls the check_update() & console.process() below
     set_verbosity(verbose=args.verbose, verbose_level=args.verbose_level)
 
-    # Check for updates (unless disabled)
+    if args.http2:
+        try:
+            configure_http2(True)
+        except ImportError as err:
+            console.error(str(err))
+            exit(1)
+
+    # Apply per-host connection and rate limits
+    for host, max_connections, requests_per_second in args.host_limit:
+        configure_host_limit(host, max_connections, requests_per_second)
+    for host, endpoint in args.mirror:
+        add_endpoint(host, endpoint)
+    # Cap the bandwidth used by downloads
+    configure_bandwidth(args.limit_rate)
+    for host, rate in args.host_rate:
+        configure_bandwidth(rate, host=host)
+
+    # Retry transient network failures and bound the time spent on requests
+    configure_retries(max_attempts=max(0, args.retries) + 1)
+    configure_circuit_breaker(
+        max_failures=args.host_failures, cooldown=args.host_cooldown
+    )
+    configure_timeouts(
+        connect=args.connect_timeout,
+        read=args.read_timeout,
+        stall=args.stall_timeout,
+    )
+    configure_http_cache(
+        max_age=args.http_cache_age,
+        max_size=(
+            None if args.http_cache_size is None else int(args.http_cache_size * 2**20)
+        ),
+        reuse_parsed=False if args.no_parse_cache else None,
+    )
+    configure_pdf_store(
+        link_mode=args.link_mode,
+        max_size=(
+            None if args.pdf_store_size is None else int(args.pdf_store_size * 2**20)
+        ),
+    )
+    # Reuse or bypass the metadata scraped in previous runs
+    if args.no_cache:
+        configure_metadata_cache(enabled=False)
+        configure_failure_cache(enabled=False)
+        configure_http_cache(max_size=0)
+        configure_pdf_store(enabled=False)
+    elif args.refresh:
+        configure_metadata_cache(refresh=True)
+        configure_failure_cache(refresh=True)
+        configure_http_cache(max_age=0, reuse_parsed=False)
+
+    # Re-parse archived pages offline instead of downloading
+    if args.reparse:
+        download_dir = setup_download_dir(args.download_dir)
+        if download_dir is None:
+            exit(1)
+        n_reparsed, failed_targets = reparse_papers(
+            download_dir,
+            args.archive,
+            jobs=args.jobs,
+            pdf_only=args.pdf_only,
+            notes_format=args.notes_format,
+        )
+        console.summary(n_reparsed + len(failed_targets), failed_targets)
+        exit(1 if failed_targets or not n_reparsed else 0)
+    if args.archive:
+        configure_archive(args.archive)
+
+    # Size the shared connection pool for the requested concurrency
+    n_papers = max(args.jobs, args.scrape_jobs or 0, args.download_jobs or 0)
+    configure_session(n_papers * max(1, args.n_threads))
+
+    # Check for updates (unless disabled); a lookup still running is reported at exit
+    update_check = None
     if not args.skip_update_check and console.verbose_level >= 2:
-        check_update()
+        update_check = check_update()
 
     # Initialize variables
-    targets = args.targets
-    success_list = []
+    if args.input_file or "-" in args.targets:
+        # stream targets of unknown length, dropping duplicates on the fly
+        targets = unique_targets(_iter_cli_targets(args.targets, args.input_file))
+    else:
+        targets = list(unique_targets(args.targets))
+    # Open the run journal of a batch; without --resume it is kept only if the
+    # run fails, and journals of old failed runs are pruned
+    journal = None
+    try:
+        prune_journals()
+    except OSError as err:
+        console.debug(f"Could not prune old journals: {err}")
+    if args.resume or not isinstance(targets, list) or len(targets) > 1:
+        try:
+            journal = Journal(args.resume or new_journal_path())
+        except Exception as err:
+            if args.resume:
+                parser.error(f"cannot open journal '{args.resume}': {err}")
+    if journal and args.resume and journal.n_papers:
+        console.info(f"Resuming {journal.n_papers} paper(s) recorded in {journal.path}")
+
+    # only failures are kept, so memory stays flat for very long inputs
+    n_results = 0
+    failed = {}
     exit_code = 0
 
-    for i, target in enumerate(targets):
-        # Log the current target
-        console.process(i, len(targets), target)
-        # Process current target
-        try:
-            success = download_paper(
-                target=target,
-                verbose=args.verbose,
-                download_dir=args.download_dir,
-                n_threads=args.n_threads,
-                pdf_only=args.pdf_only,
-                set_verbose_level=args.verbose_level,
-                notes_format=args.notes_format,
+    def record(i: int, target: str, success: bool) -> None:
+        nonlocal n_results
+        n_results += 1
+        if not success:
+            failed[i] = target
+
+    options = dict(
+        verbose=args.verbose,
+        download_dir=args.download_dir,
+        pdf_only=args.pdf_only,
+        set_verbose_level=args.verbose_level,
+        notes_format=args.notes_format,
+        jobs=args.jobs,
+        journal=journal,
+        deadline=args.deadline,
+    )
+
+    try:
+        if args.use_async:
+            asyncio.run(
+                _collect_async(targets, record, embed_jobs=args.embed_jobs, **options)
             )
-            success_list.append(success)
-        except KeyboardInterrupt:
-            # catch keyboard interrupt and exit with code 1
-            console.error("arxiv-dl was interrupted by user")
-            exit_code = 1
-            break
-        except Exception as e:
-            # catch any unexpected errors and continue with the next target
-            console.error(f"Error processing '{target}': {e}")
-            console.error(CONSTANTS.BUG_REPORT_MSG)
-            exit_code = 1
-        finally:
-            # Add spacing between downloads
-            if i < len(targets) - 1:
-                print()
+        else:
+            for i, target, success in download_papers(
+                targets,
+                n_threads=args.n_threads,
+                scrape_jobs=args.scrape_jobs,
+                download_jobs=args.download_jobs,
+                embed_jobs=args.embed_jobs,
+                **options,
+            ):
+                record(i, target, success)
+    except ImportError as err:
+        # optional dependency of the asyncio engine is missing
+        console.error(str(err))
+        exit_code = 1
+    except KeyboardInterrupt:
+        # catch keyboard interrupt and exit with code 1
+        console.error("arxiv-dl was interrupted by user")
+        exit_code = 1
+
+    if n_results > 1:
+        failed_targets = [failed[i] for i in sorted(failed)]
+        console.summary(
+            n_results,
+            failed_targets,
+            n_retries=retry_stats.retries,
+            retry_wait=retry_stats.wait_time,
+            skipped=[
+                target
+                for target in failed_targets
+                if failure_cache.skipped
+                and canonical_target_key(target) in failure_cache.skipped
+            ],
+        )
+
+    # nothing was attempted, e.g. the download directory could not be set up
+    if not n_results:
+        exit_code = 1
 
     # if any download failed, exit with code 1
-    if False in success_list:
+    if failed:
         exit_code = 1
 
+    if journal:
+        journal.close()
+        if not args.resume and exit_code == 0:
+            journal.path.unlink(missing_ok=True)
+        elif not args.resume:
+            console.info(
+                f"To resume this run, rerun the command with: --resume {journal.path}"
+            )
+
+    if update_check:
+        update_check.report()
+
     # exit with the appropriate code
     exit(exit_code)
 
@@ -0,0 +1,100 @@
+"""
+Archive of raw source pages for offline re-parsing.
+
+When enabled (`paper --archive DIR`), every abstract, proceedings and BibTeX
+page served to the scrapers is kept in DIR, so that metadata can later be
+rebuilt from it with improved or updated scrapers without crawling the
+sources again (`paper --archive DIR --reparse`).
+
+Bodies are content-addressed: each distinct body is stored once, compressed
+with gzip, under `objects/<first two hex digits>/<SHA-256>.gz`. The append-only
+`index.jsonl` maps URLs to bodies with one line per fetch that returned new
+content: `{"url": ..., "fetched": <time.time()>, "sha256": ..., "content_type": ...}`.
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional, Union
+
+INDEX_NAME = "index.jsonl"
+
+
+class ArchivedPage(NamedTuple):
+    """One fetch of a URL recorded in the archive."""
+
+    url: str
+    fetched: float
+    sha256: str
+    content_type: Optional[str] = None
+
+
+class ResponseArchive:
+    """Compressed, content-addressed store of fetched pages, safe across threads."""
+
+    def __init__(self, directory: Union[str, Path]):
+        self.directory = Path(directory).expanduser()
+        self.index_path = self.directory / INDEX_NAME
+        self._index: Optional[Dict[str, List[ArchivedPage]]] = None
+        self._lock = threading.Lock()
+
+    def _object_path(self, sha256: str) -> Path:
+        return self.directory / "objects" / sha256[:2] / f"{sha256}.gz"
+
+    def _load_index(self) -> Dict[str, List[ArchivedPage]]:
+        if self._index is None:
+            self._index = {}
+            try:
+                with self.index_path.open() as f:
+                    for line in f:
+                        try:
+                            page = ArchivedPage(**json.loads(line))
+                        except (TypeError, ValueError):
+                            # a line cut short by an interrupted run
+                            continue
+                        self._index.setdefault(page.url, []).append(page)
+            except FileNotFoundError:
+                pass
+        return self._index
+
+    def add(
+        self, url: str, body: bytes, content_type: Optional[str] = None
+    ) -> ArchivedPage:
+        """Record a fetch of `url`; unchanged content adds nothing."""
+        sha256 = hashlib.sha256(body).hexdigest()
+        with self._lock:
+            pages = self._load_index().setdefault(url, [])
+            if pages and pages[-1].sha256 == sha256:
+                return pages[-1]
+            path = self._object_path(sha256)
+            if not path.is_file():
+                path.parent.mkdir(parents=True, exist_ok=True)
+                tmp_path = path.with_name(f"{path.name}.{os.getpid()}")
+                tmp_path.write_bytes(gzip.compress(body))
+                os.replace(tmp_path, path)
+            page = ArchivedPage(url, time.time(), sha256, content_type)
+            with self.index_path.open("a") as f:
+                f.write(json.dumps(page._asdict()) + "\n")
+            pages.append(page)
+            return page
+
+    def history(self, url: str) -> List[ArchivedPage]:
+        """Every recorded fetch of `url` with new content, oldest first."""
+        with self._lock:
+            return list(self._load_index().get(url, ()))
+
+    def latest(self, url: str) -> Optional[ArchivedPage]:
+        history = self.history(url)
+        return history[-1] if history else None
+
+    def read(self, page: ArchivedPage) -> bytes:
+        """The body of an archived fetch."""
+        return gzip.decompress(self._object_path(page.sha256).read_bytes())
+
+    def urls(self) -> List[str]:
+        with self._lock:
+            return list(self._load_index())
@@ -0,0 +1,332 @@
+"""
+Asynchronous download engine for arxiv-dl.
+
+This module mirrors `download_paper()` / `download_papers()` on top of asyncio
+and the `httpx` async HTTP client, so that thousands of metadata fetches can
+be in flight without one OS thread per request. It requires the optional
+`async` extra:
+
+    pip install "arxiv-dl[async]"
+
+The coroutines can be awaited from an existing event loop; the CLI runs them
+with `asyncio.run()` when `--async` is given.
+"""
+
+import asyncio
+from pathlib import Path
+from typing import AsyncIterator, Iterable, Optional, Tuple, Union
+
+try:
+    import httpx
+except ImportError:  # optional dependency
+    httpx = None
+
+from .batch import DEFAULT_ASYNC_JOBS, MAX_ASYNC_JOBS, ProcessPool, default_process_jobs
+from .constants import CONSTANTS
+from .helpers import download_pdf_async
+from .journal import Journal
+from .models import PaperData
+from .network import (
+    USER_AGENT,
+    CircuitOpen,
+    Deadline,
+    DeadlineExceeded,
+    deadline_scope,
+    http2_enabled,
+)
+from .printer import console
+from .scrapers import NOT_FOUND, scrape_metadata_async
+from .stages import (
+    PaperTarget,
+    completed_transfer,
+    embed_paper,
+    finalize_paper,
+    find_listed_paper,
+    iter_paper_targets,
+    set_verbosity,
+    setup_download_dir,
+    validate_target,
+)
+from .target_parser import parse_target
+
+ASYNC_CONNECTION_LIMIT = 100
+
+
+def _require_httpx() -> None:
+    if httpx is None:
+        raise ImportError(
+            "The asyncio engine requires httpx. "
+            'Install it with: pip install "arxiv-dl[async]"'
+        )
+
+
+def create_async_client(
+    max_connections: int = ASYNC_CONNECTION_LIMIT, http2: bool = False
+):
+    """Create the `httpx.AsyncClient` used by the engine."""
+    _require_httpx()
+    return httpx.AsyncClient(
+        http2=http2,
+        follow_redirects=True,
+        headers={"User-Agent": USER_AGENT},
+        limits=httpx.Limits(max_connections=max_connections),
+        timeout=None,
+    )
+
+
+async def download_paper_async(
+    target: str,
+    verbose: bool = False,
+    download_dir: Union[Path, str, None] = None,
+    pdf_only: bool = False,
+    set_verbose_level: Union[str, int, None] = None,
+    notes_format: str = "txt",
+    jobs: int = 1,
+    client=None,
+    journal: Optional[Journal] = None,
+) -> bool:
+    """
+    Asynchronous counterpart of `download_paper()`.
+
+    Returns:
+        True if every paper referred to by `target` was downloaded.
+    """
+    results = [
+        success
+        async for _, _, success in download_papers_async(
+            [target],
+            verbose=verbose,
+            download_dir=download_dir,
+            pdf_only=pdf_only,
+            set_verbose_level=set_verbose_level,
+            notes_format=notes_format,
+            jobs=jobs,
+            client=client,
+            journal=journal,
+        )
+    ]
+    return bool(results) and all(results)
+
+
+async def download_papers_async(
+    targets: Iterable[str],
+    verbose: bool = False,
+    download_dir: Union[Path, str, None] = None,
+    pdf_only: bool = False,
+    set_verbose_level: Union[str, int, None] = None,
+    notes_format: str = "txt",
+    jobs: int = DEFAULT_ASYNC_JOBS,
+    client=None,
+    journal: Optional[Journal] = None,
+    embed_jobs: Optional[int] = None,
+    deadline: Optional[float] = None,
+) -> AsyncIterator[Tuple[int, str, bool]]:
+    """
+    Asynchronous counterpart of `download_papers()`.
+
+    Up to `jobs` papers are processed concurrently by worker tasks fed from a
+    bounded queue, so the input may be arbitrarily long. Each PDF is streamed
+    over a single connection (`n_threads` does not apply here). An
+    `httpx.AsyncClient` may be passed in to share connection pools with the
+    caller; otherwise one is created and closed by the engine. With HTTP/2
+    enabled (see `network.configure_http2()`), metadata requests are sent
+    with a separate HTTP/2 client, so they are multiplexed over a few
+    connections while PDFs keep a connection each. A `journal`, `embed_jobs`
+    and `deadline` are used as in `download_papers()`.
+
+    Yields:
+        (index, target, success) for every paper, in completion order.
+    """
+    _require_httpx()
+    set_verbosity(verbose=verbose, verbose_level=set_verbose_level)
+
+    download_dir = setup_download_dir(download_dir)
+    if download_dir is None:
+        return
+
+    jobs = max(1, min(int(jobs), MAX_ASYNC_JOBS))
+    owns_client = client is None
+    if owns_client:
+        client = create_async_client(max_connections=min(jobs, ASYNC_CONNECTION_LIMIT))
+    metadata_client = create_async_client(http2=True) if http2_enabled() else client
+
+    embed_pool = ProcessPool(embed_jobs or default_process_jobs(jobs))
+    pending = asyncio.Queue(maxsize=2 * jobs)
+    finished = asyncio.Queue()
+    paper_targets = iter_paper_targets(targets)
+    if deadline:
+        paper_targets = (
+            item._replace(deadline=Deadline(deadline)) for item in paper_targets
+        )
+
+    async def feed():
+        try:
+            index = 0
+            while True:
+                # Expanding listing pages performs blocking I/O.
+                item = await asyncio.to_thread(next, paper_targets, None)
+                if item is None:
+                    break
+                await pending.put((index, item))
+                index += 1
+        finally:
+            for _ in range(jobs):
+                await pending.put(None)
+
+    async def work():
+        while True:
+            entry = await pending.get()
+            if entry is None:
+                break
+            index, item = entry
+            with console.tagged(item.label if jobs > 1 else ""):
+                with deadline_scope(item.deadline):
+                    success = await _download_paper_target_async(
+                        item,
+                        client=client,
+                        metadata_client=metadata_client,
+                        download_dir=download_dir,
+                        pdf_only=pdf_only,
+                        notes_format=notes_format,
+                        journal=journal,
+                        embed_pool=embed_pool,
+                    )
+            await finished.put((index, item.target, success))
+        await finished.put(None)
+
+    tasks = [asyncio.create_task(feed())]
+    tasks += [asyncio.create_task(work()) for _ in range(jobs)]
+    try:
+        n_running = jobs
+        while n_running:
+            entry = await finished.get()
+            if entry is None:
+                n_running -= 1
+                continue
+            yield entry
+        # surface errors from the feeder, e.g. an invalid target iterable
+        await asyncio.gather(*tasks)
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.to_thread(embed_pool.shutdown)
+        if metadata_client is not client:
+            await metadata_client.aclose()
+        if owns_client:
+            await client.aclose()
+
+
+async def _download_paper_target_async(
+    item: PaperTarget,
+    client,
+    download_dir: Path,
+    pdf_only: bool,
+    notes_format: str,
+    journal: Optional[Journal] = None,
+    embed_pool: Optional[ProcessPool] = None,
+    metadata_client=None,
+) -> bool:
+    if not item.valid:
+        return False
+    if item.position:
+        console.process(*item.position, item.target)
+    try:
+        return await _download_single_paper_async(
+            target=item.target,
+            client=client,
+            metadata_client=metadata_client,
+            download_dir=download_dir,
+            pdf_only=pdf_only,
+            notes_format=notes_format,
+            journal=journal,
+            embed_pool=embed_pool,
+        )
+    except DeadlineExceeded as e:
+        console.error(f"Gave up on '{item.target}': {e}")
+        return False
+    except Exception as e:
+        # catch any unexpected errors and continue with the next target
+        console.error(f"Error processing '{item.target}': {e}")
+        console.error(CONSTANTS.BUG_REPORT_MSG)
+        return False
+
+
+async def _download_single_paper_async(
+    target: str,
+    client,
+    download_dir: Path,
+    pdf_only: bool,
+    notes_format: str,
+    journal: Optional[Journal] = None,
+    embed_pool: Optional[ProcessPool] = None,
+    metadata_client=None,
+) -> bool:
+    if not validate_target(target):
+        return False
+
+    # Reuse metadata scraped by a previous run.
+    paper_data = journal.paper_data(target) if journal else None
+    if paper_data is not None:
+        console.info("Resuming with the metadata recorded in the journal.")
+        console.print_paper_info(paper_data)
+    else:
+        # Identify paper source/venue.
+        paper_data: PaperData = parse_target(target)
+        if not paper_data:
+            return False
+        if journal:
+            journal.record(paper_data, "resolved")
+
+        # Reuse the metadata of a paper that was downloaded before.
+        local_paper_data = find_listed_paper(paper_data, download_dir)
+        if local_paper_data is not None:
+            paper_data = local_paper_data
+        else:
+            # Start scraping from source website.
+            scraped = await scrape_metadata_async(paper_data, metadata_client or client)
+            if scraped is NOT_FOUND:
+                return False
+            if scraped and journal:
+                journal.record(paper_data, "scraped", paper_data=paper_data)
+            console.print_paper_info(paper_data)
+
+    # Download paper.
+    if not completed_transfer(paper_data, download_dir, journal):
+        try:
+            if paper_data.pdf_url:
+                await download_pdf_async(
+                    paper_data,
+                    download_dir=download_dir,
+                    client=client,
+                    embed_metadata=embed_pool is None,
+                )
+            else:
+                console.warn("PDF download link not available for this paper.")
+        except (DeadlineExceeded, CircuitOpen) as err:
+            console.error(f"Failed to download the paper: {err}")
+            return False
+        except Exception as err:
+            console.error("Failed to download the paper.")
+            return False
+        if journal:
+            journal.record(paper_data, "downloaded")
+
+    # Embed PDF metadata in a worker process.
+    if embed_pool is not None and not await asyncio.to_thread(
+        embed_paper,
+        paper_data,
+        download_dir=download_dir,
+        journal=journal,
+        pool=embed_pool,
+    ):
+        return False
+
+    # Update paper list and create paper notes.
+    return await asyncio.to_thread(
+        finalize_paper,
+        paper_data,
+        download_dir=download_dir,
+        pdf_only=pdf_only,
+        notes_format=notes_format,
+        journal=journal,
+    )
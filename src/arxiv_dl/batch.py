@@ -0,0 +1,212 @@
+"""
+Batch execution utilities for arxiv-dl.
+
+This module provides a staged pipeline of bounded worker pools used to
+process many targets at once while keeping console output attributable to
+each target, and a process pool for CPU-bound post-processing.
+"""
+
+import multiprocessing
+import os
+import queue
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from contextlib import nullcontext
+from typing import (
+    Any,
+    Callable,
+    ContextManager,
+    Iterable,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Tuple,
+)
+
+from .printer import console
+
+MAX_JOBS = 32
+# asyncio tasks are cheap, so the async engine allows far more of them
+MAX_ASYNC_JOBS = 1024
+# concurrent papers of the async engine, in the library and the CLI alike
+DEFAULT_ASYNC_JOBS = 64
+
+
+class Stage(NamedTuple):
+    """One step of a pipeline and the number of workers allowed to run it."""
+
+    name: str
+    func: Callable[[Any], Any]
+    workers: int = 1
+
+
+_STOP = object()
+
+
+def run_pipeline(
+    stages: List[Stage],
+    items: Iterable[Any],
+    queue_size: int = 8,
+    label: Optional[Callable[[Any], str]] = None,
+    scope: Optional[Callable[[Any], ContextManager]] = None,
+) -> Iterator[Tuple[int, Any, Any]]:
+    """Stream items through a chain of stages connected by bounded queues.
+
+    Every stage runs in its own group of worker threads, so different items
+    can occupy different stages at the same time (e.g. one paper is scraped
+    while another is downloading). Each stage receives the value returned by
+    the previous one; a falsy return value ends the item early and becomes its
+    result. Because every queue holds at most `queue_size` items, memory use
+    stays bounded however long the input is.
+
+    Args:
+        stages: Pipeline stages, in order
+        items: Iterable of work items, consumed lazily
+        queue_size: Capacity of each inter-stage queue
+        label: Optional callable giving the console tag for an item
+        scope: Optional callable giving a context manager entered around
+            every stage of an item, e.g. to bound its run time
+
+    Yields:
+        Tuples of (input index, item, result) in completion order
+
+    Raises:
+        The first exception raised by any stage; remaining items are dropped
+    """
+    stages = [
+        stage._replace(workers=max(1, min(int(stage.workers), MAX_JOBS)))
+        for stage in stages
+    ]
+    stop = threading.Event()
+    queues = [queue.Queue(maxsize=max(1, queue_size)) for _ in stages]
+    results = queue.Queue()
+    errors = []
+
+    def _put(q: queue.Queue, entry) -> bool:
+        while not stop.is_set():
+            try:
+                q.put(entry, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _feed():
+        try:
+            for index, item in enumerate(items):
+                if not _put(queues[0], (index, item, item)):
+                    return
+        except BaseException as err:
+            errors.append(err)
+            stop.set()
+        finally:
+            for _ in range(stages[0].workers):
+                queues[0].put(_STOP)
+
+    def _work(stage_idx: int, remaining: List[int], lock: threading.Lock):
+        stage = stages[stage_idx]
+        is_last = stage_idx == len(stages) - 1
+        while True:
+            entry = queues[stage_idx].get()
+            if entry is _STOP:
+                break
+            if stop.is_set():
+                continue
+            index, item, value = entry
+            try:
+                with console.tagged(label(item) if label else ""):
+                    with scope(item) if scope else nullcontext():
+                        value = stage.func(value)
+            except BaseException as err:
+                errors.append(err)
+                stop.set()
+                continue
+            if is_last or not value:
+                results.put((index, item, value))
+            else:
+                _put(queues[stage_idx + 1], (index, item, value))
+
+        # The last worker of a stage to finish shuts down the next one.
+        with lock:
+            remaining[0] -= 1
+            if remaining[0] > 0:
+                return
+        if is_last:
+            results.put(_STOP)
+        else:
+            for _ in range(stages[stage_idx + 1].workers):
+                queues[stage_idx + 1].put(_STOP)
+
+    threads = [threading.Thread(target=_feed, daemon=True)]
+    for stage_idx, stage in enumerate(stages):
+        remaining = [stage.workers]
+        lock = threading.Lock()
+        for n in range(stage.workers):
+            threads.append(
+                threading.Thread(
+                    target=_work,
+                    args=(stage_idx, remaining, lock),
+                    name=f"arxiv-dl-{stage.name}-{n}",
+                    daemon=True,
+                )
+            )
+    for thread in threads:
+        thread.start()
+
+    try:
+        while True:
+            entry = results.get()
+            if entry is _STOP:
+                break
+            if errors:
+                break
+            yield entry
+        if errors:
+            raise errors[0]
+    finally:
+        stop.set()
+
+
+def default_process_jobs(jobs: int) -> int:
+    """Number of worker processes for `jobs` concurrent papers."""
+    return max(1, min(int(jobs), os.cpu_count() or 1))
+
+
+class ProcessPool:
+    """
+    Process pool for CPU-bound work, started on first use.
+
+    Workers are spawned rather than forked, as forking a process that runs
+    pipeline threads could copy locks held by those threads into the child.
+    """
+
+    def __init__(self, workers: int):
+        self.workers = max(1, min(int(workers), MAX_JOBS))
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def submit(self, func: Callable[..., Any], *args, **kwargs) -> Future:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+            return self._executor.submit(func, *args, **kwargs)
+
+    def run(self, func: Callable[..., Any], *args, **kwargs) -> Any:
+        """Run `func` in a worker process and wait for its result."""
+        return self.submit(func, *args, **kwargs).result()
+
+    def shutdown(self) -> None:
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True, cancel_futures=True)
+                self._executor = None
+
+    def __enter__(self) -> "ProcessPool":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.shutdown()
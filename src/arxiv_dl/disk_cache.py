@@ -0,0 +1,137 @@
+"""
+Size-capped, least-recently-used file caches for arxiv-dl.
+
+Each entry is one file in the cache directory, named after the SHA-256 of its
+key. Reads refresh the file's modification time, which orders the eviction
+applied when the entries together exceed the size cap. Writes go through a
+temporary file, so readers never see a partial entry, also when several
+processes share the directory.
+"""
+
+import hashlib
+import os
+import threading
+from pathlib import Path
+from typing import Optional
+
+# Eviction frees space down to this fraction of the cap, so it runs rarely.
+EVICTION_TARGET = 0.8
+
+
+class DiskCache:
+    """
+    Raw storage of `bytes` entries keyed by string.
+
+    The cache directory defaults to `name/` in the arxiv-dl cache directory
+    and is created on first use. A `max_size` (in bytes) of 0 disables the
+    cache.
+    """
+
+    def __init__(self, name: str, directory: Optional[Path], max_size: int):
+        self.name = name
+        self._directory = Path(directory) if directory else None
+        self.max_size = max_size
+        self._size: Optional[int] = None
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_size > 0
+
+    @property
+    def directory(self) -> Path:
+        if self._directory is None:
+            # imported here: helpers depends on the network layer using this
+            from .helpers import get_cache_dir
+
+            self._directory = get_cache_dir() / self.name
+        self._directory.mkdir(parents=True, exist_ok=True)
+        return self._directory
+
+    def set_directory(self, directory: Path) -> None:
+        self._directory = Path(directory)
+        self._size = None
+
+    def _path(self, key: str) -> Path:
+        return self.directory / hashlib.sha256(key.encode("utf-8")).hexdigest()
+
+    def read(self, key: str) -> Optional[bytes]:
+        """The entry stored under `key`, if any; marks it as recently used."""
+        path = self._path(key)
+        try:
+            data = path.read_bytes()
+            os.utime(path)
+        except OSError:
+            return None
+        return data
+
+    def write(self, key: str, data: bytes) -> None:
+        """Store `data` under `key`, evicting old entries past the size cap."""
+        path = self._path(key)
+        try:
+            old_size = path.stat().st_size
+        except OSError:
+            old_size = 0
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}")
+        try:
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except BaseException:
+            tmp_path.unlink(missing_ok=True)
+            raise
+        with self._lock:
+            if self._size is None:
+                self._size = self._scan_size()
+            else:
+                self._size += len(data) - old_size
+            if self._size > self.max_size:
+                self._evict()
+
+    def delete(self, key: str) -> None:
+        self._remove(self._path(key))
+
+    def _remove(self, path: Path) -> None:
+        try:
+            size = path.stat().st_size
+            path.unlink()
+        except OSError:
+            return
+        with self._lock:
+            if self._size is not None:
+                self._size -= size
+
+    def _scan_size(self) -> int:
+        return sum(p.stat().st_size for p in self.directory.iterdir() if p.is_file())
+
+    def _evict(self) -> None:
+        """Remove least recently used entries down to the eviction target."""
+        entries = []
+        for path in self.directory.iterdir():
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        entries.sort()
+        size = sum(entry[1] for entry in entries)
+        target = self.max_size * EVICTION_TARGET
+        for _, file_size, path in entries:
+            if size <= target:
+                break
+            try:
+                path.unlink()
+            except OSError:
+                continue
+            size -= file_size
+        self._size = size
+
+    def clear(self) -> None:
+        """Remove every stored entry."""
+        with self._lock:
+            for path in self.directory.iterdir():
+                try:
+                    path.unlink()
+                except OSError:
+                    continue
+            self._size = 0
@@ -5,11 +5,16 @@ This module provides utilities for downloading files with progress tracking,
 filename detection, and file management.
 """
 
+import contextvars
+import json
 import os
+import re
 import shutil
 import tempfile
+import threading
 import urllib.parse as urlparse
-from typing import Dict, List, Optional, Union
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple, Union
 
 import requests
 from rich.progress import (
@@ -23,6 +28,14 @@ from rich.progress import (
     TransferSpeedColumn,
 )
 
+from .network import (
+    aiter_body,
+    http_head,
+    http_stream,
+    http_stream_async,
+    is_transient_error,
+    iter_body,
+)
 from .printer import console
 
 # =============================================================================
@@ -207,50 +220,200 @@ def _create_progress_bar(transient: bool = False) -> Progress:
     )
 
 
-def _download_file_with_progress(
-    url: str, tmpfile: str, progress: Progress, task_id: int
+# Suffix of partially downloaded files, kept next to their destination.
+PART_SUFFIX = ".part"
+# Times a body cut off mid-transfer is resumed within the same download.
+RESUME_ATTEMPTS = 3
+
+
+class _PartialDownload:
+    """A `.part` file next to the destination of a download.
+
+    The validator of the partial content (ETag or Last-Modified) is stored in
+    a `.part.json` sidecar, so an interrupted transfer can be continued with a
+    `Range` + `If-Range` request, in the same run or a later one.
+    """
+
+    def __init__(self, url: str, out: Optional[str] = None):
+        # Handle output directory
+        self.outdir = None
+        if out and os.path.isdir(out):
+            self.outdir = out
+            out = None
+        self.url = url
+        self.out = out
+
+        name = detect_filename(url, out)
+        if self.outdir:
+            name = os.path.join(self.outdir, name)
+        self.path = name + PART_SUFFIX
+        self.meta_path = self.path + ".json"
+        self.validator = None
+        self.offset = self._resumable_size()
+
+    def _resumable_size(self) -> int:
+        try:
+            with open(self.meta_path, "r") as f:
+                meta = json.load(f)
+            size = os.path.getsize(self.path)
+        except (OSError, ValueError):
+            return 0
+        if meta.get("url") != self.url or not meta.get("validator"):
+            return 0
+        self.validator = meta["validator"]
+        return size
+
+    def request_headers(self) -> Dict[str, str]:
+        if not self.offset or not self.validator:
+            return {}
+        return {"Range": f"bytes={self.offset}-", "If-Range": self.validator}
+
+    def continues(self, response) -> bool:
+        """Whether `response` holds the whole resource or the rest of the part."""
+        return response.status_code != 206 or _content_range(response)[0] == self.offset
+
+    def open(self, response):
+        """Open the part file for the body of `response`.
+
+        The part is continued if the server resumed the transfer at its end;
+        on a 200, e.g. if the resource changed, it is started over. A 206 that
+        does not continue the part must be discarded before (see
+        `continues()`).
+        """
+        if response.status_code != 206:
+            self.offset = 0
+
+        etag = response.headers.get("ETag", "")
+        # weak validators cannot be used with If-Range
+        self.validator = (
+            etag if etag and not etag.startswith("W/") else None
+        ) or response.headers.get("Last-Modified")
+        if self.validator:
+            with open(self.meta_path, "w") as f:
+                json.dump({"url": self.url, "validator": self.validator}, f)
+        elif os.path.exists(self.meta_path):
+            os.unlink(self.meta_path)
+
+        return open(self.path, "ab" if self.offset else "wb")
+
+    def write(self, f, chunk: bytes) -> None:
+        """Append `chunk` to the part file `f`, so a drop can be resumed."""
+        f.write(chunk)
+        self.offset += len(chunk)
+
+    def discard(self) -> None:
+        for path in (self.path, self.meta_path):
+            if os.path.exists(path):
+                os.unlink(path)
+        self.offset = 0
+
+    def complete(self, headers: Dict[str, str]) -> str:
+        """Move the finished part to its final filename."""
+        # Determine final filename and move file
+        filename = detect_filename(self.url, self.out, headers)
+        if self.outdir:
+            filename = os.path.join(self.outdir, filename)
+
+        # Add numeric suffix if filename already exists
+        if os.path.exists(filename):
+            filename = filename_fix_existing(filename)
+
+        # Move part file to final location
+        shutil.move(self.path, filename)
+        if os.path.exists(self.meta_path):
+            os.unlink(self.meta_path)
+
+        return filename
+
+
+def _content_range(response) -> Tuple[Optional[int], Optional[int]]:
+    """(first byte, total size) from the Content-Range header of a response."""
+    match = re.fullmatch(
+        r"bytes\s+(?:(\d+)-\d+|\*)/(\d+|\*)",
+        response.headers.get("content-range", "").strip(),
+    )
+    if not match:
+        return None, None
+    first, total = match.groups()
+    return (
+        int(first) if first is not None else None,
+        int(total) if total.isdigit() else None,
+    )
+
+
+def _download_to_part(
+    part: _PartialDownload,
+    on_start: Optional[Callable[[int, Optional[int]], None]] = None,
+    on_chunk: Optional[Callable[[int], None]] = None,
 ) -> Dict[str, str]:
-    """Download file with progress tracking.
+    """Download `part.url` into its part file, continuing a previous attempt.
 
     Args:
-        url: URL to download
-        tmpfile: Temporary file path
-        progress: Progress bar instance
-        task_id: Progress task ID
+        part: Partial download to continue or start
+        on_start: Called with (bytes already present, total size or None)
+        on_chunk: Called with the size of each chunk written
 
     Returns:
         Response headers
 
     Raises:
-        requests.RequestException: If download fails
+        requests.RequestException: If download fails; the part file is kept
     """
-    with requests.get(url, stream=True) as response:
-        response.raise_for_status()
-        headers = response.headers
-
-        # Get total size if available
-        total_size = int(response.headers.get("content-length", 0))
-        if total_size > 0:
-            progress.update(task_id, total=total_size)
-
-        # Download the file
-        downloaded_size = 0
-        with open(tmpfile, "wb") as f:
-            for chunk in response.iter_content(chunk_size=8192):
-                if chunk:
-                    f.write(chunk)
-                    downloaded_size += len(chunk)
-
-                    if total_size > 0:
-                        progress.update(task_id, completed=downloaded_size)
-                    else:
-                        # Update description with downloaded size for unknown total
-                        progress.update(
-                            task_id,
-                            description=f"[cyan]Downloading ({_b2ms(downloaded_size)} MB)",
-                        )
-
-    return headers
+    resumes = 0
+    while True:
+        receiving = False
+        try:
+            with http_stream(part.url, headers=part.request_headers()) as response:
+                if response.status_code == 416 and part.offset:
+                    # nothing left to fetch if the part is already complete
+                    if _content_range(response)[1] == part.offset:
+                        return response.headers
+                    part.discard()
+                    continue
+                response.raise_for_status()
+                if not part.continues(response):
+                    # a fragment from elsewhere in the resource: fetch it whole
+                    _check_unranged(part, response)
+                    part.discard()
+                    continue
+                headers = response.headers
+
+                with part.open(response) as f:
+                    length = int(response.headers.get("content-length", 0))
+                    total_size = part.offset + length if length > 0 else None
+                    if on_start:
+                        on_start(part.offset, total_size)
+
+                    receiving = True
+                    for chunk in iter_body(response, chunk_size=8192):
+                        if chunk:
+                            part.write(f, chunk)
+                            if on_chunk:
+                                on_chunk(len(chunk))
+
+            return headers
+        except Exception as e:
+            # opening the stream is retried by http_stream() already
+            if not (receiving and _resumable(e, resumes)):
+                raise
+        resumes += 1
+        console.debug(
+            f"Transfer of {part.url} cut off after {part.offset} bytes, resuming."
+        )
+
+
+def _check_unranged(part: _PartialDownload, response) -> None:
+    if not part.offset:
+        # refetching without a Range cannot help
+        raise requests.RequestException(
+            f"Unexpected partial content from {part.url}: "
+            f"{response.headers.get('content-range')}"
+        )
+
+
+def _resumable(error: BaseException, resumes: int) -> bool:
+    """Whether a transfer cut off by `error` is resumed once more."""
+    return is_transient_error(error) and resumes < RESUME_ATTEMPTS
 
 
 def download_with_rich(
@@ -258,9 +421,10 @@ def download_with_rich(
 ) -> str:
     """Download URL with rich progress bar and automatic filename detection.
 
-    Downloads URL into a temporary file and then renames it to a filename
+    Downloads URL into a `.part` file and then renames it to a filename
     autodetected from either URL or HTTP headers. Uses rich progress bar
-    for better user experience.
+    for better user experience. If the download fails, the part file is kept
+    and the next download of the same URL to the same place continues it.
 
     Args:
         url: URL to download
@@ -273,53 +437,49 @@ def download_with_rich(
         requests.RequestException: If download fails
         OSError: If file operations fail
     """
-    # Handle output directory
-    outdir = None
-    if out and os.path.isdir(out):
-        outdir = out
-        out = None
-
-    # Create temporary file
-    prefix = detect_filename(url, out)
-    fd, tmpfile = tempfile.mkstemp(".tmp", prefix=prefix, dir=".")
-    os.close(fd)
-    os.unlink(tmpfile)
+    part = _PartialDownload(url, out)
 
     # Download with progress
     progress = _create_progress_bar(transient=transient)
-    headers = None
+    downloaded_size = 0
 
     try:
         with progress:
             task = progress.add_task(f"[cyan]Downloading", total=None)
-            headers = _download_file_with_progress(url, tmpfile, progress, task)
+
+            def on_start(offset: int, total_size: Optional[int]) -> None:
+                nonlocal downloaded_size
+                downloaded_size = offset
+                progress.update(task, total=total_size, completed=offset)
+
+            def on_chunk(n_bytes: int) -> None:
+                nonlocal downloaded_size
+                downloaded_size += n_bytes
+                if progress.tasks[0].total:
+                    progress.update(task, completed=downloaded_size)
+                else:
+                    # Update description with downloaded size for unknown total
+                    progress.update(
+                        task,
+                        description=f"[cyan]Downloading ({_b2ms(downloaded_size)} MB)",
+                    )
+
+            headers = _download_to_part(part, on_start=on_start, on_chunk=on_chunk)
 
     except Exception as e:
         console.error(f"Download failed: {str(e)}")
-        if os.path.exists(tmpfile):
-            os.unlink(tmpfile)
         raise
 
-    # Determine final filename and move file
-    filename = detect_filename(url, out, headers)
-    if outdir:
-        filename = os.path.join(outdir, filename)
-
-    # Add numeric suffix if filename already exists
-    if os.path.exists(filename):
-        filename = filename_fix_existing(filename)
-
-    # Move temp file to final location
-    shutil.move(tmpfile, filename)
-
-    return filename
+    return part.complete(headers)
 
 
 def download(url: str, out: Optional[str] = None) -> str:
     """Download URL without progress bar.
 
-    Downloads URL into a temporary file and then renames it to a filename
+    Downloads URL into a `.part` file and then renames it to a filename
     autodetected from either URL or HTTP headers. No visual progress tracking.
+    If the download fails, the part file is kept and the next download of
+    the same URL to the same place continues it.
 
     Args:
         url: URL to download
@@ -332,37 +492,245 @@ def download(url: str, out: Optional[str] = None) -> str:
         requests.RequestException: If download fails
         OSError: If file operations fail
     """
+    part = _PartialDownload(url, out)
+    headers = _download_to_part(part)
+    return part.complete(headers)
+
+
+# =============================================================================
+# Segmented Download
+# =============================================================================
+
+# Files smaller than two segments of this size are fetched over one connection.
+MIN_SEGMENT_SIZE = 1024 * 1024
+
+
+class RangeProbe(NamedTuple):
+    """What a server reported about a URL before a segmented download."""
+
+    # final URL after redirects
+    url: str
+    # size in bytes, if known
+    size: Optional[int]
+    # whether byte-range requests are honoured
+    accepts_ranges: bool
+
+
+class _RangeNotSupported(Exception):
+    pass
+
+
+def probe_ranges(url: str) -> RangeProbe:
+    """Find the size of a URL and whether the server honours byte ranges.
+
+    A HEAD request is tried first; servers that do not advertise
+    `Accept-Ranges: bytes` are asked for the first byte with a ranged GET.
+
+    Args:
+        url: URL to probe
+
+    Returns:
+        RangeProbe of the (redirected) URL
+    """
+    size = None
+    try:
+        response = http_head(url, allow_redirects=True)
+        if response.ok:
+            url = response.url
+            if response.headers.get("content-length", "").isdigit():
+                size = int(response.headers["content-length"])
+            if response.headers.get("accept-ranges", "").lower() == "bytes" and size:
+                return RangeProbe(url, size, True)
+    except requests.RequestException:
+        pass
+
+    with http_stream(url, headers={"Range": "bytes=0-0"}) as response:
+        url = response.url
+        match = re.fullmatch(
+            r"bytes\s+0-0/(\d+)", response.headers.get("content-range", "").strip()
+        )
+        if response.status_code == 206 and match:
+            return RangeProbe(url, int(match.group(1)), True)
+        if response.headers.get("content-length", "").isdigit():
+            size = int(response.headers["content-length"])
+    return RangeProbe(url, size, False)
+
+
+def split_ranges(size: int, connections: int) -> List[Tuple[int, int]]:
+    """Split `size` bytes into at most `connections` inclusive byte ranges.
+
+    Args:
+        size: Total number of bytes
+        connections: Maximum number of ranges
+
+    Returns:
+        List of (first byte, last byte) tuples covering the whole file
+    """
+    n = max(1, min(int(connections), size // MIN_SEGMENT_SIZE))
+    step = -(-size // n)
+    return [(start, min(start + step, size) - 1) for start in range(0, size, step)]
+
+
+def _download_range(
+    url: str,
+    tmpfile: str,
+    first: int,
+    last: int,
+    on_chunk: Callable[[int], None],
+    stop: threading.Event,
+) -> None:
+    """Download bytes `first`..`last` of `url` into the same offsets of `tmpfile`."""
+    headers = {"Range": f"bytes={first}-{last}"}
+    with http_stream(url, headers=headers) as response:
+        response.raise_for_status()
+        if response.status_code != 206:
+            raise _RangeNotSupported(url)
+
+        expected = last - first + 1
+        received = 0
+        with open(tmpfile, "r+b") as f:
+            f.seek(first)
+            for chunk in iter_body(response, chunk_size=65536):
+                if stop.is_set():
+                    return
+                if not chunk:
+                    continue
+                chunk = chunk[: expected - received]
+                f.write(chunk)
+                received += len(chunk)
+                on_chunk(len(chunk))
+                if received >= expected:
+                    break
+
+    if received != expected:
+        raise requests.RequestException(
+            f"Incomplete segment {first}-{last}: received {received} bytes"
+        )
+
+
+def download_segmented(
+    url: str,
+    out: Optional[str] = None,
+    connections: int = 4,
+    show_progress: bool = False,
+    transient: bool = False,
+) -> str:
+    """Download URL over several connections, each fetching a byte range.
+
+    The server is probed first; the file is then preallocated and its byte
+    ranges are downloaded concurrently, every connection writing at its own
+    offset. If the server does not honour ranges, the size is unknown, the
+    file is small or a `.part` file of an interrupted download exists, the
+    file is downloaded over a single connection instead.
+
+    Args:
+        url: URL to download
+        out: Output filename or directory
+        connections: Maximum number of concurrent connections
+        show_progress: Report aggregate progress with a rich progress bar
+        transient: Remove the progress bar when done
+
+    Returns:
+        Filename where URL was downloaded to
+
+    Raises:
+        requests.RequestException: If download fails
+        OSError: If file operations fail
+    """
+
+    def fallback() -> str:
+        if show_progress:
+            return download_with_rich(url, out=out, transient=transient)
+        return download(url, out=out)
+
+    # continuing an interrupted transfer beats refetching it in parallel
+    if _PartialDownload(url, out).offset:
+        return fallback()
+
+    try:
+        probe = probe_ranges(url)
+    except requests.RequestException:
+        return fallback()
+    if not probe.accepts_ranges or not probe.size:
+        return fallback()
+    ranges = split_ranges(probe.size, connections)
+    if len(ranges) < 2:
+        return fallback()
+
     # Handle output directory
     outdir = None
     if out and os.path.isdir(out):
         outdir = out
         out = None
 
-    # Create temporary file
+    # Create and preallocate temporary file
     prefix = detect_filename(url, out)
     fd, tmpfile = tempfile.mkstemp(".tmp", prefix=prefix, dir=".")
-    os.close(fd)
-    os.unlink(tmpfile)
-
     try:
-        # Download file without progress tracking
-        with requests.get(url, stream=True) as response:
-            response.raise_for_status()
-            headers = response.headers
+        if hasattr(os, "posix_fallocate"):
+            os.posix_fallocate(fd, 0, probe.size)
+        else:
+            os.ftruncate(fd, probe.size)
+    finally:
+        os.close(fd)
+
+    progress = _create_progress_bar(transient=transient) if show_progress else None
+    task = None
+    stop = threading.Event()
+    executor = ThreadPoolExecutor(
+        max_workers=len(ranges), thread_name_prefix="arxiv-dl-segment"
+    )
 
-            # Download the file
-            with open(tmpfile, "wb") as f:
-                for chunk in response.iter_content(chunk_size=8192):
-                    if chunk:
-                        f.write(chunk)
+    def on_chunk(n_bytes: int) -> None:
+        if progress is not None:
+            # aggregate progress of all connections
+            progress.update(task, advance=n_bytes)
 
-    except Exception as e:
+    try:
+        if progress is not None:
+            progress.start()
+            task = progress.add_task(
+                f"[cyan]Downloading ({len(ranges)} connections)", total=probe.size
+            )
+        futures = [
+            # each connection runs in a copy of the caller's context (deadline)
+            executor.submit(
+                contextvars.copy_context().run,
+                _download_range,
+                probe.url,
+                tmpfile,
+                first,
+                last,
+                on_chunk,
+                stop,
+            )
+            for first, last in ranges
+        ]
+        for future in futures:
+            future.result()
+    except _RangeNotSupported:
+        stop.set()
+        executor.shutdown(wait=True, cancel_futures=True)
+        if progress is not None:
+            progress.stop()
+        os.unlink(tmpfile)
+        console.debug("Server ignored the byte range, downloading in one piece.")
+        return fallback()
+    except BaseException as e:
+        stop.set()
+        executor.shutdown(wait=True, cancel_futures=True)
+        if show_progress:
+            console.error(f"Download failed: {str(e)}")
         if os.path.exists(tmpfile):
             os.unlink(tmpfile)
         raise
+    finally:
+        executor.shutdown(wait=False)
+        if progress is not None:
+            progress.stop()
 
     # Determine final filename and move file
-    filename = detect_filename(url, out, headers)
+    filename = detect_filename(url, out)
     if outdir:
         filename = os.path.join(outdir, filename)
 
@@ -374,3 +742,62 @@ def download(url: str, out: Optional[str] = None) -> str:
     shutil.move(tmpfile, filename)
 
     return filename
+
+
+async def download_async(client, url: str, out: Optional[str] = None) -> str:
+    """Download URL without progress bar using an async HTTP client.
+
+    Asynchronous counterpart of `download()` for the asyncio engine. The
+    response body is streamed to a `.part` file, which is then renamed to a
+    filename autodetected from either URL or HTTP headers. A part left by an
+    interrupted download of the same URL is continued.
+
+    Args:
+        client: `httpx.AsyncClient` (or compatible) used for the request
+        url: URL to download
+        out: Output filename or directory
+
+    Returns:
+        Filename where URL was downloaded to
+
+    Raises:
+        httpx.HTTPError: If download fails
+        OSError: If file operations fail
+    """
+    part = _PartialDownload(url, out)
+
+    resumes = 0
+    while True:
+        receiving = False
+        try:
+            async with http_stream_async(
+                client, url, headers=part.request_headers()
+            ) as response:
+                if response.status_code == 416 and part.offset:
+                    # nothing left to fetch if the part is already complete
+                    if _content_range(response)[1] == part.offset:
+                        return part.complete(response.headers)
+                    part.discard()
+                    continue
+                response.raise_for_status()
+                if not part.continues(response):
+                    # a fragment from elsewhere in the resource: fetch it whole
+                    _check_unranged(part, response)
+                    part.discard()
+                    continue
+                headers = response.headers
+
+                with part.open(response) as f:
+                    receiving = True
+                    async for chunk in aiter_body(response, chunk_size=65536):
+                        if chunk:
+                            part.write(f, chunk)
+            break
+        except Exception as e:
+            # opening the stream is retried by http_stream_async() already
+            if not (receiving and _resumable(e, resumes)):
+                raise
+        resumes += 1
+        console.debug(f"Transfer of {url} cut off after {part.offset} bytes, resuming.")
+
+    return part.complete(headers)
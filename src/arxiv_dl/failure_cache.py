@@ -0,0 +1,121 @@
+"""
+Negative cache of papers that failed permanently, for arxiv-dl.
+
+When the source of a paper answers that it does not exist (404 or 410, or a
+page saying so), `scrape_metadata()` records its canonical ID here. Later runs
+skip the paper without any network I/O until the record expires, and list it
+in the batch summary. Transient failures, such as timeouts, connection errors
+and server errors, are never recorded.
+"""
+
+import json
+import threading
+import time
+from pathlib import Path
+from typing import NamedTuple, Optional, Set
+
+from .disk_cache import DiskCache
+from .models import PaperData
+from .target_parser import paper_key
+
+# Withdrawn papers and dead links are tried again after this many seconds.
+DEFAULT_TTL = 7 * 24 * 3600.0
+DEFAULT_MAX_SIZE = 4 * 1024 * 1024
+
+
+class FailureRecord(NamedTuple):
+    key: str
+    stored: float
+    reason: str
+
+
+class FailureCache(DiskCache):
+    """
+    Size-capped cache of permanent failures on disk, keyed like `MetadataCache`.
+
+    The cache directory defaults to `failures/` in the arxiv-dl cache
+    directory. A `max_size` of 0 disables the cache; with `refresh` set,
+    recorded failures are ignored but new ones are still recorded.
+    """
+
+    def __init__(
+        self,
+        directory: Optional[Path] = None,
+        max_size: int = DEFAULT_MAX_SIZE,
+        ttl: float = DEFAULT_TTL,
+    ):
+        super().__init__("failures", directory, max_size)
+        self.ttl = ttl
+        self.refresh = False
+        # keys of the papers skipped in this process, for the batch summary
+        self.skipped: Set[str] = set()
+        self._skipped_lock = threading.Lock()
+
+    def configure(
+        self,
+        enabled: Optional[bool] = None,
+        refresh: Optional[bool] = None,
+        max_size: Optional[int] = None,
+        ttl: Optional[float] = None,
+        directory: Optional[Path] = None,
+    ) -> None:
+        if max_size is not None:
+            self.max_size = max_size
+        if enabled is not None and not enabled:
+            self.max_size = 0
+        if refresh is not None:
+            self.refresh = refresh
+        if ttl is not None:
+            self.ttl = ttl
+        if directory is not None:
+            self.set_directory(directory)
+
+    def get(self, paper_data: PaperData) -> Optional[FailureRecord]:
+        """The unexpired permanent failure recorded for the paper, if any."""
+        if not self.enabled or self.refresh or not paper_data.paper_id:
+            return None
+        key = paper_key(paper_data)
+        data = self.read(key)
+        if data is None:
+            return None
+        try:
+            record = FailureRecord(**json.loads(data))
+        except Exception:
+            return None
+        if record.key != key or time.time() - record.stored >= self.ttl:
+            return None
+        return record
+
+    def put(self, paper_data: PaperData, reason: str) -> None:
+        """Record that the paper failed permanently because of `reason`."""
+        if not self.enabled or not paper_data.paper_id:
+            return
+        record = FailureRecord(paper_key(paper_data), time.time(), reason)
+        self.write(record.key, json.dumps(record._asdict()).encode("utf-8"))
+
+    def forget(self, paper_data: PaperData) -> None:
+        """
+        Drop the record of a paper retried with `refresh` that turned out to
+        exist after all; without it, only expired records can be outdated.
+        """
+        if self.enabled and self.refresh and paper_data.paper_id:
+            self.delete(paper_key(paper_data))
+
+    def record_skip(self, paper_data: PaperData) -> None:
+        with self._skipped_lock:
+            self.skipped.add(paper_key(paper_data))
+
+
+failure_cache = FailureCache()
+
+
+def configure_failure_cache(
+    enabled: Optional[bool] = None,
+    refresh: Optional[bool] = None,
+    ttl: Optional[float] = None,
+) -> None:
+    """
+    Enable or disable the cache, ignore what it holds (`refresh`), or change
+    how long failures are remembered, in seconds.
+    """
+    failure_cache.configure(enabled=enabled, refresh=refresh, ttl=ttl)
@@ -1,3 +1,4 @@
+import asyncio
 import json
 import os
 import re
@@ -5,17 +6,41 @@ import shlex
 import string
 import subprocess
 import sys
+import threading
 from pathlib import Path
-from typing import Union
+from typing import Dict, Iterable, Optional, Union
 
 import pymupdf
 
-from .dl_utils import download, download_with_rich
+from .dl_utils import download, download_async, download_segmented, download_with_rich
 from .models import PaperData
+from .network import (
+    STALL_MIN_BYTES,
+    bandwidth,
+    endpoints,
+    get_timeouts,
+    host_limiter,
+    remaining_time,
+)
+from .pdf_store import pdf_store, unshare_file
 from .printer import console
+from .target_parser import paper_key
 
 DEFAULT_DOWNLOAD_PATH = Path.home() / "Downloads/ArXiv_Papers"
 
+PAPER_LIST_NAME = "000_Paper_List.json"
+# Heading of the reading notes section of a notes file.
+NOTES_HEADING = "\n## Notes\n"
+
+# Guards the read-modify-write of the shared paper list across worker threads.
+_PAPER_LIST_LOCK = threading.Lock()
+# In-memory index of the paper list of each download directory, see
+# `find_local_paper()`: {paper list path: (mtime_ns, {canonical key: paper dict})}
+_PAPER_INDEXES: Dict[Path, tuple] = {}
+# rich allows a single live progress display at a time; concurrent downloads
+# that cannot take it fall back to the plain downloader.
+_PROGRESS_BAR_LOCK = threading.Lock()
+
 
 ###########################################################################
 ### General Helper Functions
@@ -32,21 +57,25 @@ def _initial_configs() -> dict:
     )
 
 
-def get_config_path() -> Path:
-    """Get platform-specific config file path."""
+def get_config_dir() -> Path:
+    """Get platform-specific config directory."""
     current_platform = sys.platform
     if current_platform in ("linux", "darwin"):
         config_dir = Path.home() / ".config/arxiv-dl"
-        config_dir.mkdir(parents=True, exist_ok=True)
-        config_path = config_dir / "config.json"
     elif current_platform == "win32":
         local_app_data = os.getenv("LOCALAPPDATA", Path.home() / "AppData/Local")
         config_dir = Path(local_app_data) / "arxiv-dl"
-        config_dir.mkdir(parents=True, exist_ok=True)
-        config_path = config_dir / "config.json"
     else:
         raise Exception("Unknown platform.")
 
+    config_dir.mkdir(parents=True, exist_ok=True)
+    return config_dir
+
+
+def get_config_path() -> Path:
+    """Get platform-specific config file path."""
+    config_path = get_config_dir() / "config.json"
+
     # create config file if it does not exist
     if not config_path.is_file():
         with config_path.open(mode="w") as f:
@@ -55,6 +84,22 @@ def get_config_path() -> Path:
     return config_path
 
 
+def get_cache_dir() -> Path:
+    """Get platform-specific cache directory."""
+    current_platform = sys.platform
+    if current_platform in ("linux", "darwin"):
+        cache_home = os.getenv("XDG_CACHE_HOME") or Path.home() / ".cache"
+        cache_dir = Path(cache_home) / "arxiv-dl"
+    elif current_platform == "win32":
+        local_app_data = os.getenv("LOCALAPPDATA", Path.home() / "AppData/Local")
+        cache_dir = Path(local_app_data) / "arxiv-dl" / "cache"
+    else:
+        raise Exception("Unknown platform.")
+
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    return cache_dir
+
+
 def normalize_paper_title(title: str) -> str:
     normalized_title = ""
     for char in title:
@@ -93,7 +138,14 @@ def download_pdf(
     paper_data: PaperData,
     download_dir: Union[str, Path],
     parallel_connections: int = 5,
+    embed_metadata: bool = True,
 ) -> None:
+    """
+    Download the paper PDF into `download_dir` and embed its metadata.
+
+    With `embed_metadata=False` the caller is responsible for running
+    `add_pdf_metadata()`, e.g. in a process pool.
+    """
     download_path: Path = Path(download_dir) / paper_data.download_name
     N = int(parallel_connections)
     assert N > 0, "Number of parallel connections must be greater than 0."
@@ -105,6 +157,11 @@ def download_pdf(
         )
         return None
 
+    if materialize_pdf(paper_data, download_path):
+        if embed_metadata:
+            add_pdf_metadata(paper_data, download_path)
+        return None
+
     if paper_data.src_website == "CVF":
         # NOTE: download from CVF is sufficiently fast using 1 connection
         N = 1
@@ -121,23 +178,97 @@ def download_pdf(
             url=paper_data.pdf_url,
             download_dir=download_dir,
             download_name=paper_data.download_name,
+            parallel_connections=N,
         )
 
     if isinstance(out, Path):
         if out.is_file():
             console.success(f'Paper saved to [green underline]"{download_path}"')
 
-    add_pdf_metadata(paper_data, download_path)
+    if embed_metadata:
+        add_pdf_metadata(paper_data, download_path)
+
+    return None
+
+
+async def download_pdf_async(
+    paper_data: PaperData,
+    download_dir: Union[str, Path],
+    client,
+    embed_metadata: bool = True,
+) -> None:
+    """
+    Asynchronous counterpart of `download_pdf()` used by the asyncio engine.
+
+    The PDF is streamed over a single connection with `client`; PDF metadata
+    embedding runs in a worker thread so it does not block the event loop.
+    """
+    download_path: Path = Path(download_dir) / paper_data.download_name
+
+    if download_path.is_file():
+        console.success(
+            f'Found the paper PDF locally at [green underline]"{download_path}"'
+        )
+        return None
+
+    if await asyncio.to_thread(materialize_pdf, paper_data, download_path):
+        if embed_metadata:
+            await asyncio.to_thread(add_pdf_metadata, paper_data, download_path)
+        return None
+
+    console.info("Downloading paper using HTTP...")
+    await download_async(client, url=paper_data.pdf_url, out=str(download_path))
+    if download_path.is_file():
+        console.success(f'Paper saved to [green underline]"{download_path}"')
+
+    if embed_metadata:
+        await asyncio.to_thread(add_pdf_metadata, paper_data, download_path)
 
     return None
 
 
+def materialize_pdf(paper_data: PaperData, download_path: Path) -> bool:
+    """
+    Place the paper PDF at `download_path` from the PDF store, if it holds it,
+    instead of downloading it again.
+    """
+    try:
+        link_mode = pdf_store.materialize(paper_data, download_path)
+    except OSError as err:
+        console.debug(f"Could not use the PDF store: {err}")
+        return False
+    if link_mode is None:
+        return False
+    console.success(
+        f"Found the paper PDF in the PDF store ({link_mode}), "
+        f'saved to [green underline]"{download_path}"'
+    )
+    return True
+
+
+def store_pdf(paper_data: PaperData, download_dir: Union[str, Path]) -> None:
+    """Keep the finished paper PDF in the PDF store for other download directories."""
+    if not paper_data.download_name:
+        return
+    download_path = Path(download_dir) / paper_data.download_name
+    if not download_path.is_file():
+        return
+    try:
+        pdf_store.add(paper_data, download_path)
+    except OSError as err:
+        console.debug(f"Could not add the PDF to the PDF store: {err}")
+
+
 def http_download(
     url: str,
     download_dir: Union[str, Path],
     download_name: str,
+    parallel_connections: int = 1,
 ) -> Path:
     """
+    Download the paper over HTTP, using byte ranges over several connections
+    if `parallel_connections` is greater than 1 and the server supports it.
+
     Assume:
         1. download_dir exists.
         2. target file does not exist.
@@ -147,10 +278,28 @@ def http_download(
     download_path: Path = download_dir / download_name
     assert download_path.is_file() is False, "File already exists"
 
-    console.info("Downloading paper using HTTP...")
-    if console.verbose_level >= 1:
-        transient = console.verbose_level == 1
-        download_with_rich(url=url, out=str(download_path), transient=transient)
+    N = int(parallel_connections)
+    if N > 1:
+        console.info(f"Downloading paper using HTTP with up to {N} connections...")
+    else:
+        console.info("Downloading paper using HTTP...")
+    if console.verbose_level >= 1 and _PROGRESS_BAR_LOCK.acquire(blocking=False):
+        try:
+            transient = console.verbose_level == 1
+            if N > 1:
+                download_segmented(
+                    url=url,
+                    out=str(download_path),
+                    connections=N,
+                    show_progress=True,
+                    transient=transient,
+                )
+            else:
+                download_with_rich(url=url, out=str(download_path), transient=transient)
+        finally:
+            _PROGRESS_BAR_LOCK.release()
+    elif N > 1:
+        download_segmented(url=url, out=str(download_path), connections=N)
     else:
         download(url=url, out=str(download_path))
     return download_path
@@ -178,8 +327,17 @@ def aria2_download(
     assert N > 0, "Number of parallel connections must be greater than 0."
     assert N <= 16, "Number of parallel connections must be less than 16."
 
+    # aria2 does its own requests, so it is pointed at the best endpoint here
+    url = endpoints.resolve(url)
+    # aria2 takes whole seconds and a speed instead of a stall timeout
+    timeouts = get_timeouts()
+    connect_timeout = max(1, round(timeouts.connect))
+    read_timeout = max(1, round(timeouts.read))
+    lowest_speed = max(1, int(STALL_MIN_BYTES / max(1.0, timeouts.stall)))
     aria2_command = (
-        f"aria2c -x {N} -s {N} -d '{download_dir}' -o '{download_name}' {url}"
+        f"aria2c -x {N} -s {N} --connect-timeout={connect_timeout} "
+        f"--timeout={read_timeout} --lowest-speed-limit={lowest_speed} "
+        f"-d '{download_dir}' -o '{download_name}' {url}"
     )
     # NOTE: aria2c flags:
     # -x, --max-connection-per-server=<NUM>
@@ -190,14 +348,30 @@ def aria2_download(
     #     The directory to store the downloaded file.
     # -o, --out=<FILE>
     #     The file name of the downloaded file relative to the directory given in -d option.
+    # --connect-timeout=<SEC>, --timeout=<SEC>
+    #     Connect and read timeouts.
+    # --lowest-speed-limit=<SPEED>
+    #     Close a connection slower than SPEED bytes per second.
+    # --max-download-limit=<SPEED>
+    #     Cap the download speed, in bytes per second.
 
     # logger.debug(f"Executing: '{aria2_command}'")
     console.info(f"Downloading paper using aria2 with {N} connections...")
-    completed_proc = subprocess.run(
-        shlex.split(aria2_command),
-        stdout=subprocess.PIPE,
-        stderr=subprocess.STDOUT,
-    )
+    with host_limiter.limit(url), bandwidth.transfer(url):
+        # aria2 cannot follow later changes of the share it starts with
+        rate = bandwidth.share(url)
+        if rate:
+            aria2_command += f" --max-download-limit={max(1, int(rate))}"
+        try:
+            completed_proc = subprocess.run(
+                shlex.split(aria2_command),
+                stdout=subprocess.PIPE,
+                stderr=subprocess.STDOUT,
+                timeout=remaining_time(),
+            )
+        except subprocess.TimeoutExpired:
+            console.error("aria2c did not finish within the time budget")
+            return None
     if completed_proc.returncode != 0:
         console.error(f"aria2c failed with return code {completed_proc.returncode}")
         console.error(f"{completed_proc.stdout.decode('utf-8')}")
@@ -223,31 +397,111 @@ def command_exists(command: str) -> bool:
 
 
 def add_pdf_metadata(paper_data: PaperData, download_path: Path):
+    """
+    Embed the paper's authors, title and abstract in the PDF metadata.
+
+    The PDF is left untouched if it already carries the same metadata, so
+    repeating the call does not grow the file with incremental saves.
+    """
+    metadata = {
+        "author": ", ".join(paper_data.authors),
+        "title": paper_data.title,
+        "subject": paper_data.abstract,
+    }
     doc = pymupdf.open(download_path)
-    doc.set_metadata(
-        {
-            "author": ", ".join(paper_data.authors),
-            "title": paper_data.title,
-            "subject": paper_data.abstract,
-        }
-    )
-    doc.saveIncr()
-    doc.close()
+    try:
+        if all(doc.metadata.get(k) == (v or "") for k, v in metadata.items()):
+            return
+    finally:
+        doc.close()
+
+    # saved in place: a PDF hardlinked from the PDF store gets its own copy
+    unshare_file(Path(download_path))
+    doc = pymupdf.open(download_path)
+    try:
+        doc.set_metadata(metadata)
+        doc.saveIncr()
+    finally:
+        doc.close()
+
+
+def find_local_paper(
+    paper_data: PaperData, download_dir: Union[str, Path]
+) -> Optional[PaperData]:
+    """
+    Look up an already-downloaded paper in the paper list of `download_dir`.
+
+    Papers are matched by canonical ID (source website and paper ID), so this
+    only needs the output of `parse_target()`. The paper list is indexed in
+    memory once and re-read only when it changes on disk.
+
+    Returns:
+        The recorded PaperData if the paper is listed and its PDF is still in
+        `download_dir`, None otherwise.
+    """
+    paper_list_path: Path = Path(download_dir) / PAPER_LIST_NAME
+    try:
+        mtime = paper_list_path.stat().st_mtime_ns
+    except OSError:
+        return None
+
+    with _PAPER_LIST_LOCK:
+        cached = _PAPER_INDEXES.get(paper_list_path)
+        if cached is None or cached[0] != mtime:
+            try:
+                with paper_list_path.open() as f:
+                    paper_list = json.load(f)
+            except (OSError, ValueError):
+                return None
+            index = {}
+            for paper_dict in paper_list.values():
+                try:
+                    index[paper_key(_paper_from_dict(paper_dict))] = paper_dict
+                except Exception:
+                    continue
+            cached = (mtime, index)
+            _PAPER_INDEXES[paper_list_path] = cached
+        paper_dict = cached[1].get(paper_key(paper_data))
+
+    if not paper_dict or not paper_dict.get("download_name"):
+        return None
+    if not (Path(download_dir) / paper_dict["download_name"]).is_file():
+        return None
+    return _paper_from_dict(paper_dict)
+
 
+def _paper_from_dict(paper_dict: dict) -> PaperData:
+    # the paper list stores unset fields as null
+    return PaperData(**{k: v for k, v in paper_dict.items() if v is not None})
 
-def add_to_paper_list(paper_data: PaperData, download_dir: Union[str, Path]) -> None:
-    paper_list_path: Path = Path(download_dir) / "000_Paper_List.json"
-    paper_dict = paper_data.dict()
 
-    paper_list = dict()
-    if paper_list_path.is_file():
-        with paper_list_path.open() as f:
-            paper_list = json.load(f)
+def add_to_paper_list(
+    paper_data: Union[PaperData, Iterable[PaperData]],
+    download_dir: Union[str, Path],
+    replace: bool = False,
+) -> None:
+    """
+    Add one or several papers to the paper list of `download_dir`.
 
-    if paper_data.paper_id not in paper_list:
-        paper_list[paper_data.paper_id] = paper_dict
-        with paper_list_path.open(mode="w") as f:
-            json.dump(paper_list, f, indent=4)
+    Listed papers are left as they are, unless `replace` is set.
+    """
+    paper_list_path: Path = Path(download_dir) / PAPER_LIST_NAME
+    papers = [paper_data] if isinstance(paper_data, PaperData) else list(paper_data)
+
+    with _PAPER_LIST_LOCK:
+        paper_list = dict()
+        if paper_list_path.is_file():
+            with paper_list_path.open() as f:
+                paper_list = json.load(f)
+
+        changed = False
+        for paper in papers:
+            if replace or paper.paper_id not in paper_list:
+                paper_list[paper.paper_id] = paper.dict()
+                changed = True
+        if changed:
+            with paper_list_path.open(mode="w") as f:
+                json.dump(paper_list, f, indent=4)
 
     return None
 
@@ -256,7 +510,14 @@ def create_paper_note(
     paper_data: PaperData,
     download_dir: Union[str, Path],
     notes_format: str = "txt",
+    overwrite: bool = False,
 ) -> None:
+    """
+    Create the notes file of a paper, unless it exists.
+
+    With `overwrite`, an existing notes file is regenerated from `paper_data`
+    but the reading notes written under its last `## Notes` heading are kept.
+    """
     download_path: Path = Path(download_dir) / paper_data.download_name
     if notes_format not in ["md", "txt"]:
         notes_format = "txt"
@@ -314,7 +575,13 @@ Community Code
 Type your reading notes here...
 
 """
-    if not note_path.is_file():
-        with note_path.open(mode="w") as f:
-            f.write(md_content)
+    if note_path.is_file():
+        if not overwrite:
+            return
+        old_content = note_path.read_text()
+        _, sep, notes = old_content.rpartition(NOTES_HEADING)
+        if sep:
+            md_content = md_content.rpartition(NOTES_HEADING)[0] + sep + notes
+    with note_path.open(mode="w") as f:
+        f.write(md_content)
     return
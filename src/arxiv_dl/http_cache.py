@@ -0,0 +1,147 @@
+"""
+On-disk HTTP cache for arxiv-dl.
+
+Pages fetched from paper sources (abstract pages, proceedings pages, BibTeX,
+listing pages) are stored with their validators. Within the freshness
+lifetime a stored page is served without any request; after it, the page is
+revalidated with `If-None-Match` / `If-Modified-Since`, and a `304 Not
+Modified` answer is served from the cache, skipping the transfer. Scrapers
+may also store what they parsed out of a page next to it, so a page that did
+not change is not parsed again; with `reuse_parsed` off, stored parses are
+ignored and dropped when their page is revalidated.
+
+Each entry is a `DiskCache` file keyed by URL: a JSON header line followed
+by the raw body.
+"""
+
+import json
+import time
+from pathlib import Path
+from typing import Any, Dict, NamedTuple, Optional
+
+from .disk_cache import DiskCache
+
+# Stored pages are served without revalidation for this long.
+DEFAULT_MAX_AGE = 3600.0
+DEFAULT_MAX_SIZE = 64 * 1024 * 1024
+# Response headers kept with a stored body.
+_STORED_HEADERS = ("content-type", "etag", "last-modified")
+
+
+class CacheEntry(NamedTuple):
+    """A stored response."""
+
+    url: str
+    # time.time() when the body was stored or last revalidated
+    stored: float
+    headers: Dict[str, str]
+    body: bytes
+    # data parsed out of the body by the caller, if saved
+    parsed: Optional[Any] = None
+
+    @property
+    def etag(self) -> Optional[str]:
+        return self.headers.get("etag")
+
+    @property
+    def last_modified(self) -> Optional[str]:
+        return self.headers.get("last-modified")
+
+
+class HttpCache(DiskCache):
+    """
+    Size-capped, least-recently-used cache of GET responses on disk.
+
+    The cache directory defaults to `http/` in the arxiv-dl cache directory
+    and is created on first use. A `max_size` of 0 disables the cache.
+    """
+
+    def __init__(
+        self,
+        directory: Optional[Path] = None,
+        max_age: float = DEFAULT_MAX_AGE,
+        max_size: int = DEFAULT_MAX_SIZE,
+    ):
+        super().__init__("http", directory, max_size)
+        self.max_age = max_age
+        self.reuse_parsed = True
+
+    def configure(
+        self,
+        max_age: Optional[float] = None,
+        max_size: Optional[int] = None,
+        reuse_parsed: Optional[bool] = None,
+        directory: Optional[Path] = None,
+    ) -> None:
+        if max_age is not None:
+            self.max_age = max_age
+        if reuse_parsed is not None:
+            self.reuse_parsed = reuse_parsed
+        if max_size is not None:
+            self.max_size = max_size
+        if directory is not None:
+            self.set_directory(directory)
+
+    def load(self, url: str) -> Optional[CacheEntry]:
+        """The entry stored for `url`, if any; marks it as recently used."""
+        data = self.read(url)
+        if data is None:
+            return None
+        header, _, body = data.partition(b"\n")
+        try:
+            meta = json.loads(header)
+        except ValueError:
+            return None
+        if meta.get("url") != url:
+            return None
+        return CacheEntry(
+            url=url,
+            stored=meta.get("stored", 0.0),
+            headers=meta.get("headers", {}),
+            body=body,
+            parsed=meta.get("parsed"),
+        )
+
+    def is_fresh(self, entry: CacheEntry) -> bool:
+        return time.time() - entry.stored < self.max_age
+
+    @staticmethod
+    def conditional_headers(entry: CacheEntry) -> Dict[str, str]:
+        """Request headers revalidating `entry`."""
+        headers = {}
+        if entry.etag:
+            headers["If-None-Match"] = entry.etag
+        if entry.last_modified:
+            headers["If-Modified-Since"] = entry.last_modified
+        return headers
+
+    def store(self, url: str, headers, body: bytes) -> Optional[CacheEntry]:
+        """Store a 200 response; responses marked `no-store` are not kept."""
+        if "no-store" in (headers.get("cache-control") or "").lower():
+            return None
+        stored_headers = {
+            name: headers[name] for name in _STORED_HEADERS if headers.get(name)
+        }
+        entry = CacheEntry(url, time.time(), stored_headers, body)
+        self._write(entry)
+        return entry
+
+    def revalidated(self, entry: CacheEntry) -> CacheEntry:
+        """Record that the server confirmed `entry` is still current."""
+        entry = entry._replace(stored=time.time())
+        if not self.reuse_parsed:
+            entry = entry._replace(parsed=None)
+        self._write(entry)
+        return entry
+
+    def save_parsed(self, url: str, parsed: Any) -> None:
+        """Store JSON-serialisable data parsed out of the body stored for `url`."""
+        entry = self.load(url)
+        if entry is not None:
+            self._write(entry._replace(parsed=parsed))
+
+    def _write(self, entry: CacheEntry) -> None:
+        meta = {"url": entry.url, "stored": entry.stored, "headers": entry.headers}
+        if entry.parsed is not None:
+            meta["parsed"] = entry.parsed
+        self.write(entry.url, json.dumps(meta).encode("utf-8") + b"\n" + entry.body)
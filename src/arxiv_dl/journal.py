@@ -0,0 +1,161 @@
+"""
+Run journal for arxiv-dl.
+
+The journal is an append-only JSON Lines file recording the last stage
+reached by every paper of a run, so that an interrupted run can be resumed
+without repeating the work that already completed:
+
+    {"key": "ArXiv:1512.03385", "stage": "resolved"}
+    {"key": "ArXiv:1512.03385", "stage": "scraped", "paper": {...}}
+    {"key": "ArXiv:1512.03385", "stage": "downloaded"}
+
+Papers are keyed by `canonical_target_key()`, so a paper is recognised
+whichever URL or ID it was given by.
+"""
+
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional, Union
+
+from .helpers import get_cache_dir
+from .models import PaperData
+from .target_parser import canonical_target_key, paper_key
+
+# Stages of a paper, in the order they are completed.
+STAGES = ("resolved", "scraped", "downloaded", "indexed", "noted")
+# Journals left in the cache directory by unfinished runs are removed after
+# this many seconds, or once more recent ones exceed JOURNAL_MAX_COUNT.
+JOURNAL_MAX_AGE = 7 * 24 * 3600
+JOURNAL_MAX_COUNT = 20
+
+
+class _Entry:
+    __slots__ = ("stage", "paper")
+
+    def __init__(self):
+        self.stage = -1
+        self.paper: Optional[dict] = None
+
+
+class Journal:
+    """
+    Stage journal of a batch run, backed by an append-only JSONL file.
+
+    Existing records are loaded when the journal is opened, and new ones are
+    appended and flushed as stages complete. Lines that cannot be parsed, such
+    as one cut short when the process was killed, are ignored. The journal is
+    safe to use from multiple worker threads.
+    """
+
+    def __init__(self, path: Union[Path, str]):
+        self.path = Path(path).expanduser()
+        self._entries: Dict[str, _Entry] = {}
+        self._lock = threading.Lock()
+        self._load()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(self.path, "a", encoding="utf-8")
+
+    def _load(self) -> None:
+        if not self.path.is_file():
+            return
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                    key = record["key"]
+                    stage = STAGES.index(record["stage"])
+                except (ValueError, KeyError, TypeError):
+                    continue
+                entry = self._entries.setdefault(key, _Entry())
+                entry.stage = max(entry.stage, stage)
+                if record.get("paper"):
+                    entry.paper = record["paper"]
+
+    @staticmethod
+    def _key(paper: Union[str, PaperData]) -> str:
+        if isinstance(paper, PaperData):
+            return paper_key(paper)
+        return canonical_target_key(paper)
+
+    @property
+    def n_papers(self) -> int:
+        """Number of papers with at least one recorded stage."""
+        return len(self._entries)
+
+    def reached(self, paper: Union[str, PaperData], stage: str) -> bool:
+        """Whether the paper (a target or its PaperData) completed `stage`."""
+        entry = self._entries.get(self._key(paper))
+        return entry is not None and entry.stage >= STAGES.index(stage)
+
+    def paper_data(self, target: str) -> Optional[PaperData]:
+        """The scraped metadata of the target, if recorded."""
+        entry = self._entries.get(self._key(target))
+        if entry is None or entry.paper is None:
+            return None
+        return PaperData(**entry.paper)
+
+    def record(
+        self,
+        paper: Union[str, PaperData],
+        stage: str,
+        paper_data: Optional[PaperData] = None,
+    ) -> None:
+        """
+        Record that the paper completed `stage`, optionally with its metadata.
+
+        The recorded stage never goes back: re-running an earlier stage of a
+        paper, e.g. its metadata after it was downloaded, keeps the later one.
+        """
+        key = self._key(paper)
+        with self._lock:
+            if self._file.closed:
+                return
+            entry = self._entries.setdefault(key, _Entry())
+            stage_index = STAGES.index(stage)
+            if stage_index <= entry.stage and paper_data is None:
+                return
+            entry.stage = max(entry.stage, stage_index)
+            record = {"key": key, "stage": STAGES[entry.stage]}
+            if paper_data is not None:
+                record["paper"] = entry.paper = paper_data.model_dump(exclude_none=True)
+            line = json.dumps(record, ensure_ascii=False) + "\n"
+            # flushed to the OS, not fsync'ed: cheap, and survives the process
+            self._file.write(line)
+            self._file.flush()
+
+    def close(self) -> None:
+        with self._lock:
+            self._file.close()
+
+    def __enter__(self) -> "Journal":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def prune_journals() -> None:
+    """Remove the stale journals left in the cache directory by unfinished runs."""
+    journal_dir = get_cache_dir() / "journals"
+    if not journal_dir.is_dir():
+        return
+    journals = []
+    for path in journal_dir.glob("*.jsonl"):
+        try:
+            journals.append((path.stat().st_mtime, path))
+        except OSError:
+            continue
+    journals.sort(reverse=True)
+    cutoff = time.time() - JOURNAL_MAX_AGE
+    for i, (mtime, path) in enumerate(journals):
+        if i >= JOURNAL_MAX_COUNT or mtime < cutoff:
+            path.unlink(missing_ok=True)
+
+
+def new_journal_path() -> Path:
+    """Path of a fresh journal in the cache directory."""
+    name = f"{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}.jsonl"
+    return get_cache_dir() / "journals" / name
@@ -0,0 +1,124 @@
+"""
+Persistent cache of scraped paper metadata for arxiv-dl.
+
+`scrape_metadata()` stores the `PaperData` of every paper it scraped
+completely, BibTeX included, keyed by canonical ID (source website and paper
+ID), and reuses it for the same paper in later runs, whatever the download
+directory, without any network I/O. Proceedings do not change once published, so
+their metadata never expires; arXiv papers may get new versions, so theirs
+is re-scraped after a day.
+"""
+
+import json
+import time
+from pathlib import Path
+from typing import Dict, Optional
+
+from .disk_cache import DiskCache
+from .models import PaperData
+from .target_parser import paper_key
+
+DAY = 24 * 3600.0
+# Lifetime of cached metadata by source website, in seconds; None never expires.
+DEFAULT_TTLS: Dict[str, Optional[float]] = {
+    "ArXiv": DAY,
+    "CVF": None,
+    "ECVA": None,
+    "NeurIPS": None,
+    "ICLR": None,
+}
+# Lifetime for sources missing from the table.
+DEFAULT_TTL = 7 * DAY
+DEFAULT_MAX_SIZE = 16 * 1024 * 1024
+
+
+class MetadataCache(DiskCache):
+    """
+    Size-capped, least-recently-used cache of `PaperData` on disk.
+
+    The cache directory defaults to `metadata/` in the arxiv-dl cache
+    directory. A `max_size` of 0 disables the cache; with `refresh` set,
+    cached metadata is ignored but freshly scraped metadata is still stored.
+    """
+
+    def __init__(
+        self,
+        directory: Optional[Path] = None,
+        max_size: int = DEFAULT_MAX_SIZE,
+        ttls: Optional[Dict[str, Optional[float]]] = None,
+    ):
+        super().__init__("metadata", directory, max_size)
+        self.ttls = dict(DEFAULT_TTLS if ttls is None else ttls)
+        self.refresh = False
+
+    def configure(
+        self,
+        enabled: Optional[bool] = None,
+        refresh: Optional[bool] = None,
+        max_size: Optional[int] = None,
+        ttls: Optional[Dict[str, Optional[float]]] = None,
+        directory: Optional[Path] = None,
+    ) -> None:
+        if max_size is not None:
+            self.max_size = max_size
+        if enabled is not None and not enabled:
+            self.max_size = 0
+        if refresh is not None:
+            self.refresh = refresh
+        if ttls is not None:
+            self.ttls.update(ttls)
+        if directory is not None:
+            self.set_directory(directory)
+
+    def ttl(self, src_website: str) -> Optional[float]:
+        return self.ttls.get(src_website, DEFAULT_TTL)
+
+    def get(self, paper_data: PaperData) -> Optional[PaperData]:
+        """The cached metadata of the paper `paper_data` refers to, if current."""
+        if not self.enabled or self.refresh or not paper_data.paper_id:
+            return None
+        key = paper_key(paper_data)
+        data = self.read(key)
+        if data is None:
+            return None
+        try:
+            record = json.loads(data)
+            if record["key"] != key:
+                return None
+            ttl = self.ttl(paper_data.src_website)
+            if ttl is not None and time.time() - record["stored"] >= ttl:
+                return None
+            return PaperData(**record["paper_data"])
+        except Exception:
+            # written by an incompatible version; it is replaced when rescraped
+            return None
+
+    def put(self, paper_data: PaperData) -> None:
+        """Store the metadata of a successfully scraped paper."""
+        if not self.enabled or not paper_data.paper_id:
+            return
+        key = paper_key(paper_data)
+        record = {
+            "key": key,
+            "stored": time.time(),
+            "paper_data": paper_data.model_dump(exclude_none=True),
+        }
+        self.write(key, json.dumps(record).encode("utf-8"))
+
+
+metadata_cache = MetadataCache()
+
+
+def configure_metadata_cache(
+    enabled: Optional[bool] = None,
+    refresh: Optional[bool] = None,
+    max_size: Optional[int] = None,
+    ttls: Optional[Dict[str, Optional[float]]] = None,
+) -> None:
+    """
+    Enable or disable the cache, ignore what it holds (`refresh`), cap its
+    size in bytes, or change the lifetime of some sources' metadata.
+    """
+    metadata_cache.configure(
+        enabled=enabled, refresh=refresh, max_size=max_size, ttls=ttls
+    )
@@ -15,6 +15,8 @@ class PaperData(BaseModel):
 
     title: str = None
     year: int = None
+    # version of the paper at its source, e.g. "v2" on arXiv
+    version: str = None
     paper_venue: str = None
     authors: List[str] = []
     abstract: str = None
@@ -0,0 +1,1711 @@
+"""
+Network utilities for arxiv-dl.
+
+Every HTTP request made by the scrapers, the target parser, the downloaders
+and the updater goes through this module, so that policies such as per-host
+rate limiting apply uniformly to all of them. Requests share one pooled
+`requests.Session`, so connections (and TLS sessions) are reused across
+papers, and transient failures of these idempotent GETs are retried with
+capped exponential backoff. Every request has connect and read timeouts, and
+may be bounded by the deadline of the target it is made for. Sources served
+by several equivalent endpoints (e.g. arxiv.org and export.arxiv.org) are
+reached through the fastest one that is currently healthy, and their pages
+are kept in an on-disk cache revalidated with the server's validators. A host
+that keeps failing is skipped for a while by its circuit breaker.
+Optionally, the small page and metadata requests are multiplexed over a few
+HTTP/2 connections instead (see `configure_http2()`).
+"""
+
+import asyncio
+import importlib.metadata
+import json
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from email.utils import parsedate_to_datetime
+from pathlib import Path
+from typing import (
+    Any,
+    AsyncIterator,
+    Dict,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+
+try:
+    import httpx
+except ImportError:  # optional dependency
+    httpx = None
+
+from .archive import ResponseArchive
+from .http_cache import CacheEntry, HttpCache
+from .printer import console
+
+###############################################################################
+### Per-host limits
+
+
+class HostLimit(NamedTuple):
+    """Limits applied to every request sent to one host."""
+
+    # maximum number of requests/transfers in flight at once
+    max_connections: int = 8
+    # sustained request rate; None means unlimited
+    requests_per_second: Optional[float] = None
+
+
+DEFAULT_HOST_LIMIT = HostLimit()
+DEFAULT_HOST_LIMITS: Dict[str, HostLimit] = {
+    "arxiv.org": HostLimit(max_connections=4, requests_per_second=4.0),
+    "openaccess.thecvf.com": HostLimit(max_connections=4, requests_per_second=4.0),
+    "ecva.net": HostLimit(max_connections=4, requests_per_second=4.0),
+    "proceedings.neurips.cc": HostLimit(max_connections=4, requests_per_second=4.0),
+    "papers.nips.cc": HostLimit(max_connections=4, requests_per_second=4.0),
+    "proceedings.iclr.cc": HostLimit(max_connections=4, requests_per_second=4.0),
+    "huggingface.co": HostLimit(max_connections=4, requests_per_second=4.0),
+}
+
+
+class _HostState:
+    """Connection slots and token bucket of a single host."""
+
+    def __init__(self, limit: HostLimit):
+        self.limit = limit
+        self.cond = threading.Condition()
+        self.active = 0
+        self.tokens = self._capacity()
+        self.updated = time.monotonic()
+
+    def _capacity(self) -> float:
+        rate = self.limit.requests_per_second
+        return max(1.0, rate) if rate else 0.0
+
+    def try_acquire_slot(self) -> bool:
+        with self.cond:
+            if self.active < self.limit.max_connections:
+                self.active += 1
+                return True
+            return False
+
+    def acquire_slot(self) -> None:
+        with self.cond:
+            while self.active >= self.limit.max_connections:
+                self.cond.wait()
+            self.active += 1
+
+    def release_slot(self) -> None:
+        with self.cond:
+            self.active -= 1
+            self.cond.notify()
+
+    def reserve_token(self) -> float:
+        """Take one request token and return how long to wait before using it."""
+        rate = self.limit.requests_per_second
+        if not rate:
+            return 0.0
+        with self.cond:
+            now = time.monotonic()
+            self.tokens = min(
+                self._capacity(), self.tokens + (now - self.updated) * rate
+            )
+            self.updated = now
+            # Going negative reserves a future token, which keeps waiters in order.
+            self.tokens -= 1
+            return max(0.0, -self.tokens / rate)
+
+
+class HostLimiter:
+    """
+    Process-wide limiter keyed by hostname.
+
+    Each host gets a cap on concurrent requests and a token bucket bounding
+    its request rate. Limits are looked up by exact hostname first and then
+    by parent domain, e.g. `www.ecva.net` falls back to `ecva.net`.
+    """
+
+    def __init__(self, limits: Optional[Dict[str, HostLimit]] = None):
+        self.limits: Dict[str, HostLimit] = dict(limits or {})
+        self.default = DEFAULT_HOST_LIMIT
+        self._hosts: Dict[str, _HostState] = {}
+        self._lock = threading.Lock()
+
+    def configure(
+        self,
+        host: str,
+        max_connections: Optional[int] = None,
+        requests_per_second: Optional[float] = None,
+    ) -> None:
+        """Set the limits for `host`; use `"*"` for the default of unknown hosts."""
+        host = host.lower()
+        current = self.default if host == "*" else self.get_limit(host)
+        limit = HostLimit(
+            max_connections=max(1, int(max_connections or current.max_connections)),
+            requests_per_second=(
+                requests_per_second
+                if requests_per_second is not None
+                else current.requests_per_second
+            ),
+        )
+        with self._lock:
+            if host == "*":
+                self.default = limit
+                # reset hosts that were using the old default
+                self._hosts = {
+                    name: state
+                    for name, state in self._hosts.items()
+                    if self._lookup(name) is not None
+                }
+            else:
+                self.limits[host] = limit
+                self._hosts.pop(host, None)
+
+    def _lookup(self, host: str) -> Optional[HostLimit]:
+        parts = host.split(".")
+        for i in range(len(parts) - 1):
+            limit = self.limits.get(".".join(parts[i:]))
+            if limit is not None:
+                return limit
+        return None
+
+    def get_limit(self, host: str) -> HostLimit:
+        return self._lookup(host.lower()) or self.default
+
+    def _state(self, url: str) -> _HostState:
+        host = (urlparse(url).hostname or "").lower()
+        with self._lock:
+            state = self._hosts.get(host)
+            if state is None:
+                state = _HostState(self.get_limit(host))
+                self._hosts[host] = state
+            return state
+
+    @contextmanager
+    def limit(self, url: str):
+        """Hold a connection slot for the host of `url` while the block runs."""
+        state = self._state(url)
+        state.acquire_slot()
+        try:
+            delay = state.reserve_token()
+            if delay:
+                time.sleep(delay)
+            yield
+        finally:
+            state.release_slot()
+
+    @asynccontextmanager
+    async def limit_async(self, url: str):
+        """Asynchronous counterpart of `limit()` that never blocks the event loop."""
+        state = self._state(url)
+        wait = 0.005
+        while not state.try_acquire_slot():
+            await asyncio.sleep(wait)
+            wait = min(wait * 2, 0.1)
+        try:
+            delay = state.reserve_token()
+            if delay:
+                await asyncio.sleep(delay)
+            yield
+        finally:
+            state.release_slot()
+
+
+host_limiter = HostLimiter(DEFAULT_HOST_LIMITS)
+
+
+def configure_host_limit(
+    host: str,
+    max_connections: Optional[int] = None,
+    requests_per_second: Optional[float] = None,
+) -> None:
+    """Configure the shared limiter for `host` (`"*"` for all other hosts)."""
+    host_limiter.configure(host, max_connections, requests_per_second)
+
+
+def parse_host_limit(spec: str) -> Tuple[str, int, Optional[float]]:
+    """
+    Parse a `HOST=CONN[:RPS]` specification, e.g. `arxiv.org=2:1.5`.
+
+    Raises:
+        ValueError: If the specification is malformed.
+    """
+    expected = f"Expected HOST=CONN[:RPS], e.g. arxiv.org=2:1.5, got '{spec}'"
+    host, sep, value = spec.partition("=")
+    if not sep or not host.strip():
+        raise ValueError(expected)
+    connections, _, rps = value.partition(":")
+    try:
+        max_connections = int(connections)
+        requests_per_second = float(rps) if rps else None
+    except ValueError:
+        raise ValueError(expected)
+    if max_connections < 1 or (
+        requests_per_second is not None and requests_per_second <= 0
+    ):
+        raise ValueError(f"Limits must be positive, got '{spec}'")
+    return host.strip().lower(), max_connections, requests_per_second
+
+
+###############################################################################
+### Bandwidth
+
+
+class BandwidthLimiter:
+    """
+    Process-wide byte-rate caps on response bodies.
+
+    A global rate and optional per-host rates (matched by hostname or parent
+    domain, like `HostLimiter`) are each split equally between the transfers
+    currently active under them. Every transfer paces itself to its share, so
+    a new transfer immediately slows the others down and a finished one
+    speeds them up. Rates are read on every chunk, so `configure()` takes
+    effect on running transfers, e.g. while a batch is in progress.
+    """
+
+    def __init__(self):
+        # bytes per second; None means unlimited
+        self.rate: Optional[float] = None
+        self.host_rates: Dict[str, float] = {}
+        self._active: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def configure(self, rate: Optional[float], host: Optional[str] = None) -> None:
+        """Set the global rate, or the rate of `host`; None or 0 lifts it."""
+        rate = rate or None
+        with self._lock:
+            if host is None:
+                self.rate = rate
+            elif rate is None:
+                self.host_rates.pop(host.lower(), None)
+            else:
+                self.host_rates[host.lower()] = rate
+
+    def _host_key(self, host: str) -> Optional[str]:
+        parts = host.split(".")
+        for i in range(len(parts) - 1):
+            key = ".".join(parts[i:])
+            if key in self.host_rates:
+                return key
+        return None
+
+    def shares(self, host: str) -> List[Tuple[str, float]]:
+        """(limit, bytes per second) available to one transfer from `host`."""
+        with self._lock:
+            shares = []
+            if self.rate:
+                shares.append(("*", self.rate / max(1, self._active.get("*", 0))))
+            key = self._host_key(host)
+            if key is not None:
+                n_active = sum(
+                    n
+                    for name, n in self._active.items()
+                    if name != "*" and self._host_key(name) == key
+                )
+                shares.append((key, self.host_rates[key] / max(1, n_active)))
+            return shares
+
+    def share(self, url: str) -> Optional[float]:
+        """Current rate of one transfer from `url`, or None if unlimited."""
+        host = (urlparse(url).hostname or "").lower()
+        return min((rate for _, rate in self.shares(host)), default=None)
+
+    @contextmanager
+    def transfer(self, url: str) -> Iterator["_Transfer"]:
+        """Count a transfer from `url` as active while the block runs."""
+        host = (urlparse(url).hostname or "").lower()
+        with self._lock:
+            for key in ("*", host):
+                self._active[key] = self._active.get(key, 0) + 1
+        try:
+            yield _Transfer(self, host)
+        finally:
+            with self._lock:
+                for key in ("*", host):
+                    self._active[key] -= 1
+                    if not self._active[key]:
+                        del self._active[key]
+
+
+class _Transfer:
+    """Paces one transfer to its share of every limit it is subject to."""
+
+    def __init__(self, limiter: BandwidthLimiter, host: str):
+        self.limiter = limiter
+        self.host = host
+        # per limit, the time at which the bytes received so far are paid for
+        self.paid_until: Dict[str, float] = {}
+
+    def delay(self, n_bytes: int) -> float:
+        """Account for `n_bytes` received and return how long to pause."""
+        now = time.monotonic()
+        delay = 0.0
+        for key, rate in self.limiter.shares(self.host):
+            # no credit is kept for idle time, so a share is never exceeded
+            paid_until = max(self.paid_until.get(key, now), now) + n_bytes / rate
+            self.paid_until[key] = paid_until
+            delay = max(delay, paid_until - now)
+        return delay
+
+
+bandwidth = BandwidthLimiter()
+
+
+def configure_bandwidth(rate: Optional[float], host: Optional[str] = None) -> None:
+    """
+    Cap the download rate in bytes per second, globally or for `host`.
+
+    May be called at any time; running transfers adopt the new rate with
+    their next chunk. None or 0 removes the cap.
+    """
+    bandwidth.configure(rate, host)
+
+
+_RATE_UNITS = {"": 1, "K": 1024, "M": 1024**2, "G": 1024**3}
+
+
+def parse_rate(spec: str) -> float:
+    """
+    Parse a byte rate such as `500K`, `2M` or `1.5G` (binary units).
+
+    Raises:
+        ValueError: If the rate is malformed or negative.
+    """
+    value = spec.strip().upper().removesuffix("B").removesuffix("I")
+    unit = value[-1:] if value[-1:] in _RATE_UNITS else ""
+    try:
+        rate = float(value[: len(value) - len(unit)]) * _RATE_UNITS[unit]
+    except ValueError:
+        raise ValueError(f"Expected a rate such as 500K or 2M, got '{spec}'")
+    if rate < 0:
+        raise ValueError(f"Rate must not be negative, got '{spec}'")
+    return rate
+
+
+def parse_host_rate(spec: str) -> Tuple[str, float]:
+    """
+    Parse a `HOST=RATE` specification, e.g. `arxiv.org=1M`.
+
+    Raises:
+        ValueError: If the specification is malformed.
+    """
+    host, sep, rate = spec.partition("=")
+    if not sep or not host.strip():
+        raise ValueError(f"Expected HOST=RATE, got '{spec}'")
+    return host.strip().lower(), parse_rate(rate)
+
+
+###############################################################################
+### Session
+
+
+def _package_version() -> str:
+    try:
+        return importlib.metadata.version("arxiv-dl")
+    except importlib.metadata.PackageNotFoundError:
+        return "unknown"
+
+
+# Installed version of arxiv-dl, looked up once per process.
+PACKAGE_VERSION = _package_version()
+USER_AGENT = f"arxiv-dl/{PACKAGE_VERSION} (+https://github.com/MarkHershey/arxiv-dl)"
+# Connections kept alive per host; raised to the configured concurrency.
+DEFAULT_POOL_SIZE = 10
+
+_session: Optional[requests.Session] = None
+_session_lock = threading.Lock()
+_pool_size = DEFAULT_POOL_SIZE
+
+
+def create_session(pool_size: int = DEFAULT_POOL_SIZE) -> requests.Session:
+    """Create a session with keep-alive pools of `pool_size` connections per host."""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.headers["User-Agent"] = USER_AGENT
+    return session
+
+
+def get_session() -> requests.Session:
+    """Return the process-wide session, creating it on first use."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = create_session(_pool_size)
+        return _session
+
+
+def set_session(session: Optional[requests.Session]) -> None:
+    """Replace the process-wide session, e.g. with a mock in tests.
+
+    Passing None discards the current session; a new one is created on the
+    next request.
+    """
+    global _session
+    with _session_lock:
+        _session = session
+
+
+def configure_session(concurrency: int) -> None:
+    """Size the connection pool for `concurrency` simultaneous requests."""
+    global _session, _pool_size
+    pool_size = max(DEFAULT_POOL_SIZE, int(concurrency))
+    with _session_lock:
+        if pool_size == _pool_size:
+            return
+        _pool_size = pool_size
+        if _session is not None:
+            _session.close()
+            _session = None
+
+
+###############################################################################
+### HTTP/2
+
+# Opt-in HTTP/2 client for `http_get()`. Requests for pages and metadata are
+# small, so many of them share a multiplexed connection per host; PDFs are
+# streamed with `http_stream()` over the HTTP/1.1 session, one connection per
+# transfer, so a large body never holds up the metadata requests.
+_http2_enabled = False
+_http2_client = None
+_http2_lock = threading.Lock()
+
+
+def http2_available() -> bool:
+    """Whether httpx and its HTTP/2 support (`h2`) are installed."""
+    if httpx is None:
+        return False
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def configure_http2(enabled: bool) -> None:
+    """
+    Send `http_get()` requests over HTTP/2 (or back over the session).
+
+    Raises:
+        ImportError: If enabling HTTP/2 while its dependencies are missing.
+    """
+    global _http2_enabled, _http2_client
+    if enabled and not http2_available():
+        raise ImportError(
+            "HTTP/2 support requires httpx with the http2 extra. "
+            'Install it with: pip install "arxiv-dl[http2]"'
+        )
+    with _http2_lock:
+        _http2_enabled = enabled
+        if not enabled and _http2_client is not None:
+            _http2_client.close()
+            _http2_client = None
+
+
+def http2_enabled() -> bool:
+    return _http2_enabled
+
+
+def create_http2_client():
+    """Create an `httpx.Client` speaking HTTP/2 where servers support it."""
+    return httpx.Client(
+        http2=True,
+        follow_redirects=True,
+        headers={"User-Agent": USER_AGENT},
+        timeout=None,
+    )
+
+
+def get_http2_client():
+    """Return the process-wide HTTP/2 client, or None if HTTP/2 is disabled."""
+    global _http2_client
+    with _http2_lock:
+        if not _http2_enabled:
+            return None
+        if _http2_client is None:
+            _http2_client = create_http2_client()
+        return _http2_client
+
+
+def set_http2_client(client) -> None:
+    """Replace the process-wide HTTP/2 client, e.g. with a mock in tests.
+
+    Passing None discards the current client; while HTTP/2 is enabled, a new
+    one is created on the next request.
+    """
+    global _http2_client
+    with _http2_lock:
+        _http2_client = client
+
+
+###############################################################################
+### Endpoints
+
+# Base URLs serving the same resources, keyed by source host. The first one is
+# canonical: it is the one recorded in paper metadata, and requests to any of
+# them may be sent to another.
+DEFAULT_ENDPOINTS: Dict[str, Tuple[str, ...]] = {
+    # export.arxiv.org is the endpoint arXiv asks programmatic clients to use
+    "arxiv.org": ("https://arxiv.org", "https://export.arxiv.org"),
+}
+# Small resource fetched from every endpoint to rank them.
+ENDPOINT_PROBE_PATH = "/robots.txt"
+ENDPOINT_PROBE_TIMEOUT = 3.0
+# Probe results are reused by later runs for this long.
+ENDPOINT_CACHE_TTL = 24 * 3600
+# An endpoint failing this many times in a row is avoided for a while.
+ENDPOINT_MAX_FAILURES = 2
+ENDPOINT_COOLDOWN = 300.0
+
+
+def _endpoint_cache_path() -> Path:
+    # imported here: helpers depends on this module
+    from .helpers import get_cache_dir
+
+    return get_cache_dir() / "endpoints.json"
+
+
+class _EndpointGroup:
+    """Equivalent endpoints of one source and their health."""
+
+    def __init__(self, endpoints: Sequence[str]):
+        self.endpoints = [endpoint.rstrip("/") for endpoint in endpoints]
+        # best first; None until probed
+        self.ranking: Optional[List[str]] = None
+        self.failures: Dict[str, int] = {}
+        self.down_until: Dict[str, float] = {}
+        self.lock = threading.Lock()
+
+    def match(self, url: str) -> Optional[str]:
+        for endpoint in self.endpoints:
+            if url == endpoint or url.startswith(endpoint + "/"):
+                return endpoint
+        return None
+
+    def best(self) -> str:
+        now = time.monotonic()
+        for endpoint in self.ranking or self.endpoints:
+            if self.down_until.get(endpoint, 0.0) <= now:
+                return endpoint
+        # everything is failing; keep using the best one
+        return (self.ranking or self.endpoints)[0]
+
+
+class EndpointSelector:
+    """
+    Picks the endpoint used for each request to a source with mirrors.
+
+    The endpoints of a source are probed on first use, concurrently, by timing
+    a small request to each; the ranking is cached on disk and reused by later
+    runs for `ENDPOINT_CACHE_TTL`. Requests are then rewritten to the fastest
+    endpoint, and after `ENDPOINT_MAX_FAILURES` consecutive failures an
+    endpoint is skipped for `ENDPOINT_COOLDOWN` seconds, so retries fail over
+    to the next one.
+    """
+
+    def __init__(
+        self,
+        endpoints: Optional[Dict[str, Sequence[str]]] = None,
+        cache_path: Optional[Path] = None,
+        probe: bool = True,
+    ):
+        self.groups: Dict[str, _EndpointGroup] = {
+            host: _EndpointGroup(urls) for host, urls in (endpoints or {}).items()
+        }
+        self.cache_path = cache_path
+        self.probe = probe
+
+    def configure(self, host: str, endpoints: Sequence[str]) -> None:
+        """Set the endpoints of `host`; the first one is canonical."""
+        self.groups[host.lower()] = _EndpointGroup(endpoints)
+
+    def add(self, host: str, endpoint: str) -> None:
+        """Add an endpoint equivalent to those already known for `host`."""
+        host = host.lower()
+        group = self.groups.get(host)
+        endpoints = group.endpoints if group else [f"https://{host}"]
+        if endpoint.rstrip("/") not in endpoints:
+            self.configure(host, endpoints + [endpoint])
+
+    def _group(self, url: str) -> Tuple[Optional[_EndpointGroup], Optional[str]]:
+        for group in self.groups.values():
+            endpoint = group.match(url)
+            if endpoint is not None:
+                return group, endpoint
+        return None, None
+
+    def needs_probe(self, url: str) -> bool:
+        """Whether `resolve(url)` would probe the endpoints first."""
+        group, _ = self._group(url)
+        return group is not None and group.ranking is None and self.probe
+
+    def resolve(self, url: str) -> str:
+        """The URL to request instead of `url` (which may be `url` itself)."""
+        group, endpoint = self._group(url)
+        if group is None or len(group.endpoints) < 2:
+            return url
+        if group.ranking is None:
+            with group.lock:
+                if group.ranking is None:
+                    group.ranking = self._rank(group)
+        return group.best() + url[len(endpoint) :]
+
+    def report(self, url: str, ok: bool) -> None:
+        """Record the outcome of a request sent to `url`."""
+        group, endpoint = self._group(url)
+        if group is None:
+            return
+        with group.lock:
+            if ok:
+                group.failures[endpoint] = 0
+                return
+            group.failures[endpoint] = group.failures.get(endpoint, 0) + 1
+            if group.failures[endpoint] >= ENDPOINT_MAX_FAILURES:
+                group.failures[endpoint] = 0
+                group.down_until[endpoint] = time.monotonic() + ENDPOINT_COOLDOWN
+                console.debug(f"{endpoint} keeps failing; switching endpoint")
+
+    def _rank(self, group: _EndpointGroup) -> List[str]:
+        if not self.probe:
+            return list(group.endpoints)
+        cached = self._load_ranking(group)
+        if cached is not None:
+            return cached
+        with ThreadPoolExecutor(max_workers=len(group.endpoints)) as executor:
+            latencies = dict(
+                zip(group.endpoints, executor.map(_probe_endpoint, group.endpoints))
+            )
+        reachable = [e for e in group.endpoints if latencies[e] is not None]
+        if not reachable:
+            # nothing to learn; probe again next run
+            return list(group.endpoints)
+        ranking = sorted(reachable, key=lambda e: latencies[e])
+        ranking += [e for e in group.endpoints if e not in reachable]
+        console.debug(f"Using {ranking[0]} ({latencies[ranking[0]] * 1000:.0f} ms)")
+        self._save_ranking(group, ranking)
+        return ranking
+
+    def _load_ranking(self, group: _EndpointGroup) -> Optional[List[str]]:
+        try:
+            with open(self.cache_path or _endpoint_cache_path(), "r") as f:
+                entry = json.load(f)[group.endpoints[0]]
+        except Exception:
+            return None
+        if time.time() - entry.get("time", 0) > ENDPOINT_CACHE_TTL or sorted(
+            entry.get("ranking", [])
+        ) != sorted(group.endpoints):
+            return None
+        return entry["ranking"]
+
+    def _save_ranking(self, group: _EndpointGroup, ranking: List[str]) -> None:
+        try:
+            path = Path(self.cache_path or _endpoint_cache_path())
+            try:
+                with open(path, "r") as f:
+                    cache = json.load(f)
+            except (OSError, ValueError):
+                cache = {}
+            cache[group.endpoints[0]] = {"ranking": ranking, "time": time.time()}
+            tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+            with open(tmp_path, "w") as f:
+                json.dump(cache, f, indent=2)
+            os.replace(tmp_path, path)
+        except Exception as err:
+            # the cache only saves a probe next time
+            console.debug(f"Could not save endpoint ranking: {err}")
+
+
+def _probe_endpoint(endpoint: str) -> Optional[float]:
+    """Seconds taken to fetch a small resource from `endpoint`, or None."""
+    url = endpoint + ENDPOINT_PROBE_PATH
+    try:
+        with host_limiter.limit(url):
+            start = time.monotonic()
+            response = get_session().get(url, timeout=ENDPOINT_PROBE_TIMEOUT)
+            elapsed = time.monotonic() - start
+    except requests.RequestException:
+        return None
+    if response.status_code >= 400:
+        return None
+    return elapsed
+
+
+endpoints = EndpointSelector(DEFAULT_ENDPOINTS)
+
+
+def add_endpoint(host: str, endpoint: str) -> None:
+    """Register `endpoint` as serving the same resources as `host`."""
+    endpoints.add(host, endpoint)
+
+
+def parse_endpoint(spec: str) -> Tuple[str, str]:
+    """
+    Parse a `HOST=BASE_URL` specification, e.g. `arxiv.org=https://export.arxiv.org`.
+
+    Raises:
+        ValueError: If the specification is malformed.
+    """
+    host, sep, base_url = spec.partition("=")
+    parsed = urlparse(base_url.strip())
+    if not sep or not host.strip() or parsed.scheme not in ("http", "https"):
+        raise ValueError(f"Expected HOST=BASE_URL, got '{spec}'")
+    if not parsed.netloc:
+        raise ValueError(f"Expected HOST=BASE_URL, got '{spec}'")
+    return host.strip().lower(), base_url.strip().rstrip("/")
+
+
+###############################################################################
+### Page cache
+
+# Hosts whose pages go through `http_cache` by default; subdomains included.
+CACHED_HOSTS = (
+    "arxiv.org",
+    "thecvf.com",
+    "ecva.net",
+    "neurips.cc",
+    "nips.cc",
+    "iclr.cc",
+    "huggingface.co",
+)
+
+http_cache = HttpCache()
+
+
+def configure_http_cache(
+    max_age: Optional[float] = None,
+    max_size: Optional[int] = None,
+    reuse_parsed: Optional[bool] = None,
+) -> None:
+    """
+    Set the freshness lifetime (seconds) and size cap (bytes, 0 disables), or
+    whether scrapers may reuse what they parsed out of an unchanged page.
+    """
+    http_cache.configure(max_age=max_age, max_size=max_size, reuse_parsed=reuse_parsed)
+
+
+def _is_source_page(url: str) -> bool:
+    host = (urlparse(url).hostname or "").lower()
+    return any(host == name or host.endswith("." + name) for name in CACHED_HOSTS)
+
+
+def _use_cache(url: str, cache: Optional[bool], kwargs: dict) -> bool:
+    # requests with custom headers may get a different representation
+    if not http_cache.enabled or "headers" in kwargs:
+        return False
+    if cache is not None:
+        return cache
+    return _is_source_page(url)
+
+
+def _cached_response(entry: CacheEntry) -> requests.Response:
+    response = requests.Response()
+    response.status_code = 200
+    response.reason = "OK"
+    response.url = entry.url
+    response.headers = CaseInsensitiveDict(entry.headers)
+    response._content = entry.body
+    response.encoding = requests.utils.get_encoding_from_headers(response.headers)
+    return _mark_cached(response, entry)
+
+
+def _cached_httpx_response(entry: CacheEntry):
+    response = httpx.Response(
+        200,
+        headers=entry.headers,
+        content=entry.body,
+        request=httpx.Request("GET", entry.url),
+    )
+    return _mark_cached(response, entry)
+
+
+def _mark_cached(response, entry: CacheEntry):
+    response.from_cache = True
+    response.cache_key = entry.url
+    response.cached_parse = entry.parsed if http_cache.reuse_parsed else None
+    return response
+
+
+def _update_cache(url: str, entry: Optional[CacheEntry], response, from_entry):
+    """Store or revalidate the cached page of `url` with a fresh `response`."""
+    if entry is not None and response.status_code == 304:
+        return from_entry(http_cache.revalidated(entry))
+    if response.status_code == 200:
+        try:
+            http_cache.store(url, response.headers, response.content)
+        except Exception as err:
+            console.debug(f"Could not cache {url}: {err}")
+        else:
+            response.cache_key = url
+    return response
+
+
+def cached_parse(response) -> Optional[Any]:
+    """What was parsed out of a cached page, if it was saved with `save_parse()`."""
+    return getattr(response, "cached_parse", None)
+
+
+def save_parse(response, parsed: Any) -> None:
+    """Keep JSON-serialisable data parsed out of a page next to its cached body."""
+    url = getattr(response, "cache_key", None)
+    if url is not None:
+        try:
+            http_cache.save_parsed(url, parsed)
+        except Exception as err:
+            console.debug(f"Could not cache the parsed page {url}: {err}")
+
+
+###############################################################################
+### Archive
+
+
+class NotArchived(Exception):
+    """An offline request for a page that is not in the archive."""
+
+
+response_archive: Optional[ResponseArchive] = None
+_offline = False
+
+
+def configure_archive(directory: Union[str, Path, None], offline: bool = False) -> None:
+    """
+    Record source pages in the archive at `directory` (None stops recording).
+
+    With `offline`, requests are answered from the archive instead and no
+    network I/O happens, e.g. to re-parse archived pages.
+    """
+    global response_archive, _offline
+    response_archive = ResponseArchive(directory) if directory else None
+    _offline = offline and response_archive is not None
+
+
+def is_offline() -> bool:
+    return _offline
+
+
+@contextmanager
+def offline_archive(directory: Union[str, Path]) -> Iterator[None]:
+    """Answer requests from the archive at `directory` while the block runs."""
+    global response_archive, _offline
+    saved = response_archive, _offline
+    configure_archive(directory, offline=True)
+    try:
+        yield
+    finally:
+        response_archive, _offline = saved
+
+
+def _archive_page(url: str, response) -> None:
+    if response_archive is None or response.status_code != 200:
+        return
+    if not _is_source_page(url):
+        return
+    try:
+        response_archive.add(
+            url, response.content, response.headers.get("content-type")
+        )
+    except Exception as err:
+        console.debug(f"Could not archive {url}: {err}")
+
+
+def _archived_response(url: str, from_entry):
+    page = response_archive.latest(url)
+    if page is None:
+        raise NotArchived(f"{url} is not in the archive")
+    headers = {"content-type": page.content_type} if page.content_type else {}
+    entry = CacheEntry(url, page.fetched, headers, response_archive.read(page))
+    return from_entry(entry)
+
+
+###############################################################################
+### Timeouts and deadlines
+
+
+class Timeouts(NamedTuple):
+    """Timeouts applied to every request, in seconds."""
+
+    # establishing a connection
+    connect: float = 10.0
+    # waiting for the response, and for each read of its body
+    read: float = 30.0
+    # a streamed body receiving less than STALL_MIN_BYTES in this long is dropped
+    stall: float = 60.0
+
+
+DEFAULT_TIMEOUTS = Timeouts()
+# Minimum progress of a streamed body within the stall timeout.
+STALL_MIN_BYTES = 1024
+
+timeouts = DEFAULT_TIMEOUTS
+
+
+def configure_timeouts(
+    connect: Optional[float] = None,
+    read: Optional[float] = None,
+    stall: Optional[float] = None,
+) -> None:
+    """Change the timeouts of requests that do not pass their own."""
+    global timeouts
+    timeouts = Timeouts(
+        connect=timeouts.connect if connect is None else connect,
+        read=timeouts.read if read is None else read,
+        stall=timeouts.stall if stall is None else stall,
+    )
+
+
+def get_timeouts() -> Timeouts:
+    """Return the timeouts currently applied to requests."""
+    return timeouts
+
+
+class DeadlineExceeded(Exception):
+    """The time budget of a target ran out."""
+
+
+class TransferStalled(requests.Timeout):
+    """A streamed body made too little progress within the stall timeout."""
+
+
+class Deadline:
+    """
+    Wall-clock budget of one target.
+
+    The clock starts the first time the deadline is entered with
+    `deadline_scope()`, so time spent waiting in a queue does not count.
+    Requests made in the scope have their timeouts clipped to the remaining
+    time, and fail with `DeadlineExceeded` once it has run out; work is thus
+    cancelled cooperatively, at the next request or chunk of a body.
+    """
+
+    def __init__(self, seconds: float):
+        self.seconds = seconds
+        self.expires: Optional[float] = None
+
+    def start(self) -> None:
+        if self.expires is None:
+            self.expires = time.monotonic() + self.seconds
+
+    def remaining(self) -> float:
+        self.start()
+        return self.expires - time.monotonic()
+
+    def check(self) -> None:
+        if self.remaining() <= 0:
+            raise DeadlineExceeded(f"Time budget of {self.seconds:g}s exceeded")
+
+
+_deadline: ContextVar[Optional[Deadline]] = ContextVar("deadline", default=None)
+
+
+@contextmanager
+def deadline_scope(deadline: Optional[Deadline]):
+    """Bound the requests made in the block by `deadline` (if not None)."""
+    if deadline is None:
+        yield None
+        return
+    deadline.start()
+    token = _deadline.set(deadline)
+    try:
+        yield deadline
+    finally:
+        _deadline.reset(token)
+
+
+def check_deadline() -> None:
+    """Raise `DeadlineExceeded` if the deadline of the current scope has passed."""
+    deadline = _deadline.get()
+    if deadline is not None:
+        deadline.check()
+
+
+def remaining_time() -> Optional[float]:
+    """Seconds left before the deadline of the current scope, if any."""
+    deadline = _deadline.get()
+    return None if deadline is None else deadline.remaining()
+
+
+# Sentinel for requests that do not pass a timeout and use `timeouts`.
+_DEFAULT = object()
+
+
+def _request_timeout(timeout=_DEFAULT) -> Union[None, float, Tuple[float, float]]:
+    """The (connect, read) timeout of a request, clipped to the deadline."""
+    if timeout is _DEFAULT:
+        timeout = (timeouts.connect, timeouts.read)
+    remaining = remaining_time()
+    if remaining is None:
+        return timeout
+    check_deadline()
+    if timeout is None:
+        return remaining
+    if isinstance(timeout, tuple):
+        return tuple(remaining if t is None else min(t, remaining) for t in timeout)
+    return min(timeout, remaining)
+
+
+def _httpx_timeout(timeout):
+    if isinstance(timeout, tuple):
+        connect, read = timeout
+        return httpx.Timeout(read, connect=connect)
+    return timeout
+
+
+class _StallMonitor:
+    """Detects stalled bodies and enforces the deadline while streaming."""
+
+    def __init__(self):
+        self.window_start = time.monotonic()
+        self.window_bytes = 0
+
+    def update(self, n_bytes: int) -> None:
+        check_deadline()
+        self.window_bytes += n_bytes
+        now = time.monotonic()
+        if now - self.window_start >= timeouts.stall:
+            if self.window_bytes < STALL_MIN_BYTES:
+                raise TransferStalled(
+                    f"Less than {STALL_MIN_BYTES} bytes received "
+                    f"in {timeouts.stall:g}s"
+                )
+            self.window_start = now
+            self.window_bytes = 0
+
+
+def iter_body(response: requests.Response, chunk_size: int = 8192) -> Iterator[bytes]:
+    """`response.iter_content()` of a streamed response, dropped if it stalls.
+
+    The body is paced to its share of the `bandwidth` caps.
+
+    Raises:
+        TransferStalled: If the body made too little progress
+        DeadlineExceeded: If the deadline of the current scope has passed
+    """
+    monitor = _StallMonitor()
+    with bandwidth.transfer(str(response.url)) as transfer:
+        for chunk in response.iter_content(chunk_size=chunk_size):
+            monitor.update(len(chunk))
+            delay = transfer.delay(len(chunk))
+            if delay:
+                time.sleep(delay)
+            yield chunk
+
+
+async def aiter_body(response, chunk_size: int = 65536) -> AsyncIterator[bytes]:
+    """Asynchronous counterpart of `iter_body()` for an httpx response."""
+    monitor = _StallMonitor()
+    with bandwidth.transfer(str(response.url)) as transfer:
+        async for chunk in response.aiter_bytes(chunk_size=chunk_size):
+            monitor.update(len(chunk))
+            delay = transfer.delay(len(chunk))
+            if delay:
+                await asyncio.sleep(delay)
+            yield chunk
+
+
+###############################################################################
+### Retries
+
+
+class RetryPolicy(NamedTuple):
+    """How transient failures of a request are retried."""
+
+    # total attempts, including the first one
+    max_attempts: int = 4
+    # backoff before the n-th retry is drawn from [0, base_delay * 2**(n-1)]
+    base_delay: float = 0.5
+    # cap of the backoff
+    max_delay: float = 30.0
+    # a longer Retry-After is not waited for; the request fails instead
+    max_retry_after: float = 60.0
+
+    def backoff(self, attempt: int) -> float:
+        """Delay after failed attempt number `attempt`, with full jitter."""
+        return random.uniform(
+            0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1))
+        )
+
+
+DEFAULT_RETRY_POLICY = RetryPolicy()
+# For probes whose failure is itself the answer, e.g. the update check.
+NO_RETRY = RetryPolicy(max_attempts=1)
+# Responses worth another attempt: timeouts, throttling and server errors.
+RETRY_STATUSES = frozenset({408, 425, 429, 500, 502, 503, 504})
+
+retry_policy = DEFAULT_RETRY_POLICY
+
+
+def configure_retries(
+    max_attempts: Optional[int] = None,
+    base_delay: Optional[float] = None,
+    max_delay: Optional[float] = None,
+) -> None:
+    """Change the retry policy applied to requests that do not pass their own."""
+    global retry_policy
+    retry_policy = RetryPolicy(
+        max_attempts=max(1, int(max_attempts or retry_policy.max_attempts)),
+        base_delay=retry_policy.base_delay if base_delay is None else base_delay,
+        max_delay=retry_policy.max_delay if max_delay is None else max_delay,
+        max_retry_after=retry_policy.max_retry_after,
+    )
+
+
+def is_transient_error(error: BaseException) -> bool:
+    """Whether a request that raised `error` may succeed if sent again."""
+    transient = (
+        requests.ConnectionError,
+        requests.Timeout,
+        requests.exceptions.ChunkedEncodingError,
+    )
+    if httpx is not None:
+        transient += (httpx.TransportError,)
+    return isinstance(error, transient)
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Seconds to wait according to a `Retry-After` header (delay or HTTP date)."""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        date = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if date is None:
+        return None
+    return max(0.0, date.timestamp() - time.time())
+
+
+class RetryStats:
+    """Process-wide counters of retried requests, reported after a batch."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            # requests that needed more than one attempt
+            self.retried_requests = 0
+            self.retries = 0
+            # time spent waiting between attempts, in seconds
+            self.wait_time = 0.0
+            self.failed_requests = 0
+
+    def record(self, attempts: int, wait_time: float, failed: bool) -> None:
+        with self._lock:
+            if attempts > 1:
+                self.retried_requests += 1
+                self.retries += attempts - 1
+                self.wait_time += wait_time
+            if failed:
+                self.failed_requests += 1
+
+
+retry_stats = RetryStats()
+
+
+class _Attempts:
+    """Bookkeeping of the attempts of a single request."""
+
+    def __init__(self, url: str, policy: Optional[RetryPolicy]):
+        self.url = url
+        self.target = url
+        self.policy = policy or retry_policy
+        self.attempt = 0
+        self.wait_time = 0.0
+        self.started = time.monotonic()
+
+    def begin(self) -> str:
+        """Start the next attempt, unless the deadline has passed.
+
+        Returns:
+            The URL to send the attempt to, on the currently best endpoint
+        """
+        try:
+            check_deadline()
+            if not self.attempt:
+                circuit_breaker.check(self.url)
+        except (DeadlineExceeded, CircuitOpen):
+            self.finish(failed=True)
+            raise
+        self.attempt += 1
+        self.target = endpoints.resolve(self.url)
+        return self.target
+
+    async def begin_async(self) -> str:
+        """`begin()` for coroutines; probing endpoints runs in a thread."""
+        if endpoints.needs_probe(self.url):
+            await asyncio.to_thread(endpoints.resolve, self.url)
+        return self.begin()
+
+    def next_delay(self, response=None, error: Optional[BaseException] = None):
+        """Delay before the next attempt, or None if the outcome is final.
+
+        Exactly one of `response` and `error` describes the attempt that just
+        completed.
+        """
+        policy = self.policy
+        if error is not None:
+            retryable = is_transient_error(error)
+            reason = type(error).__name__
+        else:
+            retryable = response.status_code in RETRY_STATUSES
+            reason = f"HTTP {response.status_code}"
+        endpoints.report(self.target, ok=not retryable)
+        if not retryable:
+            if error is None:
+                # any answer, even an error status, shows the host is up
+                circuit_breaker.record(self.url, ok=True)
+            self.finish(failed=error is not None)
+            return None
+        if self.attempt >= policy.max_attempts:
+            return self.give_up()
+
+        delay = policy.backoff(self.attempt)
+        if response is not None:
+            retry_after = parse_retry_after(response.headers.get("Retry-After"))
+            if retry_after is not None:
+                if retry_after > policy.max_retry_after:
+                    return self.give_up()
+                delay = max(delay, retry_after)
+        remaining = remaining_time()
+        if remaining is not None and delay >= remaining:
+            # the next attempt could not complete in time
+            return self.give_up()
+
+        self.wait_time += delay
+        console.debug(
+            f"{reason} from {self.url}; retrying in {delay:.1f}s "
+            f"(attempt {self.attempt + 1}/{policy.max_attempts})"
+        )
+        return delay
+
+    def give_up(self) -> None:
+        """Stop after a transient failure, which counts against the host."""
+        circuit_breaker.record(self.url, ok=False)
+        self.finish(failed=True)
+        return None
+
+    def finish(self, failed: bool) -> None:
+        retry_stats.record(self.attempt, self.wait_time, failed)
+        if failed and self.attempt > 1:
+            elapsed = time.monotonic() - self.started
+            console.warn(
+                f"Giving up on {self.url} after {self.attempt} attempts ({elapsed:.1f}s)"
+            )
+
+
+###############################################################################
+### Circuit breakers and connectivity
+
+
+class CircuitOpen(Exception):
+    """Requests to a host that keeps failing are refused for a while."""
+
+
+class _Circuit:
+    def __init__(self):
+        self.failures = 0
+        # monotonic time the circuit opened at, None while closed
+        self.opened_at: Optional[float] = None
+        # monotonic time the trial request of a half-open circuit was let through
+        self.trial_at: Optional[float] = None
+
+
+class CircuitBreaker:
+    """
+    Process-wide circuit breakers keyed by hostname.
+
+    After `max_failures` consecutive requests to a host failed with
+    connection errors, timeouts or server errors (after their retries), the
+    host's circuit opens and further requests to it raise `CircuitOpen`
+    without being sent. Once `cooldown` seconds have passed, one trial
+    request is let through: its success closes the circuit, its failure
+    opens it for another cooldown. Any response from a host, whatever its
+    status, counts as a success.
+    """
+
+    def __init__(self, max_failures: int = 5, cooldown: float = 60.0):
+        self.max_failures = max_failures
+        self.cooldown = cooldown
+        self._circuits: Dict[str, _Circuit] = {}
+        self._lock = threading.Lock()
+
+    def configure(
+        self, max_failures: Optional[int] = None, cooldown: Optional[float] = None
+    ) -> None:
+        if max_failures is not None:
+            self.max_failures = max(1, int(max_failures))
+        if cooldown is not None:
+            self.cooldown = cooldown
+
+    @staticmethod
+    def _host(url: str) -> str:
+        return (urlparse(url).hostname or "").lower()
+
+    def check(self, url: str) -> None:
+        """
+        Raises:
+            CircuitOpen: If requests to the host of `url` are refused
+        """
+        host = self._host(url)
+        with self._lock:
+            circuit = self._circuits.get(host)
+            if circuit is None or circuit.opened_at is None:
+                return
+            now = time.monotonic()
+            wait = circuit.opened_at + self.cooldown - now
+            # a trial that never reported back does not block the host forever
+            trial_running = (
+                circuit.trial_at is not None and now - circuit.trial_at < self.cooldown
+            )
+            if wait <= 0 and not trial_running:
+                circuit.trial_at = now
+                return
+        raise CircuitOpen(
+            f"{host} failed {circuit.failures} requests in a row; "
+            f"not trying it again for {max(wait, 0):.0f}s"
+        )
+
+    def record(self, url: str, ok: bool) -> None:
+        """Report the outcome of a request to the host of `url`."""
+        host = self._host(url)
+        with self._lock:
+            circuit = self._circuits.setdefault(host, _Circuit())
+            if ok:
+                circuit.failures = 0
+                circuit.opened_at = circuit.trial_at = None
+            else:
+                circuit.failures += 1
+                # requests sent before the circuit opened do not reopen it
+                trial_failed = circuit.trial_at is not None
+                tripped = (
+                    circuit.opened_at is None and circuit.failures >= self.max_failures
+                )
+                if trial_failed or tripped:
+                    circuit.opened_at = time.monotonic()
+                    circuit.trial_at = None
+                    console.warn(
+                        f"{host} failed {circuit.failures} requests in a row; "
+                        f"skipping it for {self.cooldown:g}s"
+                    )
+        if ok:
+            connectivity.set_online()
+
+    def reset(self) -> None:
+        with self._lock:
+            self._circuits.clear()
+
+
+circuit_breaker = CircuitBreaker()
+
+
+def configure_circuit_breaker(
+    max_failures: Optional[int] = None, cooldown: Optional[float] = None
+) -> None:
+    """Change how many failures open a host's circuit, and for how long."""
+    circuit_breaker.configure(max_failures, cooldown)
+
+
+# Fetched to tell a failing source apart from a missing connection.
+CONNECTIVITY_PROBE_URL = "https://www.google.com"
+CONNECTIVITY_PROBE_TIMEOUT = 3.0
+# How long a probe result, or the last successful request, is trusted.
+CONNECTIVITY_TTL = 60.0
+
+
+class Connectivity:
+    """
+    Process-wide, cached answer to "is the Internet reachable?".
+
+    Any successful request marks the connection as up; only when none
+    happened within `ttl` seconds is `CONNECTIVITY_PROBE_URL` fetched, and its
+    result is reused for another `ttl` seconds by all threads.
+    """
+
+    def __init__(self, ttl: float = CONNECTIVITY_TTL):
+        self.ttl = ttl
+        self._online: Optional[bool] = None
+        self._checked = 0.0
+        self._lock = threading.Lock()
+
+    def set_online(self) -> None:
+        self._online = True
+        self._checked = time.monotonic()
+
+    def is_online(self) -> bool:
+        with self._lock:
+            if self._online is None or time.monotonic() - self._checked >= self.ttl:
+                self._online = _probe_connectivity()
+                self._checked = time.monotonic()
+            return self._online
+
+    def reset(self) -> None:
+        with self._lock:
+            self._online = None
+
+
+def _probe_connectivity() -> bool:
+    if _offline:
+        # the archive stands in for the network
+        return True
+    try:
+        response = get_session().get(
+            CONNECTIVITY_PROBE_URL,
+            timeout=_request_timeout(CONNECTIVITY_PROBE_TIMEOUT),
+        )
+        return response.status_code == 200
+    except Exception:
+        return False
+
+
+connectivity = Connectivity()
+
+
+###############################################################################
+### Requests
+
+
+def http_get(
+    url: str,
+    retry: Optional[RetryPolicy] = None,
+    cache: Optional[bool] = None,
+    **kwargs,
+) -> requests.Response:
+    """
+    GET `url` with the shared session, subject to the per-host limits.
+
+    Unless a `timeout` is given, the configured `timeouts` apply; within a
+    `deadline_scope()` they are clipped to the time left for the target.
+    Connection errors, timeouts and the statuses in `RETRY_STATUSES` are
+    retried according to `retry` (default: the configured `retry_policy`);
+    the connection slot is released while waiting between attempts. Every
+    attempt goes to the best endpoint serving `url` (see `EndpointSelector`).
+    The last response is returned, whatever its status. The slot is also
+    released when the response has been received; to hold it for the
+    duration of a streamed body use `http_stream()`.
+
+    Pages of the `CACHED_HOSTS` go through the on-disk `http_cache` unless
+    `cache` is False (True caches any URL): a fresh page is returned without
+    a request, a stale one is revalidated. Responses served from the cache
+    have a `from_cache` attribute.
+
+    With HTTP/2 enabled (see `configure_http2()`), the request is sent with
+    the shared HTTP/2 client and an `httpx.Response` is returned; it has the
+    same `status_code`, `headers`, `content` and `text` attributes.
+
+    With an archive configured (see `configure_archive()`), pages of the
+    `CACHED_HOSTS` are recorded in it; offline, they are served from it and
+    nothing is sent.
+
+    Raises:
+        NotArchived: If offline and `url` is not in the archive
+    """
+    if _offline:
+        return _archived_response(url, _cached_response)
+    response = _get(url, retry, cache, kwargs)
+    _archive_page(url, response)
+    return response
+
+
+def _get(url: str, retry: Optional[RetryPolicy], cache: Optional[bool], kwargs):
+    timeout = kwargs.pop("timeout", _DEFAULT)
+    use_cache = _use_cache(url, cache, kwargs)
+    entry = None
+    if use_cache:
+        entry = http_cache.load(url)
+        if entry is not None and http_cache.is_fresh(entry):
+            return _cached_response(entry)
+        if entry is not None:
+            kwargs["headers"] = http_cache.conditional_headers(entry)
+    client = get_http2_client()
+    if client is not None:
+        response = _send_with_retries(
+            url,
+            retry,
+            lambda target: client.get(
+                target, timeout=_httpx_timeout(_request_timeout(timeout)), **kwargs
+            ),
+        )
+        from_entry = _cached_httpx_response
+    else:
+        response = _send_with_retries(
+            url,
+            retry,
+            lambda target: get_session().get(
+                target, timeout=_request_timeout(timeout), **kwargs
+            ),
+        )
+        from_entry = _cached_response
+    if use_cache:
+        return _update_cache(url, entry, response, from_entry)
+    return response
+
+
+def http_head(
+    url: str, retry: Optional[RetryPolicy] = None, **kwargs
+) -> requests.Response:
+    """HEAD `url` with the shared session, subject to limits and retries."""
+    timeout = kwargs.pop("timeout", _DEFAULT)
+    return _send_with_retries(
+        url,
+        retry,
+        lambda target: get_session().head(
+            target, timeout=_request_timeout(timeout), **kwargs
+        ),
+    )
+
+
+def _send_with_retries(url: str, retry: Optional[RetryPolicy], send):
+    attempts = _Attempts(url, retry)
+    while True:
+        target = attempts.begin()
+        try:
+            with host_limiter.limit(target):
+                response = send(target)
+        except Exception as e:
+            delay = attempts.next_delay(error=e)
+            if delay is None:
+                raise
+        else:
+            delay = attempts.next_delay(response=response)
+            if delay is None:
+                return response
+            response.close()
+        time.sleep(delay)
+
+
+@contextmanager
+def http_stream(
+    url: str, retry: Optional[RetryPolicy] = None, **kwargs
+) -> Iterator[requests.Response]:
+    """
+    Streamed GET of `url` with the shared session.
+
+    The host's connection slot is held until the block exits, and the
+    connection is then returned to the pool. Opening the stream is retried
+    like `http_get()`; failures while reading the body are left to the caller.
+    Read the body with `iter_body()` to drop stalled transfers and honour the
+    deadline.
+    """
+    timeout = kwargs.pop("timeout", _DEFAULT)
+    attempts = _Attempts(url, retry)
+    while True:
+        target = attempts.begin()
+        with host_limiter.limit(target):
+            try:
+                response = get_session().get(
+                    target, stream=True, timeout=_request_timeout(timeout), **kwargs
+                )
+            except Exception as e:
+                delay = attempts.next_delay(error=e)
+                if delay is None:
+                    raise
+            else:
+                with response:
+                    delay = attempts.next_delay(response=response)
+                    if delay is None:
+                        yield response
+                        return
+        time.sleep(delay)
+
+
+async def http_get_async(
+    client,
+    url: str,
+    retry: Optional[RetryPolicy] = None,
+    cache: Optional[bool] = None,
+    **kwargs,
+):
+    """`client.get()` on an async HTTP client, with the policies of `http_get()`."""
+    if _offline:
+        return _archived_response(url, _cached_httpx_response)
+    response = await _get_async(client, url, retry, cache, kwargs)
+    if response_archive is not None:
+        await asyncio.to_thread(_archive_page, url, response)
+    return response
+
+
+async def _get_async(client, url, retry, cache, kwargs):
+    timeout = kwargs.pop("timeout", _DEFAULT)
+    use_cache = _use_cache(url, cache, kwargs)
+    entry = None
+    if use_cache:
+        entry = await asyncio.to_thread(http_cache.load, url)
+        if entry is not None and http_cache.is_fresh(entry):
+            return _cached_httpx_response(entry)
+        if entry is not None:
+            kwargs["headers"] = http_cache.conditional_headers(entry)
+    response = await _send_with_retries_async(client, url, retry, timeout, kwargs)
+    if use_cache:
+        return await asyncio.to_thread(
+            _update_cache, url, entry, response, _cached_httpx_response
+        )
+    return response
+
+
+async def _send_with_retries_async(client, url, retry, timeout, kwargs):
+    attempts = _Attempts(url, retry)
+    while True:
+        target = await attempts.begin_async()
+        try:
+            async with host_limiter.limit_async(target):
+                response = await client.get(
+                    target, timeout=_httpx_timeout(_request_timeout(timeout)), **kwargs
+                )
+        except Exception as e:
+            delay = attempts.next_delay(error=e)
+            if delay is None:
+                raise
+        else:
+            delay = attempts.next_delay(response=response)
+            if delay is None:
+                return response
+        await asyncio.sleep(delay)
+
+
+@asynccontextmanager
+async def http_stream_async(
+    client, url: str, retry: Optional[RetryPolicy] = None, **kwargs
+):
+    """Asynchronous counterpart of `http_stream()` on an async HTTP client."""
+    timeout = kwargs.pop("timeout", _DEFAULT)
+    attempts = _Attempts(url, retry)
+    while True:
+        target = await attempts.begin_async()
+        async with host_limiter.limit_async(target):
+            try:
+                stream = client.stream(
+                    "GET",
+                    target,
+                    timeout=_httpx_timeout(_request_timeout(timeout)),
+                    **kwargs,
+                )
+                response = await stream.__aenter__()
+            except Exception as e:
+                delay = attempts.next_delay(error=e)
+                if delay is None:
+                    raise
+            else:
+                try:
+                    delay = attempts.next_delay(response=response)
+                    if delay is None:
+                        yield response
+                        return
+                finally:
+                    await stream.__aexit__(None, None, None)
+        await asyncio.sleep(delay)
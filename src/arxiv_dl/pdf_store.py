@@ -0,0 +1,365 @@
+"""
+Content-addressed store of downloaded PDFs shared by all download directories.
+
+Every finished PDF is kept once, under `objects/<first two hex digits>/<SHA-256>.pdf`
+in the `pdfs/` cache directory, and indexed by canonical paper ID (source
+website and paper ID), PDF URL and version. When the same paper is requested
+for another download directory, its PDF is placed there from the store instead
+of being downloaded again: by reflink (a copy-on-write clone, where the file
+system supports it) or plain copy, in the order of the link mode.
+
+Hardlinks are only used with the `hardlink` link mode. Hardlinked files share
+their content with the store and every other directory holding the paper.
+`add_pdf_metadata()` breaks the link before changing a PDF, and stored files
+are checked against their SHA-256 before use, so a copy edited in place is
+never handed out.
+
+The PDFs together are capped at `max_size` bytes: past it, the least recently
+used papers are dropped from the store. Records evicted from the index, or
+replaced by a new version, leave their PDF behind; `PdfStore.collect_garbage()`
+deletes such PDFs after evictions and once a day.
+"""
+
+import errno
+import hashlib
+import json
+import os
+import shutil
+import sys
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Iterable, Iterator, Optional, Tuple
+
+from .disk_cache import EVICTION_TARGET, DiskCache
+from .models import PaperData
+from .target_parser import paper_key
+
+try:
+    import fcntl
+except ImportError:  # not available on Windows
+    fcntl = None
+
+# How files are placed, in order of preference, by link mode.
+LINK_MODES = {
+    "auto": ("reflink", "copy"),
+    "reflink": ("reflink", "copy"),
+    "hardlink": ("hardlink", "copy"),
+    "copy": ("copy",),
+}
+# Cap of the stored PDFs, in bytes; 0 disables the store.
+DEFAULT_MAX_SIZE = 2 * 1024**3
+# The index holds one small record per paper.
+INDEX_MAX_SIZE = 64 * 1024 * 1024
+# PDFs no record refers to are kept this long (in seconds), for another
+# process that stored a PDF but has not written its record yet.
+GC_GRACE_PERIOD = 600.0
+# Interval between garbage collections without evictions, in seconds.
+GC_INTERVAL = 24 * 3600.0
+# ioctl cloning a whole file on Linux (btrfs, XFS, bcachefs, ...).
+FICLONE = 0x40049409
+
+
+def _reflink(src: Path, dst: Path) -> None:
+    if sys.platform == "darwin":
+        import ctypes
+        import ctypes.util
+
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        if libc.clonefile(os.fsencode(src), os.fsencode(dst), 0) != 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err))
+    elif fcntl is not None and sys.platform.startswith("linux"):
+        with open(src, "rb") as fsrc, open(dst, "wb") as fdst:
+            fcntl.ioctl(fdst.fileno(), FICLONE, fsrc.fileno())
+    else:
+        raise OSError(errno.EOPNOTSUPP, "reflinks are not supported")
+
+
+_LINKERS = {
+    "reflink": _reflink,
+    "hardlink": os.link,
+    "copy": shutil.copyfile,
+}
+
+
+def link_file(src: Path, dst: Path, modes: Iterable[str]) -> Optional[str]:
+    """
+    Place the content of `src` at `dst` with the first of `modes` that works.
+
+    `dst` is replaced atomically, so readers never see a partial file.
+
+    Returns:
+        The mode used, or None if none worked.
+    """
+    tmp_path = dst.with_name(f"{dst.name}.{os.getpid()}.{threading.get_ident()}")
+    for mode in modes:
+        try:
+            _LINKERS[mode](src, tmp_path)
+            os.replace(tmp_path, dst)
+            return mode
+        except OSError:
+            # e.g. no reflinks on this file system, or another device
+            tmp_path.unlink(missing_ok=True)
+    return None
+
+
+def unshare_file(path: Path) -> None:
+    """Give a hardlinked file its own copy of the content, so it can be changed."""
+    if path.stat().st_nlink > 1:
+        link_file(path, path, ("copy",))
+
+
+def file_sha256(path: Path) -> str:
+    sha256 = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            sha256.update(chunk)
+    return sha256.hexdigest()
+
+
+def _storable(paper_data: PaperData) -> bool:
+    """Whether a stored PDF can be told apart from other versions of the paper."""
+    if not paper_data.paper_id:
+        return False
+    # arXiv serves every version under the same PDF URL: only the scraped
+    # version tells whether a stored PDF is still current
+    return paper_data.src_website != "ArXiv" or paper_data.version is not None
+
+
+class PdfIndex(DiskCache):
+    """The index of the PDF store; notes evictions, which may orphan PDFs."""
+
+    def __init__(self, directory: Path, max_size: int = INDEX_MAX_SIZE):
+        super().__init__("index", directory, max_size)
+        self.evicted = False
+
+    def _evict(self) -> None:
+        super()._evict()
+        self.evicted = True
+
+    def records(self) -> Iterator[Tuple[float, Path, str]]:
+        """
+        (last use, path, SHA-256) of every record, read without marking them
+        as recently used.
+        """
+        for path in self.directory.iterdir():
+            try:
+                last_use = path.stat().st_mtime
+                sha256 = json.loads(path.read_bytes())["sha256"]
+            except Exception:
+                # a temporary file of a record being written
+                continue
+            yield last_use, path, sha256
+
+    def remove(self, path: Path) -> None:
+        """Remove the record at `path`, as listed by `records()`."""
+        self._remove(path)
+
+
+class PdfStore:
+    """
+    Global store of PDFs by canonical paper ID and SHA-256, safe across threads
+    and processes.
+
+    The store directory defaults to `pdfs/` in the arxiv-dl cache directory.
+    A `max_size` (in bytes) of 0 disables the store.
+    """
+
+    def __init__(
+        self,
+        directory: Optional[Path] = None,
+        link_mode: str = "auto",
+        max_size: int = DEFAULT_MAX_SIZE,
+    ):
+        self._directory = Path(directory) if directory else None
+        self._enabled = True
+        self.max_size = max_size
+        self.link_modes = LINK_MODES[link_mode]
+        self._index: Optional[PdfIndex] = None
+
+    @property
+    def enabled(self) -> bool:
+        return self._enabled and self.max_size > 0
+
+    def configure(
+        self,
+        enabled: Optional[bool] = None,
+        link_mode: Optional[str] = None,
+        directory: Optional[Path] = None,
+        max_size: Optional[int] = None,
+    ) -> None:
+        if enabled is not None:
+            self._enabled = enabled
+        if max_size is not None:
+            self.max_size = max_size
+        if link_mode is not None:
+            self.link_modes = LINK_MODES[link_mode]
+        if directory is not None:
+            self._directory = Path(directory)
+            self._index = None
+
+    @property
+    def directory(self) -> Path:
+        if self._directory is None:
+            # imported here: helpers depends on this module
+            from .helpers import get_cache_dir
+
+            self._directory = get_cache_dir() / "pdfs"
+        return self._directory
+
+    @property
+    def index(self) -> PdfIndex:
+        if self._index is None:
+            self._index = PdfIndex(self.directory / "index")
+        return self._index
+
+    def _object_path(self, sha256: str) -> Path:
+        return self.directory / "objects" / sha256[:2] / f"{sha256}.pdf"
+
+    def lookup(self, paper_data: PaperData) -> Optional[Tuple[str, Path]]:
+        """The SHA-256 and path of the stored PDF of the paper, if any."""
+        if not self.enabled or not _storable(paper_data):
+            return None
+        key = paper_key(paper_data)
+        data = self.index.read(key)
+        if data is None:
+            return None
+        try:
+            record = json.loads(data)
+            if (
+                record["key"] != key
+                or record["pdf_url"] != paper_data.pdf_url
+                or record.get("version") != paper_data.version
+            ):
+                return None
+            sha256 = record["sha256"]
+        except Exception:
+            return None
+        path = self._object_path(sha256)
+        return (sha256, path) if path.is_file() else None
+
+    def materialize(self, paper_data: PaperData, download_path: Path) -> Optional[str]:
+        """
+        Place the stored PDF of the paper at `download_path`.
+
+        Returns:
+            How it was placed (see `LINK_MODES`), or None if the paper is not
+            in the store.
+        """
+        found = self.lookup(paper_data)
+        if found is None:
+            return None
+        sha256, path = found
+        if file_sha256(path) != sha256:
+            # changed in place through a hardlink: it is not what was stored
+            path.unlink(missing_ok=True)
+            self.index.delete(paper_key(paper_data))
+            return None
+        return link_file(path, Path(download_path), self.link_modes)
+
+    def add(self, paper_data: PaperData, download_path: Path) -> None:
+        """Keep the finished PDF of the paper at `download_path` in the store."""
+        if not self.enabled or not _storable(paper_data):
+            return
+        download_path = Path(download_path)
+        found = self.lookup(paper_data)
+        if found is not None and os.path.samefile(found[1], download_path):
+            return
+        sha256 = file_sha256(download_path)
+        if found is not None and found[0] == sha256:
+            return
+        path = self._object_path(sha256)
+        stored = not path.is_file()
+        if stored:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            if link_file(download_path, path, self.link_modes) is None:
+                return
+        record = {
+            "key": paper_key(paper_data),
+            "sha256": sha256,
+            "pdf_url": paper_data.pdf_url,
+            "version": paper_data.version,
+        }
+        self.index.write(record["key"], json.dumps(record).encode("utf-8"))
+        if self.index.evicted or self._garbage_collection_due():
+            self.index.evicted = False
+            self.collect_garbage()
+        if stored:
+            self._evict()
+
+    def _evict(self) -> None:
+        """
+        Drop the least recently used papers while the PDFs exceed `max_size`,
+        down to the eviction target.
+        """
+        sizes = {}
+        for path in (self.directory / "objects").glob("*/*.pdf"):
+            try:
+                sizes[path.stem] = path.stat().st_size
+            except OSError:
+                continue
+        size = sum(sizes.values())
+        if size <= self.max_size:
+            return
+        records = sorted(self.index.records())
+        references = Counter(sha256 for _, _, sha256 in records)
+        target = self.max_size * EVICTION_TARGET
+        for _, record_path, sha256 in records:
+            if size <= target:
+                break
+            self.index.remove(record_path)
+            references[sha256] -= 1
+            # identical PDFs of several papers are stored once
+            if not references[sha256] and sha256 in sizes:
+                self._object_path(sha256).unlink(missing_ok=True)
+                size -= sizes.pop(sha256)
+
+    def _garbage_collection_due(self) -> bool:
+        try:
+            last_run = (self.directory / "last-gc").stat().st_mtime
+        except OSError:
+            return True
+        return time.time() - last_run >= GC_INTERVAL
+
+    def collect_garbage(self) -> int:
+        """
+        Delete the stored PDFs no index record refers to anymore.
+
+        Returns:
+            The number of PDFs deleted.
+        """
+        referenced = {sha256 for _, _, sha256 in self.index.records()}
+        (self.directory / "last-gc").touch()
+        deleted = 0
+        now = time.time()
+        for path in (self.directory / "objects").glob("*/*.pdf"):
+            if path.stem in referenced:
+                continue
+            try:
+                stat = path.stat()
+                # a hardlink keeps the mtime of the file, but updates its ctime
+                if now - max(stat.st_mtime, stat.st_ctime) < GC_GRACE_PERIOD:
+                    continue
+                path.unlink()
+            except OSError:
+                continue
+            deleted += 1
+        return deleted
+
+
+pdf_store = PdfStore()
+
+
+def configure_pdf_store(
+    enabled: Optional[bool] = None,
+    link_mode: Optional[str] = None,
+    max_size: Optional[int] = None,
+) -> None:
+    """
+    Enable or disable the PDF store, choose how stored PDFs are placed (one
+    of `LINK_MODES`), or cap the size of the stored PDFs in bytes; a
+    `max_size` of 0 disables the store.
+    """
+    pdf_store.configure(enabled=enabled, link_mode=link_mode, max_size=max_size)
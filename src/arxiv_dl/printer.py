@@ -1,5 +1,7 @@
 import os
-from typing import Union
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterable, List, Optional, Union
 
 from rich.console import Console
 
@@ -27,6 +29,9 @@ class CustomConsole:
             "default": 2,  # print errors and standard info
             "verbose": 3,  # print everything including paper info
         }
+        # per-thread (or per-task) label prepended to messages when several
+        # targets run at once
+        self._tag = ContextVar("tag", default="")
 
     def set_verbose_level(self, level: Union[str, int] = "default"):
         """
@@ -60,26 +65,86 @@ class CustomConsole:
     def print(self, *args, **kwargs):
         self.console.print(*args, **kwargs)
 
+    @contextmanager
+    def tagged(self, tag: str):
+        """
+        Attribute every message printed by the current thread or asyncio task
+        to `tag`.
+
+        Used by the batch runners so that interleaved output from concurrent
+        workers can still be traced back to its target.
+        """
+        token = self._tag.set(f"[dim]\\[{tag}][/dim] " if tag else "")
+        try:
+            yield
+        finally:
+            self._tag.reset(token)
+
+    @property
+    def tag(self) -> str:
+        return self._tag.get()
+
     ###########################################################################
     ### Keep it minimal
 
     def error(self, text: str):
         if self.verbose_level >= 1:
-            self.console.print("[red]✗ " + text)
+            self.console.print(self.tag + "[red]✗ " + text)
 
     def success(self, text: str):
         if self.verbose_level >= 1:
-            self.console.print("[green]✓ " + text)
+            self.console.print(self.tag + "[green]✓ " + text)
+
+    def summary(
+        self,
+        n_total: int,
+        failed: List[str],
+        n_retries: int = 0,
+        retry_wait: float = 0.0,
+        skipped: Iterable[str] = (),
+    ):
+        """
+        Print the final outcome of a batch, listing failed targets.
+
+        Failed targets in `skipped` were not tried, as they failed permanently
+        in a recent run.
+        """
+        if self.verbose_level >= 1 and n_total:
+            n_ok = n_total - len(failed)
+            color = "green" if not failed else "yellow"
+            self.console.print()
+            self.console.print(
+                f"[{color}]Summary: {n_ok}/{n_total} target(s) succeeded"
+            )
+            if n_retries:
+                self.console.print(
+                    f"[dim]  {n_retries} request retry(ies), "
+                    f"{retry_wait:.1f}s spent backing off"
+                )
+            skipped = set(skipped)
+            if skipped:
+                self.console.print(
+                    f"[dim]  {len(skipped)} target(s) not found in a recent run "
+                    "were skipped; use --refresh to try them again"
+                )
+            for target in failed:
+                note = (
+                    " [dim](skipped, not found recently)" if target in skipped else ""
+                )
+                self.console.print(f"  [red]✗ {target}{note}")
 
     ###########################################################################
     ### Standard
 
     def info(self, text: str):
         if self.verbose_level >= 2:
-            self.console.print("[green dim]> " + text)
+            self.console.print(self.tag + "[green dim]> " + text)
 
-    def process(self, i: int, total: int, target: str):
-        if self.verbose_level >= 2:
+    def process(self, i: int, total: Optional[int], target: str):
+        if self.verbose_level >= 2 and total is None:
+            # streamed input of unknown length
+            self.console.print(f"[green dim]> Target [{i+1}]: {target}")
+        elif self.verbose_level >= 2:
             # self.console.print(
             #     f"[white bold][{i+1}/{total}][/white bold] >>> [white dim]{target}"
             # )
@@ -91,11 +156,11 @@ class CustomConsole:
 
     def warn(self, text: str):
         if self.verbose_level >= 3:
-            self.console.print("[yellow]⚠️ " + text)
+            self.console.print(self.tag + "[yellow]⚠️ " + text)
 
     def debug(self, text: str):
         if self.verbose_level >= 3:
-            self.console.print("[blue]" + text)
+            self.console.print(self.tag + "[blue]" + text)
 
     def print_paper_info(self, paper_data: PaperData):
         if self.verbose_level >= 3:
@@ -0,0 +1,127 @@
+"""
+Offline re-parsing of archived source pages.
+
+`reparse_papers()` runs the current scrapers again over the pages recorded in
+a `ResponseArchive` (see `paper --archive`) for every paper listed in a
+download directory, with no network I/O, and rewrites the paper list and the
+notes files with the result. This refreshes the metadata of thousands of
+papers after a venue changed its markup or a scraper improved, without
+crawling the sources again.
+"""
+
+import json
+from concurrent.futures import as_completed
+from pathlib import Path
+from typing import List, Optional, Tuple, Union
+
+from .batch import ProcessPool, default_process_jobs
+from .helpers import PAPER_LIST_NAME, add_to_paper_list, create_paper_note
+from .metadata_cache import metadata_cache
+from .models import PaperData
+from .network import configure_archive, is_offline, offline_archive
+from .printer import console
+from .scrapers import scrape_metadata
+from .target_parser import parse_target
+
+
+def reparse_papers(
+    download_dir: Union[str, Path],
+    archive_dir: Union[str, Path],
+    jobs: int = 1,
+    pdf_only: bool = False,
+    notes_format: str = "txt",
+) -> Tuple[int, List[str]]:
+    """
+    Rebuild the metadata of the papers listed in `download_dir` from the
+    archive at `archive_dir`, parsing up to `jobs` papers in parallel worker
+    processes.
+
+    Listed papers keep their PDF file name. Notes files are regenerated, but
+    the reading notes written in them are kept. The metadata cache is updated
+    with the new metadata.
+
+    Returns:
+        The number of papers re-parsed, and the targets that could not be
+        (e.g. because their pages are missing from the archive).
+    """
+    download_dir = Path(download_dir).expanduser()
+    try:
+        with (download_dir / PAPER_LIST_NAME).open() as f:
+            paper_list = json.load(f)
+    except (OSError, ValueError) as err:
+        console.error(f"Cannot read the paper list of {download_dir}: {err}")
+        return 0, []
+
+    archive_dir = str(Path(archive_dir).expanduser())
+    papers = [
+        (paper_dict.get("abs_url") or paper_dict.get("pdf_url") or paper_id, paper_dict)
+        for paper_id, paper_dict in paper_list.items()
+    ]
+    reparsed: List[PaperData] = []
+    failed: List[str] = []
+
+    def collect(target: str, paper_dict: Optional[dict]) -> None:
+        if paper_dict is None:
+            failed.append(target)
+            return
+        paper_data = PaperData(**paper_dict)
+        reparsed.append(paper_data)
+        if not pdf_only:
+            create_paper_note(
+                paper_data,
+                download_dir=download_dir,
+                notes_format=notes_format,
+                overwrite=True,
+            )
+
+    console.info(f"Re-parsing {len(papers)} paper(s) from the archive...")
+    if jobs <= 1:
+        refresh = metadata_cache.refresh
+        metadata_cache.refresh = True
+        try:
+            with offline_archive(archive_dir):
+                for target, paper_dict in papers:
+                    collect(target, _reparse_paper(target, paper_dict))
+        finally:
+            metadata_cache.refresh = refresh
+    else:
+        with ProcessPool(default_process_jobs(jobs)) as pool:
+            futures = {
+                pool.submit(
+                    _reparse_in_worker,
+                    archive_dir,
+                    target,
+                    paper_dict,
+                    console.verbose_level,
+                ): target
+                for target, paper_dict in papers
+            }
+            for future in as_completed(futures):
+                collect(futures[future], future.result())
+
+    add_to_paper_list(reparsed, download_dir=download_dir, replace=True)
+    return len(reparsed), failed
+
+
+def _reparse_in_worker(
+    archive_dir: str, target: str, paper_dict: dict, verbose_level: int
+) -> Optional[dict]:
+    # worker processes only ever re-parse, so they stay offline
+    if not is_offline():
+        console.set_verbose_level(verbose_level)
+        configure_archive(archive_dir, offline=True)
+        metadata_cache.refresh = True
+    return _reparse_paper(target, paper_dict)
+
+
+def _reparse_paper(target: str, paper_dict: dict) -> Optional[dict]:
+    """Scrape one listed paper from the archive."""
+    with console.tagged(target):
+        paper_data = parse_target(target)
+        if not paper_data or not scrape_metadata(paper_data):
+            return None
+    # the downloaded PDF keeps its name
+    paper_data.download_name = (
+        paper_dict.get("download_name") or paper_data.download_name
+    )
+    return paper_data.model_dump(exclude_none=True)
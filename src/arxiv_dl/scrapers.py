@@ -1,39 +1,171 @@
+import asyncio
 import json
+import re
 import string
+from typing import Any, Callable, Optional, Union
 from urllib.parse import urljoin
 
-import requests
 from bs4 import BeautifulSoup
 
+from .failure_cache import failure_cache
 from .helpers import normalize_paper_title
+from .metadata_cache import metadata_cache
 from .models import PaperData
+from .network import (
+    PACKAGE_VERSION,
+    CircuitOpen,
+    DeadlineExceeded,
+    NotArchived,
+    cached_parse,
+    connectivity,
+    http_get,
+    http_get_async,
+    is_offline,
+    save_parse,
+)
 from .printer import console
 
 
 def check_internet_connection() -> bool:
     """
     Check if the internet connection is available.
+
+    The answer is cached process-wide (see `network.Connectivity`), so a batch
+    of failing targets does not probe the connection for each of them.
+    """
+    return connectivity.is_online()
+
+
+def load_cached_metadata(paper_data: PaperData) -> bool:
+    """
+    Fill in `paper_data` from the metadata cache, if it holds the paper.
+
+    Returns:
+        True if cached metadata was used.
+    """
+    try:
+        cached = metadata_cache.get(paper_data)
+    except OSError as err:
+        console.debug(f"Could not read the metadata cache: {err}")
+        return False
+    if cached is None:
+        return False
+    for field in cached.model_fields_set:
+        setattr(paper_data, field, getattr(cached, field))
+    console.info("Using cached paper metadata.")
+    return True
+
+
+def store_cached_metadata(paper_data: PaperData) -> None:
+    """Keep the metadata of a scraped paper for later runs."""
+    try:
+        metadata_cache.put(paper_data)
+    except OSError as err:
+        console.debug(f"Could not write the metadata cache: {err}")
+
+
+class PaperNotFound(Exception):
+    """The source answered that the paper does not exist; retrying is pointless."""
+
+
+# Statuses of pages that are gone for good.
+NOT_FOUND_STATUSES = {404, 410}
+
+
+class _NotFound:
+    def __bool__(self) -> bool:
+        return False
+
+    def __repr__(self) -> str:
+        return "NOT_FOUND"
+
+
+# Result of `scrape_metadata()` for a paper that does not exist, found out now
+# or in a recent run. Falsy like a failure, but there is no PDF to download.
+NOT_FOUND = _NotFound()
+
+
+def _check_page(url: str, response):
+    """Return `response` if it holds the page at `url`, raise otherwise."""
+    if response.status_code in NOT_FOUND_STATUSES:
+        raise PaperNotFound(f"{url} answered {response.status_code}")
+    if response.status_code != 200:
+        console.error(f"Cannot connect to {url}")
+        raise Exception(f"Cannot connect to {url}")
+    return response
+
+
+def _fetch_page(url: str):
+    return _check_page(url, http_get(url))
+
+
+def skip_known_failure(paper_data: PaperData) -> bool:
+    """
+    Whether the paper failed permanently in a recent run and is skipped.
+
+    Offline re-parsing neither skips nor records failures.
     """
+    if is_offline():
+        return False
     try:
-        response = requests.get("https://www.google.com", timeout=3)
-        return response.status_code == 200
-    except Exception:
+        record = failure_cache.get(paper_data)
+    except OSError as err:
+        console.debug(f"Could not read the failure cache: {err}")
+        return False
+    if record is None:
         return False
+    failure_cache.record_skip(paper_data)
+    console.error(
+        f"Skipping a paper that failed permanently in a recent run ({record.reason}); "
+        "use --refresh to try it again."
+    )
+    return True
+
+
+def record_failure(paper_data: PaperData, err: PaperNotFound) -> None:
+    """Report a paper that does not exist and remember it for later runs."""
+    console.error(f"Paper not found: {err}")
+    if is_offline():
+        return
+    try:
+        failure_cache.put(paper_data, str(err))
+    except OSError as write_err:
+        console.debug(f"Could not write the failure cache: {write_err}")
 
 
-def scrape_metadata(paper_data: PaperData) -> None:
+def _forget_failure(paper_data: PaperData) -> None:
+    try:
+        failure_cache.forget(paper_data)
+    except OSError:
+        pass
+
+
+def scrape_metadata(paper_data: PaperData) -> Union[bool, _NotFound]:
+    """
+    Fill in `paper_data` from its source website.
+
+    Returns:
+        True if the metadata was retrieved, `NOT_FOUND` if the paper does not
+        exist, or False on any other failure.
+    """
+    if load_cached_metadata(paper_data):
+        return True
+    if skip_known_failure(paper_data):
+        return NOT_FOUND
+    # metadata missing a part, e.g. a BibTeX that failed to load, is not cached
+    complete = True
     try:
         if paper_data.abs_url:
             if paper_data.src_website == "ArXiv":
-                scrape_metadata_arxiv(paper_data)
+                complete = scrape_metadata_arxiv(paper_data)
             elif paper_data.src_website == "CVF":
                 scrape_metadata_cvf(paper_data)
             elif paper_data.src_website == "ECVA":
                 scrape_metadata_ecva(paper_data)
             elif paper_data.src_website == "NeurIPS":
-                scrape_metadata_nips(paper_data)
+                complete = scrape_metadata_nips(paper_data)
             elif paper_data.src_website == "ICLR":
-                scrape_metadata_iclr(paper_data)
+                complete = scrape_metadata_iclr(paper_data)
             elif paper_data.src_website == "OpenReview":
                 raise NotImplementedError("OpenReview scraper is not implemented yet")
             else:
@@ -44,6 +176,12 @@ def scrape_metadata(paper_data: PaperData) -> None:
         else:
             # TODO: think how to handle this; maybe do nothing
             console.warn("[Warn] No abstract URL")
+    except PaperNotFound as e:
+        record_failure(paper_data, e)
+        return NOT_FOUND
+    except (DeadlineExceeded, CircuitOpen, NotArchived) as e:
+        console.error(f"Failed to retrieve paper information: {e}")
+        return False
     except Exception as e:
         connected = check_internet_connection()
         if not connected:
@@ -52,22 +190,106 @@ def scrape_metadata(paper_data: PaperData) -> None:
             console.error(
                 "Failed to retrieve paper information. Please check the URL and try again."
             )
-            console.error(e)
+            console.error(str(e))
         return False
 
+    if paper_data.abs_url:
+        if complete:
+            store_cached_metadata(paper_data)
+        _forget_failure(paper_data)
+    return True
+
+
+# Parses saved with cached pages are reused only by the same parser: bump this
+# when a parser changes what it extracts. A new package version also counts.
+PARSER_VERSION = 2
+
 
-def scrape_metadata_arxiv(paper_data: PaperData) -> None:
+def _parser_tag(parse: Callable[..., Any]) -> str:
+    return f"{parse.__name__}@{PACKAGE_VERSION}/{PARSER_VERSION}"
+
+
+def _parse_page(paper_data: PaperData, response, parse: Callable[..., Any]) -> Any:
+    """
+    Run `parse(paper_data, response.text)` and return its result.
+
+    If the page was served from the HTTP cache and its parse was saved with
+    it by the same parser version, the saved outcome is applied to
+    `paper_data` instead of parsing again.
+    """
+    parser = _parser_tag(parse)
+    parsed = cached_parse(response)
+    if parsed is not None and parsed.get("parser") == parser:
+        for field, value in parsed["fields"].items():
+            setattr(paper_data, field, value)
+        return parsed["result"]
+
+    before = paper_data.model_dump()
+    result = parse(paper_data, response.text)
+    fields = {
+        field: value
+        for field, value in paper_data.model_dump().items()
+        if before.get(field) != value
+    }
+    save_parse(response, {"parser": parser, "fields": fields, "result": result})
+    return result
+
+
+def scrape_metadata_arxiv(paper_data: PaperData) -> bool:
+    """
+    Returns:
+        Whether the metadata is complete: False if the BibTeX could not be
+        fetched.
+    """
     console.info("Retrieving paper metadata...")
 
-    response = requests.get(paper_data.abs_url)
-    if response.status_code != 200:
-        console.error(f"Cannot connect to {paper_data.abs_url}")
-        raise Exception(f"Cannot connect to {paper_data.abs_url}")
+    response = _fetch_page(paper_data.abs_url)
+    _parse_page(paper_data, response, parse_metadata_arxiv)
+
+    # get BIBTEX
+    bibtex_response = http_get(get_arxiv_bibtex_url(paper_data))
+    if bibtex_response.status_code == 200:
+        bibtex = bibtex_response.text
+    else:
+        bibtex = ""
+    paper_data.bibtex = bibtex.strip()
+
+    return bibtex_response.status_code == 200
+
+
+# Error page of arXiv IDs that do not exist, e.g. "Article identifier '2313.00001' not recognized".
+ARXIV_NOT_FOUND = re.compile(r"identifier .{0,64} not recognized", re.IGNORECASE)
+
+
+# Version suffix of the cited arXiv ID, and version tags of the submission history.
+ARXIV_CITED_VERSION = re.compile(r"arXiv:\S+?(v[0-9]+)\b")
+ARXIV_HISTORY_VERSION = re.compile(r"\[v([0-9]+)\]")
+
+
+def _arxiv_version(soup: BeautifulSoup) -> Optional[str]:
+    """The current version of the paper on its arXiv abstract page, e.g. "v3"."""
+    result = soup.find("td", class_="tablecell arxividv")
+    match = ARXIV_CITED_VERSION.search(result.get_text(" ")) if result else None
+    if match:
+        return match.group(1)
+    result = soup.find("div", class_="submission-history")
+    versions = ARXIV_HISTORY_VERSION.findall(result.get_text(" ")) if result else []
+    return f"v{max(map(int, versions))}" if versions else None
+
+
+def get_arxiv_bibtex_url(paper_data: PaperData) -> str:
+    return f"https://arxiv.org/bibtex/{paper_data.paper_id}"
+
+
+def parse_metadata_arxiv(paper_data: PaperData, html: str) -> None:
+    """Fill in `paper_data` from the HTML of an arXiv abstract page."""
     # make soup
-    soup = BeautifulSoup(response.text, "html.parser")
+    soup = BeautifulSoup(html, "html.parser")
 
     # get TITLE
     result = soup.find("h1", class_="title mathjax")
+    if result is None and ARXIV_NOT_FOUND.search(html):
+        raise PaperNotFound(f"arXiv does not know {paper_data.paper_id}")
     tmp = [i.string for i in result]
     paper_title = tmp.pop()
     paper_data.title = paper_title
@@ -91,6 +313,10 @@ def scrape_metadata_arxiv(paper_data: PaperData) -> None:
     paper_abstract = " ".join(tmp)
     paper_data.abstract = paper_abstract.strip()
 
+    # get VERSION, from "(or arXiv:1512.03385v3 for this version)" or the
+    # submission history
+    paper_data.version = _arxiv_version(soup)
+
     # get COMMENTS
     result = soup.find("td", class_="tablecell comments mathjax")
     if result:
@@ -117,15 +343,6 @@ def scrape_metadata_arxiv(paper_data: PaperData) -> None:
     # paper_data.official_code_urls = official_code_urls
     # paper_data.pwc_page_url = pwc_page_url.strip()
 
-    # get BIBTEX
-    bibtex_url = f"https://arxiv.org/bibtex/{paper_data.paper_id}"
-    bibtex_response = requests.get(bibtex_url)
-    if bibtex_response.status_code == 200:
-        bibtex = bibtex_response.text
-    else:
-        bibtex = ""
-    paper_data.bibtex = bibtex.strip()
-
     # construct filename
     if "/" in paper_data.paper_id:
         _paper_id = paper_data.paper_id.replace("/", "_")
@@ -141,12 +358,16 @@ def scrape_metadata_arxiv(paper_data: PaperData) -> None:
 def scrape_metadata_cvf(paper_data: PaperData) -> None:
     console.info("Retrieving paper metadata from CVF...")
 
-    response = requests.get(paper_data.abs_url)
-    if response.status_code != 200:
-        console.error(f"Cannot connect to {paper_data.abs_url}")
-        raise Exception(f"Cannot connect to {paper_data.abs_url}")
+    response = _fetch_page(paper_data.abs_url)
+    _parse_page(paper_data, response, parse_metadata_cvf)
+
+    return None
+
+
+def parse_metadata_cvf(paper_data: PaperData, html: str) -> None:
+    """Fill in `paper_data` from the HTML of a CVF Open Access paper page."""
     # make soup
-    soup = BeautifulSoup(response.text, "html.parser")
+    soup = BeautifulSoup(html, "html.parser")
 
     # get TITLE
     result = soup.find("div", id="papertitle")
@@ -196,12 +417,16 @@ def scrape_metadata_cvf(paper_data: PaperData) -> None:
 def scrape_metadata_ecva(paper_data: PaperData) -> None:
     console.info("Retrieving paper metadata from ECVA...")
 
-    response = requests.get(paper_data.abs_url)
-    if response.status_code != 200:
-        console.error(f"Cannot connect to {paper_data.abs_url}")
-        raise Exception(f"Cannot connect to {paper_data.abs_url}")
+    response = _fetch_page(paper_data.abs_url)
+    _parse_page(paper_data, response, parse_metadata_ecva)
+
+    return None
+
+
+def parse_metadata_ecva(paper_data: PaperData, html: str) -> None:
+    """Fill in `paper_data` from the HTML of an ECVA paper page."""
     # make soup
-    soup = BeautifulSoup(response.text, "html.parser")
+    soup = BeautifulSoup(html, "html.parser")
 
     # get TITLE
     result = soup.find("div", id="papertitle")
@@ -266,15 +491,36 @@ def scrape_metadata_ecva(paper_data: PaperData) -> None:
     return None
 
 
-def scrape_metadata_proceedings(paper_data: PaperData) -> None:
+def scrape_metadata_proceedings(paper_data: PaperData) -> bool:
+    """
+    Returns:
+        Whether the metadata is complete: False if the page links a BibTeX
+        that could not be fetched.
+    """
     console.info(f"Retrieving paper metadata from {paper_data.paper_venue}...")
 
-    response = requests.get(paper_data.abs_url)
-    if response.status_code != 200:
-        console.error(f"Cannot connect to {paper_data.abs_url}")
-        raise Exception(f"Cannot connect to {paper_data.abs_url}")
+    response = _fetch_page(paper_data.abs_url)
+    bibtex_url = _parse_page(paper_data, response, parse_metadata_proceedings)
+
+    if bibtex_url:
+        bibtex_response = http_get(bibtex_url)
+        if bibtex_response.status_code != 200:
+            return False
+        paper_data.bibtex = bibtex_response.text.strip()
+
+    return True
 
-    soup = BeautifulSoup(response.text, "html.parser")
+
+def parse_metadata_proceedings(paper_data: PaperData, html: str) -> Optional[str]:
+    """
+    Fill in `paper_data` from the HTML of a NeurIPS/ICLR proceedings page.
+
+    Returns:
+        URL of the paper's BibTeX file if the page links to one, to be fetched
+        separately by the caller.
+    """
+    bibtex_url = None
+    soup = BeautifulSoup(html, "html.parser")
 
     result = soup.find("h1", class_="paper-title")
     if result:
@@ -325,9 +571,6 @@ def scrape_metadata_proceedings(paper_data: PaperData) -> None:
     )
     if result and result.get("href"):
         bibtex_url = urljoin(paper_data.abs_url, result.get("href"))
-        bibtex_response = requests.get(bibtex_url)
-        if bibtex_response.status_code == 200:
-            paper_data.bibtex = bibtex_response.text.strip()
 
     result = soup.find(
         "a",
@@ -340,15 +583,15 @@ def scrape_metadata_proceedings(paper_data: PaperData) -> None:
     if paper_data.title:
         paper_data.download_name = f"{paper_data.year}_{paper_data.paper_venue}_{normalize_paper_title(paper_data.title)}.pdf"
 
-    return None
+    return bibtex_url
 
 
-def scrape_metadata_nips(paper_data: PaperData) -> None:
+def scrape_metadata_nips(paper_data: PaperData) -> bool:
     """Scrape a NeurIPS/NIPS paper using the shared proceedings template."""
     return scrape_metadata_proceedings(paper_data)
 
 
-def scrape_metadata_iclr(paper_data: PaperData) -> None:
+def scrape_metadata_iclr(paper_data: PaperData) -> bool:
     """Scrape an ICLR paper using the shared proceedings template."""
     return scrape_metadata_proceedings(paper_data)
 
@@ -358,5 +601,109 @@ def scrape_metadata_openreview(paper_data: PaperData) -> None:
     ...
 
 
+###############################################################################
+### Async scrapers
+#
+# The functions below mirror the scrapers above for the asyncio engine. They
+# take an `httpx.AsyncClient` (or anything with a compatible `get` coroutine)
+# and share the same HTML parsers.
+
+
+async def _fetch_page_async(client, url: str):
+    return _check_page(url, await http_get_async(client, url))
+
+
+async def scrape_metadata_async(
+    paper_data: PaperData, client
+) -> Union[bool, _NotFound]:
+    """Asynchronous counterpart of `scrape_metadata()`."""
+    if await asyncio.to_thread(load_cached_metadata, paper_data):
+        return True
+    if await asyncio.to_thread(skip_known_failure, paper_data):
+        return NOT_FOUND
+    complete = True
+    try:
+        if paper_data.abs_url:
+            if paper_data.src_website == "ArXiv":
+                complete = await scrape_metadata_arxiv_async(paper_data, client)
+            elif paper_data.src_website == "CVF":
+                await scrape_metadata_cvf_async(paper_data, client)
+            elif paper_data.src_website == "ECVA":
+                await scrape_metadata_ecva_async(paper_data, client)
+            elif paper_data.src_website in ("NeurIPS", "ICLR"):
+                complete = await scrape_metadata_proceedings_async(paper_data, client)
+            elif paper_data.src_website == "OpenReview":
+                raise NotImplementedError("OpenReview scraper is not implemented yet")
+            else:
+                console.error(
+                    f"Unsupported source: '{paper_data.src_website}'. Please check the URL."
+                )
+                return False
+        else:
+            console.warn("[Warn] No abstract URL")
+    except PaperNotFound as e:
+        await asyncio.to_thread(record_failure, paper_data, e)
+        return NOT_FOUND
+    except (DeadlineExceeded, CircuitOpen, NotArchived) as e:
+        console.error(f"Failed to retrieve paper information: {e}")
+        return False
+    except Exception as e:
+        connected = await asyncio.to_thread(check_internet_connection)
+        if not connected:
+            console.error("No Internet Connection.")
+        else:
+            console.error(
+                "Failed to retrieve paper information. Please check the URL and try again."
+            )
+            console.error(str(e))
+        return False
+
+    if paper_data.abs_url:
+        if complete:
+            await asyncio.to_thread(store_cached_metadata, paper_data)
+        await asyncio.to_thread(_forget_failure, paper_data)
+    return True
+
+
+async def scrape_metadata_arxiv_async(paper_data: PaperData, client) -> bool:
+    console.info("Retrieving paper metadata...")
+    response = await _fetch_page_async(client, paper_data.abs_url)
+    _parse_page(paper_data, response, parse_metadata_arxiv)
+
+    bibtex_response = await http_get_async(client, get_arxiv_bibtex_url(paper_data))
+    if bibtex_response.status_code == 200:
+        paper_data.bibtex = bibtex_response.text.strip()
+    else:
+        paper_data.bibtex = ""
+    return bibtex_response.status_code == 200
+
+
+async def scrape_metadata_cvf_async(paper_data: PaperData, client) -> None:
+    console.info("Retrieving paper metadata from CVF...")
+    response = await _fetch_page_async(client, paper_data.abs_url)
+    _parse_page(paper_data, response, parse_metadata_cvf)
+    return None
+
+
+async def scrape_metadata_ecva_async(paper_data: PaperData, client) -> None:
+    console.info("Retrieving paper metadata from ECVA...")
+    response = await _fetch_page_async(client, paper_data.abs_url)
+    _parse_page(paper_data, response, parse_metadata_ecva)
+    return None
+
+
+async def scrape_metadata_proceedings_async(paper_data: PaperData, client) -> bool:
+    console.info(f"Retrieving paper metadata from {paper_data.paper_venue}...")
+    response = await _fetch_page_async(client, paper_data.abs_url)
+    bibtex_url = _parse_page(paper_data, response, parse_metadata_proceedings)
+
+    if bibtex_url:
+        bibtex_response = await http_get_async(client, bibtex_url)
+        if bibtex_response.status_code != 200:
+            return False
+        paper_data.bibtex = bibtex_response.text.strip()
+    return True
+
+
 if __name__ == "__main__":
     ...
@@ -0,0 +1,379 @@
+"""
+Per-paper stages shared by the download engines of arxiv-dl.
+
+A paper goes through the metadata (`resolve_paper()`), transfer
+(`transfer_paper()`), embed (`embed_paper()`) and finalize (`finalize_paper()`)
+stages. `download_papers()` runs them in threads or as a pipeline, and the
+asyncio engine in `async_engine` reuses them around its own transfers.
+"""
+
+from pathlib import Path
+from typing import Any, Callable, Iterable, Iterator, NamedTuple, Optional, Tuple, Union
+
+from .batch import ProcessPool
+from .constants import CONSTANTS
+from .helpers import (
+    add_pdf_metadata,
+    add_to_paper_list,
+    create_paper_note,
+    download_pdf,
+    find_local_paper,
+    get_download_dest,
+    store_pdf,
+)
+from .journal import Journal
+from .models import PaperData
+from .network import CircuitOpen, Deadline, DeadlineExceeded
+from .printer import console
+from .scrapers import NOT_FOUND, scrape_metadata
+from .target_parser import classify_target, expand_target, parse_target
+
+
+def set_verbosity(
+    verbose: Optional[bool] = None,
+    verbose_level: Optional[Union[str, int]] = None,
+):
+    """
+    Note that console.set_verbose_level() will never throw an error by design, it will fallback to the default level if any error occurs.
+    """
+    if verbose_level is not None:
+        console.set_verbose_level(verbose_level)
+    elif verbose is True:
+        console.set_verbose_level("verbose")
+    else:
+        console.set_verbose_level("default")
+
+
+class PaperTarget(NamedTuple):
+    """A single-paper target produced by expanding the user's input."""
+
+    target: str
+    label: str = ""
+    # position of the paper within its expanded listing, if any
+    position: Optional[Tuple[int, int]] = None
+    # False if the input could not be expanded; the error is already reported
+    valid: bool = True
+    # time budget of the paper, started when its processing begins
+    deadline: Optional[Deadline] = None
+
+
+def setup_download_dir(download_dir: Union[Path, str, None]) -> Optional[Path]:
+    """Resolve and create the download directory, or report why it failed."""
+    # Get target download directory.
+    try:
+        if download_dir is None:
+            download_dir: Path = get_download_dest()
+        else:
+            download_dir: Path = Path(download_dir).resolve()
+            download_dir.mkdir(parents=True, exist_ok=True)
+    except Exception as e:
+        console.error(
+            "Failed to set up download directory. Please check your environment configuration."
+        )
+        return None
+    return download_dir
+
+
+def iter_paper_targets(
+    targets: Iterable[str], spacing: bool = False
+) -> Iterator[PaperTarget]:
+    """Lazily expand user targets into single-paper targets."""
+    if isinstance(targets, (list, tuple)):
+        n_targets = len(targets)
+    else:
+        n_targets = None
+
+    for i, target in enumerate(targets):
+        if spacing and i > 0:
+            # Add spacing between downloads
+            print()
+        label = f"{i + 1}/{n_targets}" if n_targets else f"{i + 1}"
+        console.process(i, n_targets, target)
+
+        if not target or not isinstance(target, str):
+            console.error(
+                "Invalid input: Please provide a valid paper URL or arXiv ID."
+            )
+            yield PaperTarget(target=str(target), label=label, valid=False)
+            continue
+
+        expanded_targets = iter(expand_target(target))
+        try:
+            first = next(expanded_targets, None)
+            second = next(expanded_targets, None) if first is not None else None
+        except Exception as err:
+            console.error(f"Failed to expand target '{target}': {err}")
+            yield PaperTarget(target=target, label=label, valid=False)
+            continue
+
+        if first is None:
+            console.error(f"No papers found for target: {target}")
+            yield PaperTarget(target=target, label=label, valid=False)
+            continue
+
+        if second is None:
+            yield PaperTarget(target=first, label=label)
+            continue
+
+        # Listing pages are expanded lazily, so the total is not known upfront.
+        console.info("Downloading papers from the target page as they are found.")
+        yield PaperTarget(target=first, label=f"{label}:1", position=(0, None))
+        yield PaperTarget(target=second, label=f"{label}:2", position=(1, None))
+        j = 2
+        while True:
+            try:
+                expanded_target = next(expanded_targets, None)
+            except Exception as err:
+                console.error(f"Failed to expand target '{target}': {err}")
+                yield PaperTarget(target=target, label=label, valid=False)
+                break
+            if expanded_target is None:
+                break
+            yield PaperTarget(
+                target=expanded_target,
+                label=f"{label}:{j + 1}",
+                position=(j, None),
+            )
+            j += 1
+
+
+def guarded(func: Callable[[Any], Any]) -> Callable[[Any], Any]:
+    """Report unexpected errors from a pipeline stage and treat them as a failure."""
+
+    def wrapper(value):
+        try:
+            return func(value)
+        except Exception as e:
+            if isinstance(value, PaperTarget):
+                name = value.target
+            else:
+                name = value.abs_url or value.pdf_url
+            if isinstance(e, DeadlineExceeded):
+                console.error(f"Gave up on '{name}': {e}")
+                return False
+            console.error(f"Error processing '{name}': {e}")
+            console.error(CONSTANTS.BUG_REPORT_MSG)
+            return False
+
+    return wrapper
+
+
+def download_single_paper(
+    target: str,
+    download_dir: Path,
+    n_threads: int,
+    pdf_only: bool,
+    notes_format: str,
+    journal: Optional[Journal] = None,
+) -> bool:
+    paper_data = resolve_paper(target, journal=journal, download_dir=download_dir)
+    if not paper_data:
+        return False
+    if not transfer_paper(
+        paper_data, download_dir=download_dir, n_threads=n_threads, journal=journal
+    ):
+        return False
+    return finalize_paper(
+        paper_data,
+        download_dir=download_dir,
+        pdf_only=pdf_only,
+        notes_format=notes_format,
+        journal=journal,
+    )
+
+
+def resolve_paper(
+    target: str,
+    journal: Optional[Journal] = None,
+    download_dir: Optional[Path] = None,
+) -> Union[PaperData, bool]:
+    """
+    Metadata stage: identify the paper source and scrape its metadata.
+
+    Scraping is skipped for papers already listed in `download_dir`.
+    """
+    if not validate_target(target):
+        return False
+
+    # Reuse metadata scraped by a previous run.
+    paper_data = journal.paper_data(target) if journal else None
+    if paper_data is not None:
+        console.info("Resuming with the metadata recorded in the journal.")
+        console.print_paper_info(paper_data)
+        return paper_data
+
+    # Identify paper source/venue.
+    paper_data: PaperData = parse_target(target)
+    if not paper_data:
+        return False
+    if journal:
+        journal.record(paper_data, "resolved")
+
+    # Reuse the metadata of a paper that was downloaded before.
+    local_paper_data = find_listed_paper(paper_data, download_dir)
+    if local_paper_data is not None:
+        return local_paper_data
+
+    # Start scraping from source website.
+    scraped = scrape_metadata(paper_data)
+    if scraped is NOT_FOUND:
+        return False
+    if scraped and journal:
+        journal.record(paper_data, "scraped", paper_data=paper_data)
+    console.print_paper_info(paper_data)
+    return paper_data
+
+
+def find_listed_paper(
+    paper_data: PaperData, download_dir: Optional[Path]
+) -> Optional[PaperData]:
+    if download_dir is None:
+        return None
+    try:
+        local_paper_data = find_local_paper(paper_data, download_dir)
+    except Exception as err:
+        # the index is an optimization; fall back to scraping
+        console.debug(f"Could not read the paper list: {err}")
+        return None
+    if local_paper_data is not None:
+        console.info("Found the paper in the paper list, skipping metadata retrieval.")
+        console.print_paper_info(local_paper_data)
+    return local_paper_data
+
+
+def completed_transfer(
+    paper_data: PaperData, download_dir: Path, journal: Optional[Journal]
+) -> bool:
+    """Whether the journal records the PDF as downloaded and it is still there."""
+    return bool(
+        journal
+        and journal.reached(paper_data, "downloaded")
+        and (
+            not paper_data.pdf_url
+            or (Path(download_dir) / paper_data.download_name).is_file()
+        )
+    )
+
+
+def validate_target(target: str) -> bool:
+    """Filter out target strings that cannot refer to a supported paper."""
+    # Filter invalid target string.
+    if not target or not isinstance(target, str):
+        console.error("Invalid input: Please provide a valid paper URL or arXiv ID.")
+        return False
+
+    # anything but URLs must be an arXiv ID or refer to an arXiv paper
+    if (
+        not target.startswith(("http://", "https://", "www.", "huggingface.co/"))
+        and classify_target(target).src_website != "ArXiv"
+    ):
+        console.error(
+            f"Invalid input: '{target}' is not a recognized paper URL or arXiv ID.\n"
+            "Please provide a valid URL from ArXiv, alphaXiv, ICLR Proceedings, Hugging Face Papers, CVF, ECVA, or other supported sources, "
+            "or a valid arXiv ID (e.g., '1512.03385')."
+        )
+        return False
+
+    return True
+
+
+def transfer_paper(
+    paper_data: PaperData,
+    download_dir: Path,
+    n_threads: int,
+    journal: Optional[Journal] = None,
+    embed_metadata: bool = True,
+) -> bool:
+    """Transfer stage: download the paper PDF."""
+    if completed_transfer(paper_data, download_dir, journal):
+        return True
+
+    try:
+        if paper_data.pdf_url:
+            download_pdf(
+                paper_data,
+                download_dir=download_dir,
+                parallel_connections=n_threads,
+                embed_metadata=embed_metadata,
+            )
+        else:
+            console.warn("PDF download link not available for this paper.")
+    except (DeadlineExceeded, CircuitOpen) as err:
+        console.error(f"Failed to download the paper: {err}")
+        return False
+    except Exception as err:
+        console.error("Failed to download the paper.")
+        return False
+    if journal:
+        journal.record(paper_data, "downloaded")
+    return True
+
+
+def embed_paper(
+    paper_data: PaperData,
+    download_dir: Path,
+    journal: Optional[Journal] = None,
+    pool: Optional[ProcessPool] = None,
+) -> bool:
+    """Embed stage: write the paper metadata into the downloaded PDF."""
+    if not paper_data.pdf_url or (journal and journal.reached(paper_data, "indexed")):
+        return True
+    download_path = Path(download_dir) / paper_data.download_name
+    if not download_path.is_file():
+        return True
+
+    try:
+        if pool is not None:
+            pool.run(add_pdf_metadata, paper_data, download_path)
+        else:
+            add_pdf_metadata(paper_data, download_path)
+    except Exception as err:
+        console.error("Failed to add metadata to the paper PDF.")
+        return False
+    return True
+
+
+def finalize_paper(
+    paper_data: PaperData,
+    download_dir: Path,
+    pdf_only: bool,
+    notes_format: str,
+    journal: Optional[Journal] = None,
+) -> bool:
+    """
+    Finalize stage: keep the PDF in the PDF store, update the paper list and
+    create the notes file.
+    """
+    if journal and journal.reached(paper_data, "noted"):
+        return True
+
+    # Share the finished PDF with other download directories
+    store_pdf(paper_data, download_dir)
+
+    # Update paper list.
+    try:
+        if not (journal and journal.reached(paper_data, "indexed")):
+            add_to_paper_list(paper_data, download_dir=download_dir)
+            if journal:
+                journal.record(paper_data, "indexed")
+    except Exception as err:
+        console.warn(
+            "Could not update the paper tracking list, but the download completed successfully."
+        )
+        return False
+
+    # Create paper notes
+    try:
+        if not pdf_only:
+            create_paper_note(
+                paper_data, download_dir=download_dir, notes_format=notes_format
+            )
+    except Exception as err:
+        console.warn(
+            "Could not create paper notes, but the PDF was downloaded successfully."
+        )
+        return False
+
+    if journal:
+        journal.record(paper_data, "noted")
+    return True
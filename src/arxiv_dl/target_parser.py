@@ -1,12 +1,26 @@
+import hashlib
 import re
+import sys
 from datetime import datetime
-from typing import List
-from urllib.parse import urljoin, urlparse
+from functools import lru_cache
+from pathlib import Path
+from typing import (
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    TextIO,
+    Union,
+)
+from urllib.parse import ParseResult, urljoin, urlparse
 
-import requests
 from bs4 import BeautifulSoup
 
 from .models import PaperData
+from .network import http_get
 from .printer import console
 
 ###############################################################################
@@ -50,22 +64,9 @@ def parse_target(target: str) -> PaperData:
     Returns:
         PaperData object containing the paper metadata.
     """
-    if is_iclr_proceedings_paper_url(target):
-        return process_iclr_target(target)
-    elif "arxiv" in target.lower() or valid_arxiv_id(target):
-        return process_arxiv_target(target)
-    elif is_alphaxiv_paper_url(target):
-        return process_alphaxiv_target(target)
-    elif "openaccess.thecvf.com" in target:
-        return process_cvf_target(target)
-    elif "ecva.net" in target:
-        return process_ecva_target(target)
-    elif "openreview.net" in target:
-        return process_openreview_target(target)
-    elif "proceedings.neurips.cc" in target or "papers.nips.cc" in target:
-        return process_nips_target(target)
-    elif is_huggingface_paper_url(target):
-        return process_huggingface_target(target)
+    process = classify_target(target).process
+    if process is not None:
+        return process(target)
     elif target.endswith(".pdf"):
         # TODO
         ...
@@ -75,19 +76,148 @@ def parse_target(target: str) -> PaperData:
         return False
 
 
-def expand_target(target: str) -> List[str]:
+class TargetInfo(NamedTuple):
     """
-    Expand a target into one or more single-paper targets.
+    What a target refers to, see `classify_target()`.
+
+    `kind` is "paper" for a single paper, turned into its `PaperData` by
+    `process`; "listing" for a page listing papers, see `expand_target()`;
+    and "unknown" for anything else.
+    """
+
+    kind: str
+    src_website: Optional[str] = None
+    process: Optional[Callable[[str], PaperData]] = None
+
+
+UNKNOWN_TARGET = TargetInfo("unknown")
+
+
+@lru_cache(maxsize=8192)
+def classify_target(target: str) -> TargetInfo:
+    """
+    Identify the source of a target, parsing it once; no network requests are
+    made.
+
+    URLs are dispatched on their host through `HOST_CLASSIFIERS`. Other
+    targets are arXiv papers if they are arXiv IDs or mention arXiv.
+    Results are memoized, since each target is classified by every stage
+    that handles it.
+    """
+    if not isinstance(target, str):
+        return UNKNOWN_TARGET
+    if valid_arxiv_id(target):
+        # the bulk of most inputs, and never a URL
+        return ARXIV_TARGET
+    parsed = _parse_target_url(target)
+    host = parsed.hostname if parsed else None
+    while host:
+        classify = HOST_CLASSIFIERS.get(host)
+        if classify is not None:
+            return classify(target, parsed)
+        # try the parent domain, e.g. alphaxiv.org for www.alphaxiv.org
+        host = host.partition(".")[2]
+    if "arxiv" in target.lower():
+        return ARXIV_TARGET
+    return UNKNOWN_TARGET
+
+
+def _parse_target_url(target: str) -> Optional[ParseResult]:
+    url = normalize_url_for_parsing(target)
+    if "://" not in url:
+        # bare host names, e.g. openaccess.thecvf.com/content/...
+        url = f"https://{url}"
+    try:
+        return urlparse(url)
+    except ValueError:
+        return None
+
+
+def canonical_target_key(target: str) -> str:
+    """
+    Return a key identifying the paper referred to by the target.
+
+    Targets referring to the same paper share a key, e.g. `1512.03385`,
+    `https://arxiv.org/pdf/1512.03385v2` and the alphaXiv or Hugging Face
+    page of the same paper. Targets that cannot be parsed (including listing
+    pages) are keyed by their own text. No network requests are made.
+    """
+    return _canonical_target_key(target.strip())
+
+
+@lru_cache(maxsize=8192)
+def _canonical_target_key(target: str) -> str:
+    process = classify_target(target).process
+    if process is None:
+        return target
+    try:
+        paper_data = process(target)
+    except Exception:
+        return target
+    if not paper_data:
+        return target
+    return paper_key(paper_data)
+
+
+def paper_key(paper_data: PaperData) -> str:
+    """Return the canonical key of a parsed paper, see `canonical_target_key()`."""
+    return f"{paper_data.src_website}:{paper_data.paper_id}"
+
+
+def expand_target(target: str) -> Iterator[str]:
+    """
+    Lazily expand a target into one or more single-paper targets.
 
     Hugging Face paper listing pages expose links to individual
-    `/papers/{arxiv_id}` pages, which can be downloaded one by one. Other
-    targets are returned unchanged.
+    `/papers/{arxiv_id}` pages, which can be downloaded one by one. A listing
+    is only fetched when its first paper is requested, so the papers of
+    earlier targets start downloading first. Other targets are yielded
+    unchanged.
     """
-    if is_huggingface_papers_listing_url(target) or is_huggingface_collection_url(
-        target
-    ):
-        return get_huggingface_paper_urls_from_listing(target)
-    return [target]
+    if classify_target(target).kind == "listing":
+        yield from iter_huggingface_paper_urls_from_listing(target)
+    else:
+        yield target
+
+
+def read_targets(source: Union[str, Path, TextIO]) -> Iterator[str]:
+    """
+    Lazily read targets from a file, one per line; `-` reads standard input.
+
+    Leading/trailing whitespace is stripped; blank lines and lines starting
+    with `#` are skipped.
+    """
+    if isinstance(source, (str, Path)) and str(source) != "-":
+        with open(source, "r", encoding="utf-8") as f:
+            yield from read_targets(f)
+        return
+
+    for line in sys.stdin if source == "-" else source:
+        line = line.strip()
+        if line and not line.startswith("#"):
+            yield line
+
+
+def unique_targets(targets: Iterable[str]) -> Iterator[str]:
+    """
+    Yield targets, skipping those referring to a paper seen before.
+
+    Only an 8-byte digest of each canonical key is kept, so the seen-set stays
+    compact for inputs of millions of lines.
+    """
+    seen = set()
+    for target in targets:
+        if not isinstance(target, str):
+            # let invalid inputs through to be reported by the caller
+            yield target
+            continue
+        key = canonical_target_key(target).encode("utf-8")
+        digest = int.from_bytes(hashlib.blake2b(key, digest_size=8).digest(), "big")
+        if digest in seen:
+            console.debug(f"Skipping duplicate target: {target}")
+            continue
+        seen.add(digest)
+        yield target
 
 
 ###############################################################################
@@ -167,21 +297,24 @@ def get_arxiv_id_from_url(url: str) -> str:
     Raises:
         Exception: If the URL is not a valid arXiv URL.
     """
-    # Modern pattern: YYMM.number(vV)
-    modern_pattern = r"[0-9]{2}(0[1-9]|1[0-2])\.[0-9]{4,5}(v[0-9]+)?"
-    match = re.search(modern_pattern, url)
-    if match:
-        # Remove version number if present to get latest version
-        arxiv_id = match[0]
-        return re.sub(r"v[0-9]+$", "", arxiv_id)
-    # Legacy pattern: [archive][.subject_class]/YYMMNNN or NNNN (optionally with vV)
-    legacy_pattern = r"[a-z\-]+(\.[A-Z]{2})?/\d{6,7}(v[0-9]+)?"
-    match = re.search(legacy_pattern, url)
-    if match:
-        # Remove version number if present to get latest version
-        arxiv_id = match[0]
-        return re.sub(r"v[0-9]+$", "", arxiv_id)
-    raise Exception("Could not find arXiv ID in URL.")
+    arxiv_id = _search_arxiv_id(url)
+    if arxiv_id is None:
+        raise Exception("Could not find arXiv ID in URL.")
+    return arxiv_id
+
+
+# Modern pattern: YYMM.number(vV)
+ARXIV_ID_PATTERN = re.compile(r"[0-9]{2}(0[1-9]|1[0-2])\.[0-9]{4,5}(v[0-9]+)?")
+# Legacy pattern: [archive][.subject_class]/YYMMNNN or NNNN (optionally with vV)
+LEGACY_ARXIV_ID_PATTERN = re.compile(r"[a-z\-]+(\.[A-Z]{2})?/\d{6,7}(v[0-9]+)?")
+
+
+def _search_arxiv_id(text: str) -> Optional[str]:
+    match = ARXIV_ID_PATTERN.search(text) or LEGACY_ARXIV_ID_PATTERN.search(text)
+    if match is None:
+        return None
+    # Remove version number if present to get latest version
+    return re.sub(r"v[0-9]+$", "", match[0])
 
 
 def process_arxiv_target(target: str) -> PaperData:
@@ -221,7 +354,11 @@ def normalize_url_for_parsing(target: str) -> str:
 
 def is_alphaxiv_host(target: str) -> bool:
     parsed = urlparse(normalize_url_for_parsing(target))
-    hostname = (parsed.hostname or "").lower()
+    return _is_alphaxiv_hostname(parsed.hostname)
+
+
+def _is_alphaxiv_hostname(hostname: Optional[str]) -> bool:
+    hostname = (hostname or "").lower()
     return hostname == "alphaxiv.org" or hostname.endswith(".alphaxiv.org")
 
 
@@ -231,28 +368,34 @@ def get_alphaxiv_arxiv_id_from_url(url: str) -> str:
         raise Exception("Unexpected alphaXiv URL.")
 
     parsed = urlparse(normalize_url_for_parsing(url))
-    try:
-        paper_id = get_arxiv_id_from_url(parsed.path)
-    except Exception as err:
-        raise Exception("Could not find arXiv ID in alphaXiv paper URL.") from err
-
-    if not valid_arxiv_id(paper_id):
-        raise Exception("Could not find a valid arXiv ID in alphaXiv paper URL.")
-
-    bounded_id_pattern = (
-        rf"(?:^|/){re.escape(paper_id)}(?:v[0-9]+)?(?=$|/|\.(?:md|pdf)$)"
-    )
-    if not re.search(bounded_id_pattern, parsed.path):
+    paper_id = _alphaxiv_arxiv_id(parsed.path)
+    if paper_id is None:
         raise Exception("Could not find a valid arXiv ID in alphaXiv paper URL.")
     return paper_id
 
 
+def _alphaxiv_arxiv_id(path: str) -> Optional[str]:
+    paper_id = _search_arxiv_id(path)
+    if paper_id is None or not valid_arxiv_id(paper_id):
+        return None
+
+    # the ID must be a whole path segment, with an optional version/extension
+    start = path.find(paper_id)
+    while start >= 0:
+        end = start + len(paper_id)
+        if (start == 0 or path[start - 1] == "/") and ALPHAXIV_ID_SUFFIX.fullmatch(
+            path, end
+        ):
+            return paper_id
+        start = path.find(paper_id, start + 1)
+    return None
+
+
+ALPHAXIV_ID_SUFFIX = re.compile(r"(?:v[0-9]+)?(?:/.*|\.(?:md|pdf))?", re.DOTALL)
+
+
 def is_alphaxiv_paper_url(target: str) -> bool:
-    try:
-        get_alphaxiv_arxiv_id_from_url(target)
-        return True
-    except Exception:
-        return False
+    return classify_target(target).process is process_alphaxiv_target
 
 
 def process_alphaxiv_target(target: str) -> PaperData:
@@ -267,7 +410,10 @@ def process_alphaxiv_target(target: str) -> PaperData:
 
 def is_huggingface_host(target: str) -> bool:
     parsed = urlparse(normalize_url_for_parsing(target))
-    return parsed.netloc.lower() in {"huggingface.co", "www.huggingface.co"}
+    return parsed.netloc.lower() in HUGGINGFACE_HOSTS
+
+
+HUGGINGFACE_HOSTS = {"huggingface.co", "www.huggingface.co"}
 
 
 def get_huggingface_arxiv_id_from_url(url: str) -> str:
@@ -281,28 +427,34 @@ def get_huggingface_arxiv_id_from_url(url: str) -> str:
         raise Exception("Unexpected Hugging Face URL.")
 
     parsed = urlparse(normalize_url_for_parsing(url))
-    tokens = parsed.path.strip("/").split("/")
+    paper_id = _huggingface_arxiv_id(_path_tokens(parsed))
+    if paper_id is None:
+        raise Exception("Could not find arXiv ID in Hugging Face paper URL.")
+    return paper_id
+
+
+def _path_tokens(parsed: ParseResult) -> List[str]:
+    return parsed.path.strip("/").split("/")
+
+
+def _huggingface_arxiv_id(tokens: List[str]) -> Optional[str]:
     if len(tokens) == 2 and tokens[0] == "papers" and valid_arxiv_id(tokens[1]):
         return re.sub(r"v[0-9]+$", "", tokens[1])
-
-    raise Exception("Could not find arXiv ID in Hugging Face paper URL.")
+    return None
 
 
 def is_huggingface_paper_url(target: str) -> bool:
-    try:
-        get_huggingface_arxiv_id_from_url(target)
-        return True
-    except Exception:
-        return False
+    return classify_target(target).process is process_huggingface_target
 
 
 def is_huggingface_papers_listing_url(target: str) -> bool:
     if not is_huggingface_host(target):
         return False
-
     parsed = urlparse(normalize_url_for_parsing(target))
-    tokens = parsed.path.strip("/").split("/")
+    return _is_huggingface_listing(_path_tokens(parsed))
 
+
+def _is_huggingface_listing(tokens: List[str]) -> bool:
     if tokens == ["papers"]:
         return True
 
@@ -335,9 +487,11 @@ def is_huggingface_papers_listing_url(target: str) -> bool:
 def is_huggingface_collection_url(target: str) -> bool:
     if not is_huggingface_host(target):
         return False
-
     parsed = urlparse(normalize_url_for_parsing(target))
-    tokens = parsed.path.strip("/").split("/")
+    return _is_huggingface_collection(_path_tokens(parsed))
+
+
+def _is_huggingface_collection(tokens: List[str]) -> bool:
     return len(tokens) >= 3 and tokens[0] == "collections"
 
 
@@ -347,6 +501,15 @@ def process_huggingface_target(target: str) -> PaperData:
 
 
 def get_huggingface_paper_urls_from_listing(target: str) -> List[str]:
+    return list(iter_huggingface_paper_urls_from_listing(target))
+
+
+def iter_huggingface_paper_urls_from_listing(target: str) -> Iterator[str]:
+    """
+    Yield the single-paper URLs of a Hugging Face listing.
+
+    Listings are served as one page, fetched when the first URL is requested.
+    """
     if not (
         is_huggingface_papers_listing_url(target)
         or is_huggingface_collection_url(target)
@@ -354,11 +517,16 @@ def get_huggingface_paper_urls_from_listing(target: str) -> List[str]:
         raise Exception(f"Unexpected Hugging Face papers listing URL: {target}")
 
     target = normalize_url_for_parsing(target)
-    response = requests.get(target, timeout=HUGGINGFACE_REQUEST_TIMEOUT)
+    response = http_get(target, timeout=HUGGINGFACE_REQUEST_TIMEOUT)
     if response.status_code != 200:
         raise Exception(f"Cannot connect to {target}")
 
-    soup = BeautifulSoup(response.text, "html.parser")
+    yield from parse_huggingface_listing(response.text)
+
+
+def parse_huggingface_listing(html: str) -> List[str]:
+    """Extract unique single-paper URLs from a Hugging Face listing page."""
+    soup = BeautifulSoup(html, "html.parser")
     paper_urls = []
     seen_paper_ids = set()
     for link in soup.find_all("a", href=True):
@@ -606,6 +774,31 @@ def process_ecva_target(target: str) -> PaperData:
 ### NeurIPS and ICLR Proceedings
 
 
+PROCEEDINGS_PAPER_PATH = re.compile(
+    r"/(?:paper_files/)?paper/(?P<year>[0-9]{4})/"
+    r"(?P<kind>hash|file)/(?P<paper_id>[0-9a-fA-F]{32})-"
+    r"(?P<doc_type>Abstract|Paper)(?P<suffix>[^./]*)"
+    r"\.(?P<ext>html|pdf)"
+)
+PROCEEDINGS_DOCUMENTS = {("hash", "Abstract", "html"), ("file", "Paper", "pdf")}
+
+
+def _proceedings_paper_match(path: str, src_website: str) -> Optional[re.Match]:
+    """Match the path of a NeurIPS or ICLR abstract page or PDF, if it is one."""
+    match = PROCEEDINGS_PAPER_PATH.fullmatch(path)
+    if not match:
+        return None
+    doc_type, suffix = match.group("doc_type"), match.group("suffix")
+    if (match.group("kind"), doc_type, match.group("ext")) not in PROCEEDINGS_DOCUMENTS:
+        return None
+    if src_website == "ICLR" and (
+        suffix not in {"", "-Conference"}
+        or (doc_type == "Paper" and suffix != "-Conference")
+    ):
+        return None
+    return match
+
+
 def _process_proceedings_target(target: str, src_website: str) -> PaperData:
     if src_website == "NeurIPS":
         valid_hosts = {"proceedings.neurips.cc", "papers.nips.cc"}
@@ -623,34 +816,14 @@ def _process_proceedings_target(target: str, src_website: str) -> PaperData:
     ):
         raise Exception(f"Unexpected {src_website} URL: {target}")
 
-    pattern = (
-        r"/(?:paper_files/)?paper/(?P<year>[0-9]{4})/"
-        r"(?P<kind>hash|file)/(?P<paper_id>[0-9a-fA-F]{32})-"
-        r"(?P<doc_type>Abstract|Paper)(?P<suffix>[^./]*)"
-        r"\.(?P<ext>html|pdf)$"
-    )
-    match = re.fullmatch(pattern, parsed.path)
+    match = _proceedings_paper_match(parsed.path, src_website)
     if not match:
         raise Exception(f"Unexpected {src_website} URL: {target}")
 
     year = int(match.group("year"))
     paper_id = match.group("paper_id").lower()
-    kind = match.group("kind")
-    doc_type = match.group("doc_type")
     suffix = match.group("suffix")
-    ext = match.group("ext")
-
-    valid_document = (kind, doc_type, ext) in {
-        ("hash", "Abstract", "html"),
-        ("file", "Paper", "pdf"),
-    }
-    if not valid_document:
-        raise Exception(f"Unexpected {src_website} URL: {target}")
-
     if src_website == "ICLR":
-        valid_suffix = suffix in {"", "-Conference"}
-        if not valid_suffix or (doc_type == "Paper" and suffix != "-Conference"):
-            raise Exception(f"Unexpected ICLR URL: {target}")
         suffix = "-Conference"
 
     base_url = f"https://{canonical_host}/paper_files/paper/{year}"
@@ -682,11 +855,7 @@ def process_iclr_target(target: str) -> PaperData:
 
 
 def is_iclr_proceedings_paper_url(target: str) -> bool:
-    try:
-        process_iclr_target(target)
-        return True
-    except Exception:
-        return False
+    return classify_target(target).process is process_iclr_target
 
 
 ###############################################################################
@@ -696,3 +865,62 @@ def is_iclr_proceedings_paper_url(target: str) -> bool:
 def process_openreview_target(target: str) -> PaperData:
     # TODO
     ...
+
+
+###############################################################################
+### Target classification
+
+
+ARXIV_TARGET = TargetInfo("paper", "ArXiv", process_arxiv_target)
+ICLR_TARGET = TargetInfo("paper", "ICLR", process_iclr_target)
+
+
+def _classify_arxiv(target: str, parsed: ParseResult) -> TargetInfo:
+    return ARXIV_TARGET
+
+
+def _classify_alphaxiv(target: str, parsed: ParseResult) -> TargetInfo:
+    if _alphaxiv_arxiv_id(parsed.path) is None:
+        return UNKNOWN_TARGET
+    return TargetInfo("paper", "ArXiv", process_alphaxiv_target)
+
+
+def _classify_huggingface(target: str, parsed: ParseResult) -> TargetInfo:
+    if parsed.netloc.lower() not in HUGGINGFACE_HOSTS:
+        return UNKNOWN_TARGET
+    tokens = _path_tokens(parsed)
+    if _huggingface_arxiv_id(tokens) is not None:
+        return TargetInfo("paper", "ArXiv", process_huggingface_target)
+    if _is_huggingface_listing(tokens) or _is_huggingface_collection(tokens):
+        return TargetInfo("listing")
+    return UNKNOWN_TARGET
+
+
+def _classify_iclr(target: str, parsed: ParseResult) -> TargetInfo:
+    if (
+        # bare host names are not accepted for ICLR
+        not target.lstrip()[:8].lower().startswith(("http://", "https://"))
+        or parsed.hostname != "proceedings.iclr.cc"
+        or _proceedings_paper_match(parsed.path, "ICLR") is None
+    ):
+        return UNKNOWN_TARGET
+    return ICLR_TARGET
+
+
+def _source(src_website: str, process: Callable[[str], PaperData]):
+    info = TargetInfo("paper", src_website, process)
+    return lambda target, parsed: info
+
+
+# Classifiers by host name; hosts not listed fall back to their parent domain.
+HOST_CLASSIFIERS: Dict[str, Callable[[str, ParseResult], TargetInfo]] = {
+    "arxiv.org": _classify_arxiv,
+    "alphaxiv.org": _classify_alphaxiv,
+    "huggingface.co": _classify_huggingface,
+    "openaccess.thecvf.com": _source("CVF", process_cvf_target),
+    "ecva.net": _source("ECVA", process_ecva_target),
+    "openreview.net": _source("OpenReview", process_openreview_target),
+    "proceedings.neurips.cc": _source("NeurIPS", process_nips_target),
+    "papers.nips.cc": _source("NeurIPS", process_nips_target),
+    "proceedings.iclr.cc": _classify_iclr,
+}
@@ -1,16 +1,29 @@
-import importlib.metadata
 import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Optional
 
 import requests
 
+from .helpers import get_config_dir
+from .network import NO_RETRY, PACKAGE_VERSION, Deadline, deadline_scope, http_get
 from .printer import console
 
+PYPI_URL = "https://pypi.org/pypi/arxiv-dl/json"
+# PyPI is asked for the latest version at most once per this many seconds.
+UPDATE_CHECK_TTL = 24 * 3600.0
+# Hard cap on the time spent asking PyPI, in seconds.
+UPDATE_CHECK_TIMEOUT = 3.0
+UPDATE_CHECK_NAME = "update_check.json"
 
-def check_latest_version():
+
+def check_latest_version(timeout: float = UPDATE_CHECK_TIMEOUT):
     """Check the latest version of arxiv-dl on PyPI."""
-    pypi_url = "https://pypi.org/pypi/arxiv-dl/json"
     try:
-        response = requests.get(pypi_url)
+        with deadline_scope(Deadline(timeout)):
+            response = http_get(PYPI_URL, retry=NO_RETRY, timeout=(timeout, timeout))
     except requests.exceptions.ConnectionError:
         return ""
     except Exception as e:
@@ -27,16 +40,80 @@ def check_latest_version():
 
 def check_current_version():
     """Check the current version of arxiv-dl."""
-    current_version = importlib.metadata.version("arxiv-dl")
-    return current_version
+    return PACKAGE_VERSION
 
 
-def check_update():
-    """Remind user to update arxiv-dl if there is a new version."""
-    latest_version = check_latest_version()
-    current_version = check_current_version()
-    console.print(f"[dim]\\[arxiv-dl] (version: {current_version})")
+def _update_check_path() -> Path:
+    return get_config_dir() / UPDATE_CHECK_NAME
+
+
+def load_cached_latest_version(ttl: float = UPDATE_CHECK_TTL) -> Optional[str]:
+    """The latest version found by a check less than `ttl` seconds old, if any."""
+    try:
+        with _update_check_path().open() as f:
+            record = json.load(f)
+        if time.time() - record["checked"] < ttl:
+            return record["latest_version"]
+    except Exception:
+        # missing, unreadable or written by an incompatible version
+        pass
+    return None
+
 
+def store_latest_version(latest_version: str) -> None:
+    """Cache the result of a check; an empty `latest_version` records a failure."""
+    path = _update_check_path()
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}")
+    try:
+        with tmp_path.open("w") as f:
+            json.dump({"checked": time.time(), "latest_version": latest_version}, f)
+        tmp_path.replace(path)
+    except OSError as err:
+        tmp_path.unlink(missing_ok=True)
+        console.debug(f"Could not cache the update check: {err}")
+
+
+class UpdateCheck:
+    """
+    Background lookup of the latest version, see `check_update()`.
+
+    `report()` prints the update reminder if the lookup has finished by then;
+    by default it does not wait for it.
+    """
+
+    def __init__(self, current_version: str, timeout: float = UPDATE_CHECK_TIMEOUT):
+        self.current_version = current_version
+        self.timeout = timeout
+        self.latest_version: Optional[str] = None
+        self._done = threading.Event()
+        # a daemon thread: a hanging lookup must not keep the process alive
+        self._thread = threading.Thread(
+            target=self._run, name="arxiv-dl-update-check", daemon=True
+        )
+
+    def start(self) -> "UpdateCheck":
+        self._thread.start()
+        return self
+
+    def _run(self) -> None:
+        try:
+            try:
+                self.latest_version = check_latest_version(self.timeout)
+            except Exception:
+                # e.g. an unexpected answer from PyPI
+                self.latest_version = ""
+            # failures are cached too: a firewalled network is tried once a day
+            store_latest_version(self.latest_version)
+        finally:
+            self._done.set()
+
+    def report(self, wait: float = 0.0) -> None:
+        """Print the reminder if the lookup is done, waiting at most `wait` seconds."""
+        if self._done.wait(wait):
+            print_update_reminder(self.current_version, self.latest_version)
+
+
+def print_update_reminder(current_version: str, latest_version: Optional[str]):
     if latest_version and latest_version != current_version:
         console.print(
             f"[yellow]\\[arxiv-dl] latest version available: {latest_version}[/yellow]\n"
@@ -46,8 +123,32 @@ def check_update():
             "[bold]python3 -m pip install -U arxiv-dl[/bold]"
         )
 
+
+def check_update() -> Optional[UpdateCheck]:
+    """
+    Remind user to update arxiv-dl if there is a new version.
+
+    The latest version is cached in the config directory for
+    `UPDATE_CHECK_TTL`. Once the cache is stale, PyPI is asked in a
+    background thread instead, so no time is spent waiting for it; the
+    returned `UpdateCheck` reports its result at the end of the run, if it
+    arrived by then.
+    """
+    current_version = check_current_version()
+    console.print(f"[dim]\\[arxiv-dl] (version: {current_version})")
+
+    update_check = None
+    latest_version = load_cached_latest_version()
+    if latest_version is None:
+        update_check = UpdateCheck(current_version).start()
+    else:
+        print_update_reminder(current_version, latest_version)
+
     print()
+    return update_check
 
 
 if __name__ == "__main__":
-    check_update()
+    update_check = check_update()
+    if update_check:
+        update_check.report(wait=UPDATE_CHECK_TIMEOUT)
@@ -0,0 +1,155 @@
+import json
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+from requests.structures import CaseInsensitiveDict
+
+from arxiv_dl import network, reparse
+from arxiv_dl.archive import ResponseArchive
+from arxiv_dl.helpers import PAPER_LIST_NAME
+from arxiv_dl.http_cache import HttpCache
+from arxiv_dl.metadata_cache import MetadataCache
+
+URL = "https://arxiv.org/abs/1512.03385"
+
+
+def _response(status_code, body=b"", headers=None):
+    response = MagicMock(status_code=status_code, content=body)
+    response.headers = CaseInsensitiveDict(headers or {})
+    return response
+
+
+class TestResponseArchive(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = Path(tempfile.mkdtemp())
+        self.archive = ResponseArchive(self.test_dir)
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir, ignore_errors=True)
+
+    def test_pages_are_kept_once_per_content(self):
+        self.archive.add(URL, b"v1", "text/html")
+        self.archive.add(URL, b"v1", "text/html")
+        self.archive.add(URL, b"v2", "text/html")
+        # the same body under another URL is stored once
+        self.archive.add(f"{URL}v2", b"v2")
+
+        self.assertEqual(len(self.archive.history(URL)), 2)
+        latest = self.archive.latest(URL)
+        self.assertEqual(self.archive.read(latest), b"v2")
+        self.assertEqual(latest.content_type, "text/html")
+        self.assertEqual(len(list((self.test_dir / "objects").rglob("*.gz"))), 2)
+        self.assertIsNone(self.archive.latest("https://arxiv.org/abs/other"))
+
+    def test_index_is_reloaded(self):
+        self.archive.add(URL, b"v1")
+        with (self.test_dir / "index.jsonl").open("a") as f:
+            f.write('{"url": "cut sho')
+
+        archive = ResponseArchive(self.test_dir)
+
+        self.assertEqual(archive.urls(), [URL])
+        self.assertEqual(archive.read(archive.latest(URL)), b"v1")
+
+
+class TestArchivedGet(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = Path(tempfile.mkdtemp())
+        patcher = patch.object(network, "http_cache", HttpCache(max_size=0))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.session = MagicMock()
+        network.set_session(self.session)
+
+    def tearDown(self):
+        network.configure_archive(None)
+        network.set_session(None)
+        shutil.rmtree(self.test_dir, ignore_errors=True)
+
+    def test_source_pages_are_archived(self):
+        network.configure_archive(self.test_dir)
+        self.session.get.return_value = _response(200, b"page")
+
+        network.http_get(URL)
+        network.http_get("https://example.com/a")
+
+        self.assertEqual(network.response_archive.urls(), [URL])
+
+    def test_offline_requests_are_served_from_archive(self):
+        ResponseArchive(self.test_dir).add(URL, b"page", "text/html")
+
+        with network.offline_archive(self.test_dir):
+            response = network.http_get(URL)
+            with self.assertRaises(network.NotArchived):
+                network.http_get("https://arxiv.org/abs/other")
+
+        self.assertEqual(response.text, "page")
+        self.session.get.assert_not_called()
+        self.assertFalse(network.is_offline())
+
+
+class TestReparse(unittest.TestCase):
+    def setUp(self):
+        self.download_dir = Path(tempfile.mkdtemp())
+        self.archive_dir = Path(tempfile.mkdtemp())
+        patcher = patch("arxiv_dl.scrapers.metadata_cache", MetadataCache(max_size=0))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        network.set_session(MagicMock())
+
+    def tearDown(self):
+        network.set_session(None)
+        shutil.rmtree(self.download_dir, ignore_errors=True)
+        shutil.rmtree(self.archive_dir, ignore_errors=True)
+
+    def _scrape(self, paper_data):
+        # stands in for the scrapers: the title is read from the archived page
+        try:
+            paper_data.title = network.http_get(paper_data.abs_url).text
+        except network.NotArchived:
+            return False
+        paper_data.download_name = "new_name.pdf"
+        return True
+
+    def test_papers_are_rebuilt_from_archive(self):
+        ResponseArchive(self.archive_dir).add(URL, b"New Title")
+        paper_list = {
+            "1512.03385": {
+                "paper_id": "1512.03385",
+                "title": "Old Title",
+                "abs_url": URL,
+                "download_name": "old_name.pdf",
+            },
+            "2103.15538": {
+                "paper_id": "2103.15538",
+                "abs_url": "https://arxiv.org/abs/2103.15538",
+            },
+        }
+        with (self.download_dir / PAPER_LIST_NAME).open("w") as f:
+            json.dump(paper_list, f)
+        (self.download_dir / "old_name.txt").write_text(
+            "\n# Old Title\n\n## Notes\n\nMy reading notes\n"
+        )
+
+        with patch.object(reparse, "scrape_metadata", side_effect=self._scrape):
+            n_reparsed, failed = reparse.reparse_papers(
+                self.download_dir, self.archive_dir
+            )
+
+        self.assertEqual(n_reparsed, 1)
+        self.assertEqual(failed, ["https://arxiv.org/abs/2103.15538"])
+        with (self.download_dir / PAPER_LIST_NAME).open() as f:
+            paper = json.load(f)["1512.03385"]
+        self.assertEqual(paper["title"], "New Title")
+        self.assertEqual(paper["download_name"], "old_name.pdf")
+        notes = (self.download_dir / "old_name.txt").read_text()
+        self.assertIn("# New Title", notes)
+        self.assertTrue(notes.endswith("## Notes\n\nMy reading notes\n"))
+        self.assertFalse(network.is_offline())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,170 @@
+import asyncio
+import json
+import shutil
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+import pymupdf
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+from arxiv_dl import helpers, network, scrapers
+from arxiv_dl.async_engine import download_paper_async
+from arxiv_dl.failure_cache import FailureCache
+from arxiv_dl.http_cache import HttpCache
+from arxiv_dl.journal import Journal
+from arxiv_dl.metadata_cache import MetadataCache
+from arxiv_dl.pdf_store import PdfStore
+
+ABS_PAGE = """
+<html>
+  <body>
+    <h1 class="title mathjax"><span class="descriptor">Title:</span>Paper {paper_id}</h1>
+    <div class="authors"><span class="descriptor">Authors:</span><a href="#">Ada Lovelace</a>, <a href="#">Alan Turing</a></div>
+    <blockquote class="abstract mathjax"><span class="descriptor">Abstract:</span>An abstract.</blockquote>
+  </body>
+</html>
+"""
+
+
+def _make_pdf() -> bytes:
+    doc = pymupdf.open()
+    doc.new_page()
+    data = doc.tobytes()
+    doc.close()
+    return data
+
+
+@unittest.skipIf(httpx is None, "httpx is not installed")
+class TestAsyncEngine(unittest.TestCase):
+    def setUp(self):
+        self.root_dir = Path(__file__).resolve().parent.parent
+        self.test_dir = self.root_dir / "tests" / "test_tmp_async"
+        self.test_dir.mkdir(exist_ok=True)
+        self.requested = []
+        pdf_bytes = _make_pdf()
+        self.http_cache = HttpCache(self.test_dir / "http_cache")
+        self.metadata_cache = MetadataCache(self.test_dir / "metadata_cache")
+        self.failure_cache = FailureCache(self.test_dir / "failure_cache")
+        for patcher in (
+            patch.object(network, "http_cache", self.http_cache),
+            patch.object(scrapers, "metadata_cache", self.metadata_cache),
+            patch.object(scrapers, "failure_cache", self.failure_cache),
+            patch.object(helpers, "pdf_store", PdfStore(self.test_dir / "pdfs")),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        def handler(request):
+            self.requested.append(str(request.url))
+            path = request.url.path
+            if path.startswith("/abs/"):
+                paper_id = path[len("/abs/") :]
+                return httpx.Response(200, text=ABS_PAGE.format(paper_id=paper_id))
+            if path.startswith("/bibtex/"):
+                return httpx.Response(200, text="@misc{test}")
+            if path.startswith("/pdf/"):
+                return httpx.Response(200, content=pdf_bytes)
+            return httpx.Response(404)
+
+        self.transport = httpx.MockTransport(handler)
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir, ignore_errors=True)
+
+    def _download(self, target, **kwargs):
+        async def run():
+            async with httpx.AsyncClient(transport=self.transport) as client:
+                return await download_paper_async(
+                    target,
+                    download_dir=self.test_dir,
+                    set_verbose_level="silent",
+                    client=client,
+                    **kwargs,
+                )
+
+        return asyncio.run(run())
+
+    def test_download_single_arxiv_paper(self):
+        success = self._download("1512.03385")
+
+        self.assertTrue(success)
+        pdf_path = self.test_dir / "1512.03385_Paper_151203385.pdf"
+        self.assertTrue(pdf_path.is_file())
+        with pymupdf.open(pdf_path) as doc:
+            self.assertEqual(doc.metadata["author"], "Ada Lovelace, Alan Turing")
+        self.assertTrue(pdf_path.with_suffix(".txt").is_file())
+
+        paper_list = json.loads((self.test_dir / "000_Paper_List.json").read_text())
+        self.assertEqual(paper_list["1512.03385"]["bibtex"], "@misc{test}")
+
+    def test_failed_metadata_fetch_reports_failure(self):
+        target = "https://www.ecva.net/papers/eccv_2024/papers_ECCV/html/6863_ECCV_2024_paper.php"
+        self.assertFalse(self._download(target))
+
+        # the page is gone: the next run does not ask for it again
+        self.requested.clear()
+        self.assertFalse(self._download(target))
+        self.assertEqual(self.requested, [])
+        self.assertEqual(self.failure_cache.skipped, {"ECVA:06863"})
+
+    def test_missing_paper_is_not_downloaded(self):
+        target = "https://openaccess.thecvf.com/content/CVPR2021/html/Xu_SUTD-TrafficQA_A_Question_Answering_Benchmark_and_an_Efficient_Network_for_CVPR_2021_paper.html"
+
+        self.assertFalse(self._download(target))
+        self.assertEqual(self.requested, [target])
+
+        self.requested.clear()
+        self.assertFalse(self._download(target))
+        self.assertEqual(self.requested, [])
+
+    def test_resume_with_journal_skips_completed_work(self):
+        journal_path = self.test_dir / "journal.jsonl"
+        with Journal(journal_path) as journal:
+            self.assertTrue(self._download("1512.03385", journal=journal))
+        self.requested.clear()
+
+        with Journal(journal_path) as journal:
+            self.assertTrue(self._download("1512.03385", journal=journal))
+        self.assertEqual(self.requested, [])
+
+    def test_downloaded_paper_is_not_fetched_again(self):
+        self.assertTrue(self._download("1512.03385"))
+        self.requested.clear()
+
+        self.assertTrue(self._download("https://arxiv.org/abs/1512.03385v1"))
+        self.assertEqual(self.requested, [])
+
+    def test_http2_client_carries_metadata_requests(self):
+        metadata_requested = []
+
+        def metadata_handler(request):
+            metadata_requested.append(request.url.path)
+            return self.transport.handle_request(request)
+
+        metadata_client = httpx.AsyncClient(
+            transport=httpx.MockTransport(metadata_handler)
+        )
+        with patch("arxiv_dl.async_engine.http2_enabled", return_value=True):
+            with patch(
+                "arxiv_dl.async_engine.create_async_client",
+                return_value=metadata_client,
+            ) as create:
+                self.assertTrue(self._download("1512.03385"))
+
+        create.assert_called_once_with(http2=True)
+        self.assertEqual(metadata_requested, ["/abs/1512.03385", "/bibtex/1512.03385"])
+        self.assertEqual(len([url for url in self.requested if "/pdf/" in url]), 1)
+        self.assertTrue(metadata_client.is_closed)
+
+    def test_invalid_target_reports_failure(self):
+        self.assertFalse(self._download("not-a-paper", jobs=4))
+        self.assertEqual(self.requested, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
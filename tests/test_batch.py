@@ -0,0 +1,201 @@
+import threading
+import time
+import unittest
+from contextlib import contextmanager
+from pathlib import Path
+from unittest.mock import patch
+
+from arxiv_dl.__main__ import download_paper
+from arxiv_dl.batch import ProcessPool, Stage, run_pipeline
+from arxiv_dl.models import PaperData
+
+
+class TestRunPipeline(unittest.TestCase):
+    def test_items_flow_through_every_stage(self):
+        stages = [
+            Stage("add", lambda x: x + 1, 2),
+            Stage("double", lambda x: x * 2, 3),
+        ]
+
+        results = list(run_pipeline(stages, range(10)))
+
+        self.assertEqual(sorted(results), [(i, i, (i + 1) * 2) for i in range(10)])
+
+    def test_falsy_result_skips_remaining_stages(self):
+        seen = []
+
+        def keep_even(x):
+            return x if x % 2 == 0 else False
+
+        def record(x):
+            seen.append(x)
+            return True
+
+        stages = [Stage("filter", keep_even, 2), Stage("record", record, 1)]
+        results = dict(
+            (index, result) for index, _, result in run_pipeline(stages, range(1, 7))
+        )
+
+        self.assertEqual(sorted(seen), [2, 4, 6])
+        self.assertEqual(
+            results, {0: False, 1: True, 2: False, 3: True, 4: False, 5: True}
+        )
+
+    def test_stages_overlap(self):
+        """The second item is fetched while the first one is still transferring."""
+        first_transfer_started = threading.Event()
+        overlapped = threading.Event()
+
+        def fetch(x):
+            if x == 1:
+                first_transfer_started.wait(timeout=1)
+                overlapped.set()
+            return x
+
+        def transfer(x):
+            if x == 0:
+                first_transfer_started.set()
+                overlapped.wait(timeout=1)
+            return True
+
+        stages = [Stage("fetch", fetch, 1), Stage("transfer", transfer, 1)]
+        list(run_pipeline(stages, range(2)))
+
+        self.assertTrue(overlapped.is_set())
+
+    def test_stage_concurrency_is_bounded(self):
+        lock = threading.Lock()
+        active = []
+        peak = []
+
+        def work(x):
+            with lock:
+                active.append(1)
+                peak.append(len(active))
+            time.sleep(0.01)
+            with lock:
+                active.pop()
+            return x
+
+        stages = [Stage("work", work, 2), Stage("noop", lambda x: True, 4)]
+        list(run_pipeline(stages, range(1, 20)))
+
+        self.assertLessEqual(max(peak), 2)
+
+    def test_exceptions_propagate(self):
+        def fail(_):
+            raise ValueError("boom")
+
+        with self.assertRaises(ValueError):
+            list(run_pipeline([Stage("fail", fail, 2)], range(5)))
+
+    def test_every_stage_runs_in_the_item_scope(self):
+        scopes = []
+
+        @contextmanager
+        def scope(item):
+            scopes.append(item)
+            yield
+
+        stages = [Stage("a", lambda x: x, 2), Stage("b", lambda x: True, 2)]
+        list(run_pipeline(stages, range(1, 4), scope=scope))
+
+        self.assertEqual(sorted(scopes), [1, 1, 2, 2, 3, 3])
+
+
+class TestProcessPool(unittest.TestCase):
+    def test_runs_in_worker_process(self):
+        with ProcessPool(2) as pool:
+            self.assertEqual(pool.run(pow, 2, 10), 1024)
+            futures = [pool.submit(pow, i, 2) for i in range(5)]
+            self.assertEqual([f.result() for f in futures], [0, 1, 4, 9, 16])
+
+    def test_not_started_until_used(self):
+        pool = ProcessPool(2)
+        pool.shutdown()
+
+        self.assertIsNone(pool._executor)
+
+
+class TestConcurrentDownloadPaper(unittest.TestCase):
+    @patch("arxiv_dl.__main__.finalize_paper")
+    @patch("arxiv_dl.__main__.transfer_paper")
+    @patch("arxiv_dl.__main__.resolve_paper")
+    @patch("arxiv_dl.stages.expand_target")
+    def test_download_paper_pipelines_expanded_targets(
+        self,
+        mock_expand_target,
+        mock_resolve_paper,
+        mock_transfer_paper,
+        mock_finalize_paper,
+    ):
+        expanded_targets = [
+            f"https://huggingface.co/papers/2605.1235{i}" for i in range(6)
+        ]
+        mock_expand_target.return_value = expanded_targets
+        mock_resolve_paper.side_effect = lambda target, **kwargs: PaperData(
+            paper_id=target[-10:]
+        )
+        mock_transfer_paper.side_effect = (
+            lambda paper_data, **kwargs: not paper_data.paper_id.endswith("3")
+        )
+        mock_finalize_paper.return_value = True
+
+        success = download_paper(
+            "https://huggingface.co/papers/month/2026-05",
+            download_dir=Path(__file__).resolve().parent,
+            set_verbose_level="silent",
+            jobs=4,
+        )
+
+        self.assertFalse(success)
+        self.assertEqual(
+            sorted(args[0] for args, _ in mock_resolve_paper.call_args_list),
+            expanded_targets,
+        )
+        self.assertEqual(mock_finalize_paper.call_count, 5)
+
+    @patch("arxiv_dl.__main__.finalize_paper")
+    @patch("arxiv_dl.__main__.embed_paper")
+    @patch("arxiv_dl.__main__.transfer_paper")
+    @patch("arxiv_dl.__main__.resolve_paper")
+    @patch("arxiv_dl.stages.expand_target")
+    def test_papers_are_finalized_only_after_embedding(
+        self,
+        mock_expand_target,
+        mock_resolve_paper,
+        mock_transfer_paper,
+        mock_embed_paper,
+        mock_finalize_paper,
+    ):
+        mock_expand_target.return_value = [
+            f"https://huggingface.co/papers/2605.1235{i}" for i in range(4)
+        ]
+        mock_resolve_paper.side_effect = lambda target, **kwargs: PaperData(
+            paper_id=target[-10:]
+        )
+        mock_transfer_paper.return_value = True
+        mock_embed_paper.side_effect = (
+            lambda paper_data, **kwargs: not paper_data.paper_id.endswith("1")
+        )
+        mock_finalize_paper.return_value = True
+
+        success = download_paper(
+            "https://huggingface.co/papers/month/2026-05",
+            download_dir=Path(__file__).resolve().parent,
+            set_verbose_level="silent",
+            jobs=2,
+        )
+
+        self.assertFalse(success)
+        # the transfer stage leaves embedding to the embed stage
+        for _, kwargs in mock_transfer_paper.call_args_list:
+            self.assertFalse(kwargs["embed_metadata"])
+        self.assertEqual(
+            sorted(args[0].paper_id for args, _ in mock_finalize_paper.call_args_list),
+            ["2605.12350", "2605.12352", "2605.12353"],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -41,6 +41,16 @@ class TestCLI(unittest.TestCase):
             check=True,
         )
 
+    def test_async_rejects_sync_concurrency_flags(self):
+        result = subprocess.run(
+            f"paper --async --scrape-jobs 4 -d {self.test_dir} 1512.03385",
+            shell=True,
+            capture_output=True,
+            text=True,
+        )
+        self.assertEqual(result.returncode, 2)
+        self.assertIn("--scrape-jobs cannot be used with --async", result.stderr)
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,230 @@
+import asyncio
+import json
+import os
+import re
+import shutil
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from unittest.mock import patch
+
+import requests
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+from arxiv_dl.dl_utils import (
+    MIN_SEGMENT_SIZE,
+    PART_SUFFIX,
+    RESUME_ATTEMPTS,
+    download,
+    download_async,
+    download_segmented,
+    split_ranges,
+)
+from arxiv_dl.helpers import download_pdf
+from arxiv_dl.models import PaperData
+
+PAYLOAD = os.urandom(3 * MIN_SEGMENT_SIZE + 12345)
+ETAG = '"v1"'
+
+
+class _Handler(BaseHTTPRequestHandler):
+    accept_ranges = True
+    # partial responses start this many bytes after the requested offset
+    range_shift = 0
+    # bytes sent of the bodies of the next responses before hanging up
+    drop_after = []
+    requests = []
+
+    def log_message(self, *args):
+        pass
+
+    def do_HEAD(self):
+        self.requests.append(("HEAD", None))
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(PAYLOAD)))
+        self.send_header("ETag", ETAG)
+        if self.accept_ranges:
+            self.send_header("Accept-Ranges", "bytes")
+        self.end_headers()
+
+    def do_GET(self):
+        match = re.fullmatch(r"bytes=(\d+)-(\d*)", self.headers.get("Range", ""))
+        self.requests.append(("GET", match and match.group(0)))
+        if_range = self.headers.get("If-Range")
+        if match and self.accept_ranges and if_range in (None, ETAG):
+            first = int(match.group(1)) + self.range_shift
+            last = int(match.group(2) or len(PAYLOAD) - 1)
+            body = PAYLOAD[first : last + 1]
+            self.send_response(206)
+            self.send_header(
+                "Content-Range", f"bytes {first}-{first + len(body) - 1}/{len(PAYLOAD)}"
+            )
+        else:
+            body = PAYLOAD
+            self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("ETag", ETAG)
+        self.end_headers()
+        if self.drop_after:
+            self.wfile.write(body[: self.drop_after.pop(0)])
+            self.close_connection = True
+            return
+        self.wfile.write(body)
+
+
+class _LocalServerTestCase(unittest.TestCase):
+    def setUp(self):
+        self.root_dir = Path(__file__).resolve().parent.parent
+        self.test_dir = self.root_dir / "tests" / "test_tmp_segmented"
+        self.test_dir.mkdir(exist_ok=True)
+        _Handler.requests = []
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.url = f"http://127.0.0.1:{self.server.server_port}/paper.pdf"
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        _Handler.accept_ranges = True
+        _Handler.range_shift = 0
+        _Handler.drop_after = []
+        shutil.rmtree(self.test_dir, ignore_errors=True)
+
+
+class TestSegmentedDownload(_LocalServerTestCase):
+    def test_split_ranges_cover_the_file(self):
+        ranges = split_ranges(len(PAYLOAD), 4)
+
+        self.assertEqual(len(ranges), 3)
+        self.assertEqual(ranges[0][0], 0)
+        self.assertEqual(ranges[-1][1], len(PAYLOAD) - 1)
+        for (_, last), (first, _) in zip(ranges, ranges[1:]):
+            self.assertEqual(first, last + 1)
+
+        self.assertEqual(split_ranges(100, 8), [(0, 99)])
+
+    def test_downloads_ranges_concurrently(self):
+        out = self.test_dir / "paper.pdf"
+
+        filename = download_segmented(self.url, out=str(out), connections=4)
+
+        self.assertEqual(Path(filename).read_bytes(), PAYLOAD)
+        ranged = [r for method, r in _Handler.requests if method == "GET" and r]
+        self.assertEqual(len(ranged), 3)
+
+    def test_falls_back_without_range_support(self):
+        _Handler.accept_ranges = False
+        out = self.test_dir / "paper.pdf"
+
+        filename = download_segmented(self.url, out=str(out), connections=4)
+
+        self.assertEqual(Path(filename).read_bytes(), PAYLOAD)
+        self.assertEqual(_Handler.requests[-1], ("GET", None))
+
+
+class TestResumableDownload(_LocalServerTestCase):
+    def _write_part(self, size, etag):
+        part = self.test_dir / ("paper.pdf" + PART_SUFFIX)
+        part.write_bytes(PAYLOAD[:size])
+        meta = {"url": self.url, "validator": etag}
+        Path(str(part) + ".json").write_text(json.dumps(meta))
+        return part
+
+    def test_resumes_from_part_file(self):
+        part = self._write_part(1000, ETAG)
+        out = self.test_dir / "paper.pdf"
+
+        filename = download_segmented(self.url, out=str(out), connections=4)
+
+        self.assertEqual(Path(filename).read_bytes(), PAYLOAD)
+        self.assertEqual(_Handler.requests, [("GET", "bytes=1000-")])
+        self.assertFalse(part.exists())
+        self.assertEqual(os.listdir(self.test_dir), ["paper.pdf"])
+
+    def test_restarts_when_resource_changed(self):
+        self._write_part(1000, '"v0"')
+        out = self.test_dir / "paper.pdf"
+
+        filename = download(self.url, out=str(out))
+
+        self.assertEqual(Path(filename).read_bytes(), PAYLOAD)
+        self.assertEqual(os.listdir(self.test_dir), ["paper.pdf"])
+
+    def test_misplaced_partial_content_is_refetched_whole(self):
+        self._write_part(1000, ETAG)
+        _Handler.range_shift = 512
+        out = self.test_dir / "paper.pdf"
+
+        filename = download(self.url, out=str(out))
+
+        self.assertEqual(Path(filename).read_bytes(), PAYLOAD)
+        self.assertEqual(_Handler.requests, [("GET", "bytes=1000-"), ("GET", None)])
+
+    def test_transfer_cut_off_is_resumed_in_the_same_run(self):
+        _Handler.drop_after = [len(PAYLOAD) - 1000]
+        out = self.test_dir / "paper.pdf"
+
+        filename = download(self.url, out=str(out))
+
+        self.assertEqual(Path(filename).read_bytes(), PAYLOAD)
+        self.assertEqual(len(_Handler.requests), 2)
+        self.assertEqual(_Handler.requests[0], ("GET", None))
+        resumed_at = int(re.fullmatch(r"bytes=(\d+)-", _Handler.requests[1][1])[1])
+        self.assertGreater(resumed_at, len(PAYLOAD) // 2)
+        self.assertEqual(os.listdir(self.test_dir), ["paper.pdf"])
+
+    @unittest.skipIf(httpx is None, "httpx is not installed")
+    def test_async_transfer_cut_off_is_resumed(self):
+        _Handler.drop_after = [len(PAYLOAD) - 1000]
+        out = self.test_dir / "paper.pdf"
+
+        async def run():
+            async with httpx.AsyncClient() as client:
+                return await download_async(client, self.url, out=str(out))
+
+        filename = asyncio.run(run())
+
+        self.assertEqual(Path(filename).read_bytes(), PAYLOAD)
+        self.assertEqual(len(_Handler.requests), 2)
+        self.assertTrue(_Handler.requests[1][1].startswith("bytes="))
+
+    def test_resumes_are_bounded(self):
+        _Handler.drop_after = [len(PAYLOAD) // 8] * (RESUME_ATTEMPTS + 1)
+        out = self.test_dir / "paper.pdf"
+
+        with self.assertRaises(requests.RequestException):
+            download(self.url, out=str(out))
+
+        self.assertEqual(len(_Handler.requests), RESUME_ATTEMPTS + 1)
+        # the part is kept for the next run
+        part = (self.test_dir / ("paper.pdf" + PART_SUFFIX)).read_bytes()
+        self.assertTrue(part and PAYLOAD.startswith(part))
+
+    def test_part_without_validator_is_not_resumed(self):
+        part = self.test_dir / ("paper.pdf" + PART_SUFFIX)
+        part.write_bytes(b"garbage")
+        out = self.test_dir / "paper.pdf"
+
+        filename = download(self.url, out=str(out))
+
+        self.assertEqual(Path(filename).read_bytes(), PAYLOAD)
+        self.assertEqual(_Handler.requests, [("GET", None)])
+
+
+class TestDownloadPdf(_LocalServerTestCase):
+    @patch("arxiv_dl.helpers.command_exists", return_value=False)
+    def test_downloads_paper_over_http(self, command_exists):
+        paper_data = PaperData(pdf_url=self.url, download_name="paper.pdf")
+
+        download_pdf(paper_data, self.test_dir, embed_metadata=False)
+
+        self.assertEqual((self.test_dir / "paper.pdf").read_bytes(), PAYLOAD)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,113 @@
+import shutil
+import tempfile
+import time
+import unittest
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+from arxiv_dl import scrapers
+from arxiv_dl.__main__ import download_paper
+from arxiv_dl.failure_cache import FailureCache
+from arxiv_dl.metadata_cache import MetadataCache
+from arxiv_dl.models import PaperData
+
+
+def _cvf_paper():
+    return PaperData(
+        paper_id="Xu_SUTD-TrafficQA",
+        src_website="CVF",
+        abs_url="https://openaccess.thecvf.com/content/CVPR2021/html/Xu_CVPR_2021_paper.html",
+    )
+
+
+class TestFailureCache(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = Path(tempfile.mkdtemp())
+        self.cache = FailureCache(self.test_dir, ttl=60)
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir, ignore_errors=True)
+
+    def test_put_get_and_expire(self):
+        self.cache.put(_cvf_paper(), "gone")
+
+        self.assertEqual(self.cache.get(_cvf_paper()).reason, "gone")
+        with patch("arxiv_dl.failure_cache.time.time", return_value=time.time() + 120):
+            self.assertIsNone(self.cache.get(_cvf_paper()))
+
+    def test_refresh_ignores_and_forgets_records(self):
+        self.cache.put(_cvf_paper(), "gone")
+
+        self.cache.configure(refresh=True)
+        self.assertIsNone(self.cache.get(_cvf_paper()))
+        self.cache.forget(_cvf_paper())
+        self.cache.configure(refresh=False)
+        self.assertIsNone(self.cache.get(_cvf_paper()))
+
+
+class TestScrapeWithFailureCache(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = Path(tempfile.mkdtemp())
+        self.cache = FailureCache(self.test_dir / "failures")
+        for patcher in (
+            patch.object(scrapers, "failure_cache", self.cache),
+            patch.object(scrapers, "metadata_cache", MetadataCache(max_size=0)),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir, ignore_errors=True)
+
+    @patch("arxiv_dl.scrapers.check_internet_connection")
+    @patch("arxiv_dl.scrapers.http_get")
+    def test_missing_page_is_skipped_in_later_runs(self, http_get, check_connection):
+        http_get.return_value = MagicMock(status_code=404)
+
+        self.assertIs(scrapers.scrape_metadata(_cvf_paper()), scrapers.NOT_FOUND)
+        self.assertIs(scrapers.scrape_metadata(_cvf_paper()), scrapers.NOT_FOUND)
+
+        self.assertEqual(http_get.call_count, 1)
+        check_connection.assert_not_called()
+        self.assertEqual(self.cache.skipped, {"CVF:Xu_SUTD-TrafficQA"})
+
+    @patch("arxiv_dl.scrapers.check_internet_connection", return_value=True)
+    @patch("arxiv_dl.scrapers.http_get")
+    def test_transient_failures_are_not_recorded(self, http_get, _):
+        http_get.return_value = MagicMock(status_code=503)
+
+        self.assertFalse(scrapers.scrape_metadata(_cvf_paper()))
+        self.assertFalse(scrapers.scrape_metadata(_cvf_paper()))
+
+        self.assertEqual(http_get.call_count, 2)
+        self.assertIsNone(self.cache.get(_cvf_paper()))
+
+    @patch("arxiv_dl.stages.download_pdf")
+    @patch("arxiv_dl.scrapers.http_get")
+    def test_missing_paper_is_not_downloaded(self, http_get, download_pdf):
+        http_get.return_value = MagicMock(status_code=404)
+        target = "https://openaccess.thecvf.com/content/CVPR2021/html/Xu_SUTD-TrafficQA_A_Question_Answering_Benchmark_and_an_Efficient_Network_for_CVPR_2021_paper.html"
+
+        for _ in range(2):
+            self.assertFalse(
+                download_paper(
+                    target,
+                    download_dir=self.test_dir / "papers",
+                    set_verbose_level="silent",
+                )
+            )
+
+        http_get.assert_called_once_with(target)
+        download_pdf.assert_not_called()
+        self.assertEqual(len(self.cache.skipped), 1)
+
+    def test_unknown_arxiv_id_is_not_found(self):
+        paper_data = PaperData(paper_id="2313.00001", src_website="ArXiv")
+        html = "<html><h1>Article identifier '2313.00001' not recognized</h1></html>"
+
+        with self.assertRaises(scrapers.PaperNotFound):
+            scrapers.parse_metadata_arxiv(paper_data, html)
+
+
+if __name__ == "__main__":
+    unittest.main()
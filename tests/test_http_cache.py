@@ -0,0 +1,231 @@
+import os
+import shutil
+import tempfile
+import time
+import unittest
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+from requests.structures import CaseInsensitiveDict
+
+from arxiv_dl import network, scrapers
+from arxiv_dl.http_cache import HttpCache
+from arxiv_dl.models import PaperData
+
+URL = "https://arxiv.org/abs/1512.03385"
+
+
+def _response(status_code, body=b"", headers=None):
+    response = MagicMock(status_code=status_code, content=body)
+    response.headers = CaseInsensitiveDict(headers or {})
+    return response
+
+
+class TestHttpCache(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = Path(tempfile.mkdtemp())
+        self.cache = HttpCache(self.test_dir, max_age=60, max_size=10_000)
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir, ignore_errors=True)
+
+    def test_store_and_load(self):
+        headers = {"ETag": '"v1"', "Content-Type": "text/html", "Set-Cookie": "x"}
+        self.cache.store(URL, CaseInsensitiveDict(headers), b"<html></html>")
+
+        entry = self.cache.load(URL)
+        self.assertEqual(entry.body, b"<html></html>")
+        self.assertEqual(entry.etag, '"v1"')
+        self.assertNotIn("set-cookie", entry.headers)
+        self.assertTrue(self.cache.is_fresh(entry))
+        self.assertIsNone(self.cache.load("https://arxiv.org/abs/other"))
+
+    def test_stale_entry_is_revalidated_with_validators(self):
+        headers = {"ETag": '"v1"', "Last-Modified": "Mon, 01 Jan 2024 00:00:00 GMT"}
+        entry = self.cache.store(URL, CaseInsensitiveDict(headers), b"page")
+        entry = entry._replace(stored=time.time() - 120)
+
+        self.assertFalse(self.cache.is_fresh(entry))
+        self.assertEqual(
+            self.cache.conditional_headers(entry),
+            {
+                "If-None-Match": '"v1"',
+                "If-Modified-Since": "Mon, 01 Jan 2024 00:00:00 GMT",
+            },
+        )
+        self.assertTrue(self.cache.is_fresh(self.cache.revalidated(entry)))
+
+    def test_no_store_is_honoured(self):
+        headers = CaseInsensitiveDict({"Cache-Control": "private, no-store"})
+
+        self.assertIsNone(self.cache.store(URL, headers, b"page"))
+        self.assertIsNone(self.cache.load(URL))
+
+    def test_least_recently_used_entries_are_evicted(self):
+        for i in range(4):
+            self.cache.store(f"{URL}/{i}", {}, b"x" * 2000)
+            path = self.cache._path(f"{URL}/{i}")
+            os.utime(path, (i, i))
+        # using the oldest entry makes the second one least recently used
+        self.assertIsNotNone(self.cache.load(f"{URL}/0"))
+
+        self.cache.store(f"{URL}/4", {}, b"x" * 3000)
+
+        self.assertIsNotNone(self.cache.load(f"{URL}/0"))
+        self.assertIsNone(self.cache.load(f"{URL}/1"))
+        self.assertIsNotNone(self.cache.load(f"{URL}/4"))
+        size = sum(p.stat().st_size for p in self.test_dir.iterdir())
+        self.assertLessEqual(size, 10_000)
+
+    def test_failed_write_leaves_no_file(self):
+        with self.assertRaises(TypeError):
+            self.cache.store(URL, {}, object())
+
+        self.assertEqual(list(self.test_dir.iterdir()), [])
+
+    def test_parsed_data_is_kept_with_the_body(self):
+        self.cache.store(URL, {}, b"page")
+        self.cache.save_parsed(URL, {"title": "Paper"})
+
+        entry = self.cache.load(URL)
+        self.assertEqual(entry.parsed, {"title": "Paper"})
+        # a new body drops what was parsed out of the old one
+        self.cache.store(URL, {}, b"new page")
+        self.assertIsNone(self.cache.load(URL).parsed)
+
+
+class TestCachedGet(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = Path(tempfile.mkdtemp())
+        self.cache = HttpCache(self.test_dir, max_age=60)
+        patcher = patch.object(network, "http_cache", self.cache)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.session = MagicMock()
+        network.set_session(self.session)
+
+    def tearDown(self):
+        network.set_session(None)
+        shutil.rmtree(self.test_dir, ignore_errors=True)
+
+    def test_fresh_page_is_served_without_request(self):
+        self.session.get.return_value = _response(200, b"page", {"ETag": '"v1"'})
+
+        network.http_get(URL)
+        second = network.http_get(URL)
+
+        self.assertEqual(self.session.get.call_count, 1)
+        self.assertTrue(second.from_cache)
+        self.assertEqual(second.text, "page")
+
+    def test_not_modified_page_is_served_from_cache(self):
+        self.cache.store(URL, {"etag": '"v1"'}, b"page")
+        self.cache.save_parsed(URL, {"title": "Paper"})
+        self.cache.max_age = 0
+        self.session.get.return_value = _response(304)
+
+        response = network.http_get(URL)
+
+        headers = self.session.get.call_args.kwargs["headers"]
+        self.assertEqual(headers, {"If-None-Match": '"v1"'})
+        self.assertTrue(response.from_cache)
+        self.assertEqual(response.content, b"page")
+        self.assertEqual(network.cached_parse(response), {"title": "Paper"})
+
+    def test_changed_page_replaces_cached_one(self):
+        self.cache.store(URL, {"etag": '"v1"'}, b"old")
+        self.cache.max_age = 0
+        self.session.get.return_value = _response(200, b"new", {"ETag": '"v2"'})
+
+        response = network.http_get(URL)
+        network.save_parse(response, {"title": "New"})
+
+        entry = self.cache.load(URL)
+        self.assertEqual(entry.body, b"new")
+        self.assertEqual(entry.etag, '"v2"')
+        self.assertEqual(entry.parsed, {"title": "New"})
+
+    def test_other_hosts_and_opt_out_are_not_cached(self):
+        self.session.get.return_value = _response(200, b"page")
+
+        network.http_get("https://example.com/a")
+        network.http_get(URL, cache=False)
+
+        self.assertEqual(list(self.test_dir.iterdir()), [])
+
+    def test_size_zero_disables_cache(self):
+        self.cache.max_size = 0
+        self.session.get.return_value = _response(200, b"page")
+
+        network.http_get(URL)
+        network.http_get(URL)
+
+        self.assertEqual(self.session.get.call_count, 2)
+
+    def test_unchanged_page_is_not_parsed_again(self):
+        calls = []
+
+        def parse_page(paper_data, html):
+            calls.append(html)
+            paper_data.title = "Paper"
+            return "https://arxiv.org/bibtex/1512.03385"
+
+        self.cache.store(URL, {"etag": '"v1"'}, b"page")
+        self.cache.max_age = 0
+        self.session.get.return_value = _response(304)
+
+        results = []
+        for _ in range(2):
+            paper_data = PaperData(paper_id="1512.03385", abs_url=URL)
+            response = network.http_get(URL)
+            results.append(scrapers._parse_page(paper_data, response, parse_page))
+            self.assertEqual(paper_data.title, "Paper")
+
+        self.assertEqual(calls, ["page"])
+        self.assertEqual(results[0], results[1])
+
+    def _parse_twice(self, between=lambda: None):
+        calls = []
+
+        def parse_page(paper_data, html):
+            calls.append(html)
+            paper_data.title = "Paper"
+
+        self.cache.store(URL, {"etag": '"v1"'}, b"page")
+        self.cache.max_age = 0
+        self.session.get.return_value = _response(304)
+        for i in range(2):
+            if i:
+                between()
+            paper_data = PaperData(paper_id="1512.03385", abs_url=URL)
+            scrapers._parse_page(paper_data, network.http_get(URL), parse_page)
+            self.assertEqual(paper_data.title, "Paper")
+        return calls
+
+    def test_parse_of_another_parser_version_is_not_reused(self):
+        def upgrade():
+            patcher = patch.object(
+                scrapers, "PARSER_VERSION", scrapers.PARSER_VERSION + 1
+            )
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        self.assertEqual(self._parse_twice(upgrade), ["page", "page"])
+
+    def test_parse_reuse_can_be_turned_off(self):
+        self.cache.configure(reuse_parsed=False)
+
+        self.assertEqual(self._parse_twice(), ["page", "page"])
+
+    def test_revalidated_page_drops_its_parse_when_not_reused(self):
+        self.cache.store(URL, {"etag": '"v1"'}, b"page")
+        self.cache.save_parsed(URL, {"title": "Paper"})
+        self.cache.configure(reuse_parsed=False)
+
+        self.cache.revalidated(self.cache.load(URL))
+
+        self.assertIsNone(self.cache.load(URL).parsed)
+
+
+if __name__ == "__main__":
+    unittest.main()
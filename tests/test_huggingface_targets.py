@@ -113,7 +113,7 @@ class TestHuggingFaceTargets(unittest.TestCase):
         )
         self.assertFalse(is_huggingface_paper_url("https://huggingface.co/papers"))
 
-    @patch("arxiv_dl.target_parser.requests.get")
+    @patch("arxiv_dl.target_parser.http_get")
     def test_extracts_unique_paper_urls_from_huggingface_listing_page(self, mock_get):
         mock_get.return_value = _Response("""
             <html>
@@ -145,7 +145,7 @@ class TestHuggingFaceTargets(unittest.TestCase):
             "https://huggingface.co/papers/date/2026-05-22", timeout=10
         )
 
-    @patch("arxiv_dl.target_parser.requests.get")
+    @patch("arxiv_dl.target_parser.http_get")
     def test_expand_target_expands_huggingface_month_page(self, mock_get):
         mock_get.return_value = _Response("""
             <a href="/papers/2605.12357">First paper</a>
@@ -153,14 +153,14 @@ class TestHuggingFaceTargets(unittest.TestCase):
             """)
 
         self.assertEqual(
-            expand_target("https://huggingface.co/papers/month/2026-05"),
+            list(expand_target("https://huggingface.co/papers/month/2026-05")),
             [
                 "https://huggingface.co/papers/2605.12357",
                 "https://huggingface.co/papers/2603.06408",
             ],
         )
 
-    @patch("arxiv_dl.target_parser.requests.get")
+    @patch("arxiv_dl.target_parser.http_get")
     def test_expand_target_expands_all_supported_huggingface_list_pages(self, mock_get):
         mock_get.return_value = _Response("""
             <a href="/papers/2605.12357">First paper</a>
@@ -178,7 +178,7 @@ class TestHuggingFaceTargets(unittest.TestCase):
         for target in targets:
             with self.subTest(target=target):
                 self.assertEqual(
-                    expand_target(target),
+                    list(expand_target(target)),
                     [
                         "https://huggingface.co/papers/2605.12357",
                         "https://huggingface.co/papers/2603.06408",
@@ -188,7 +188,19 @@ class TestHuggingFaceTargets(unittest.TestCase):
     def test_expand_target_leaves_single_paper_targets_unchanged(self):
         target = "https://huggingface.co/papers/2605.12357"
 
-        self.assertEqual(expand_target(target), [target])
+        self.assertEqual(list(expand_target(target)), [target])
+
+    @patch("arxiv_dl.target_parser.http_get")
+    def test_expand_target_is_lazy(self, mock_get):
+        mock_get.return_value = _Response("""
+            <a href="/papers/2605.12357">First paper</a>
+            """)
+
+        expanded = expand_target("https://huggingface.co/papers/month/2026-05")
+
+        mock_get.assert_not_called()
+        self.assertEqual(next(expanded), "https://huggingface.co/papers/2605.12357")
+        mock_get.assert_called_once()
 
 
 class TestHuggingFaceDownloadExpansion(unittest.TestCase):
@@ -200,8 +212,8 @@ class TestHuggingFaceDownloadExpansion(unittest.TestCase):
     def tearDown(self):
         shutil.rmtree(self.test_dir, ignore_errors=True)
 
-    @patch("arxiv_dl.__main__._download_single_paper")
-    @patch("arxiv_dl.__main__.expand_target")
+    @patch("arxiv_dl.__main__.download_single_paper")
+    @patch("arxiv_dl.stages.expand_target")
     def test_download_paper_downloads_each_expanded_target(
         self, mock_expand_target, mock_download_single_paper
     ):
@@ -227,8 +239,8 @@ class TestHuggingFaceDownloadExpansion(unittest.TestCase):
             expanded_targets,
         )
 
-    @patch("arxiv_dl.__main__._download_single_paper")
-    @patch("arxiv_dl.__main__.expand_target")
+    @patch("arxiv_dl.__main__.download_single_paper")
+    @patch("arxiv_dl.stages.expand_target")
     def test_download_paper_reports_failure_if_any_expanded_target_fails(
         self, mock_expand_target, mock_download_single_paper
     ):
@@ -246,6 +258,29 @@ class TestHuggingFaceDownloadExpansion(unittest.TestCase):
 
         self.assertFalse(success)
 
+    @patch("arxiv_dl.__main__.download_single_paper")
+    @patch("arxiv_dl.stages.expand_target")
+    def test_download_paper_starts_before_expansion_finishes(
+        self, mock_expand_target, mock_download_single_paper
+    ):
+        def expand(target):
+            yield "https://huggingface.co/papers/2605.12357"
+            yield "https://huggingface.co/papers/2603.06408"
+            raise Exception("connection reset")
+
+        mock_expand_target.side_effect = expand
+        mock_download_single_paper.return_value = True
+
+        success = download_paper(
+            "https://huggingface.co/papers/month/2026-05",
+            download_dir=self.test_dir,
+            set_verbose_level="silent",
+        )
+
+        # papers found before the failure are still downloaded
+        self.assertFalse(success)
+        self.assertEqual(mock_download_single_paper.call_count, 2)
+
 
 if __name__ == "__main__":
     unittest.main()
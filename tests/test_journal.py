@@ -0,0 +1,149 @@
+import os
+import shutil
+import time
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+import pymupdf
+
+from arxiv_dl.__main__ import download_papers
+from arxiv_dl import journal as journal_module
+from arxiv_dl.journal import Journal, prune_journals
+from arxiv_dl.models import PaperData
+
+
+class TestJournal(unittest.TestCase):
+    def setUp(self):
+        self.root_dir = Path(__file__).resolve().parent.parent
+        self.test_dir = self.root_dir / "tests" / "test_tmp_journal"
+        self.test_dir.mkdir(exist_ok=True)
+        self.journal_path = self.test_dir / "journal.jsonl"
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir, ignore_errors=True)
+
+    def test_records_survive_reopening(self):
+        paper_data = PaperData(paper_id="1512.03385", src_website="ArXiv", title="T")
+        with Journal(self.journal_path) as journal:
+            journal.record(paper_data, "resolved")
+            journal.record(paper_data, "scraped", paper_data=paper_data)
+            journal.record(paper_data, "downloaded")
+
+        with Journal(self.journal_path) as journal:
+            # any alias of the paper finds its records
+            target = "https://arxiv.org/abs/1512.03385v1"
+            self.assertTrue(journal.reached(target, "downloaded"))
+            self.assertFalse(journal.reached(target, "indexed"))
+            self.assertEqual(journal.paper_data(target).title, "T")
+            self.assertFalse(journal.reached("2103.15538", "resolved"))
+
+    def test_recorded_stage_never_goes_back(self):
+        paper_data = PaperData(paper_id="1512.03385", src_website="ArXiv", title="T")
+        with Journal(self.journal_path) as journal:
+            journal.record(paper_data, "downloaded")
+            journal.record(paper_data, "resolved")
+            journal.record(paper_data, "scraped", paper_data=paper_data)
+            self.assertTrue(journal.reached(paper_data, "downloaded"))
+
+        with Journal(self.journal_path) as journal:
+            self.assertTrue(journal.reached(paper_data, "downloaded"))
+            self.assertEqual(journal.paper_data("1512.03385").title, "T")
+
+    def test_stale_journals_are_pruned(self):
+        journal_dir = self.test_dir / "journals"
+        journal_dir.mkdir()
+        old_time = time.time() - journal_module.JOURNAL_MAX_AGE - 60
+        for i in range(journal_module.JOURNAL_MAX_COUNT + 2):
+            path = journal_dir / f"run-{i:02d}.jsonl"
+            path.touch()
+            os.utime(path, (time.time() - i, time.time() - i))
+        stale = journal_dir / "stale.jsonl"
+        stale.touch()
+        os.utime(stale, (old_time, old_time))
+
+        with patch.object(journal_module, "get_cache_dir", return_value=self.test_dir):
+            prune_journals()
+
+        remaining = sorted(p.name for p in journal_dir.iterdir())
+        self.assertEqual(len(remaining), journal_module.JOURNAL_MAX_COUNT)
+        self.assertNotIn("stale.jsonl", remaining)
+        self.assertIn("run-00.jsonl", remaining)
+
+    def test_truncated_line_is_ignored(self):
+        self.journal_path.write_text(
+            '{"key": "ArXiv:1512.03385", "stage": "scraped"}\n'
+            '{"key": "ArXiv:1512.03385", "sta'
+        )
+
+        with Journal(self.journal_path) as journal:
+            self.assertEqual(journal.n_papers, 1)
+            self.assertTrue(journal.reached("1512.03385", "scraped"))
+
+
+class TestResumeDownload(unittest.TestCase):
+    def setUp(self):
+        self.root_dir = Path(__file__).resolve().parent.parent
+        self.test_dir = self.root_dir / "tests" / "test_tmp_resume"
+        self.test_dir.mkdir(exist_ok=True)
+        self.journal_path = self.test_dir / "journal.jsonl"
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir, ignore_errors=True)
+
+    def _run(self, targets, **kwargs):
+        with Journal(self.journal_path) as journal:
+            return [
+                success
+                for _, _, success in download_papers(
+                    targets,
+                    download_dir=self.test_dir,
+                    set_verbose_level="silent",
+                    journal=journal,
+                    **kwargs,
+                )
+            ]
+
+    @patch("arxiv_dl.stages.store_pdf")
+    @patch("arxiv_dl.stages.download_pdf")
+    @patch("arxiv_dl.stages.scrape_metadata")
+    def test_resume_skips_completed_stages(self, mock_scrape, mock_download_pdf, _):
+        def scrape(paper_data):
+            paper_data.title = f"Paper {paper_data.paper_id}"
+            paper_data.download_name = f"{paper_data.paper_id}.pdf"
+            return True
+
+        def download(paper_data, download_dir, **kwargs):
+            doc = pymupdf.open()
+            doc.new_page()
+            doc.save(Path(download_dir) / paper_data.download_name)
+            doc.close()
+
+        mock_scrape.side_effect = scrape
+        mock_download_pdf.side_effect = download
+        targets = ["1512.03385", "2103.15538"]
+
+        self.assertEqual(self._run(targets), [True, True])
+        self.assertEqual(mock_scrape.call_count, 2)
+        self.assertEqual(mock_download_pdf.call_count, 2)
+
+        # a removed PDF is downloaded again; everything else is skipped
+        (self.test_dir / "2103.15538.pdf").unlink()
+        self.assertEqual(self._run(targets, jobs=2), [True, True])
+        self.assertEqual(mock_scrape.call_count, 2)
+        self.assertEqual(mock_download_pdf.call_count, 3)
+
+    @patch("arxiv_dl.stages.store_pdf")
+    @patch("arxiv_dl.stages.download_pdf")
+    @patch("arxiv_dl.stages.scrape_metadata")
+    def test_failed_scrape_is_not_recorded(self, mock_scrape, mock_download_pdf, _):
+        mock_scrape.return_value = False
+        mock_download_pdf.side_effect = Exception("offline")
+
+        self.assertEqual(self._run(["1512.03385"]), [False])
+        self.assertEqual(self._run(["1512.03385"]), [False])
+        self.assertEqual(mock_scrape.call_count, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
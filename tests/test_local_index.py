@@ -0,0 +1,74 @@
+import json
+import shutil
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from arxiv_dl.__main__ import download_paper
+from arxiv_dl.helpers import add_to_paper_list, find_local_paper
+from arxiv_dl.models import PaperData
+from arxiv_dl.target_parser import parse_target
+
+
+class TestFindLocalPaper(unittest.TestCase):
+    def setUp(self):
+        self.root_dir = Path(__file__).resolve().parent.parent
+        self.test_dir = self.root_dir / "tests" / "test_tmp_index"
+        self.test_dir.mkdir(exist_ok=True)
+        self.paper_data = PaperData(
+            paper_id="1512.03385",
+            src_website="ArXiv",
+            title="Deep Residual Learning for Image Recognition",
+            download_name="1512.03385_Deep_Residual_Learning.pdf",
+        )
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir, ignore_errors=True)
+
+    def test_finds_listed_paper_by_canonical_id(self):
+        add_to_paper_list(self.paper_data, download_dir=self.test_dir)
+        (self.test_dir / self.paper_data.download_name).write_bytes(b"%PDF")
+
+        found = find_local_paper(
+            parse_target("https://arxiv.org/pdf/1512.03385v2"), self.test_dir
+        )
+
+        self.assertEqual(found.title, self.paper_data.title)
+        self.assertIsNone(find_local_paper(parse_target("2103.15538"), self.test_dir))
+
+    def test_missing_pdf_is_not_a_hit(self):
+        add_to_paper_list(self.paper_data, download_dir=self.test_dir)
+
+        self.assertIsNone(find_local_paper(parse_target("1512.03385"), self.test_dir))
+
+    def test_index_follows_changes_on_disk(self):
+        self.assertIsNone(find_local_paper(parse_target("1512.03385"), self.test_dir))
+
+        paper_list = {"1512.03385": self.paper_data.dict()}
+        (self.test_dir / "000_Paper_List.json").write_text(json.dumps(paper_list))
+        (self.test_dir / self.paper_data.download_name).write_bytes(b"%PDF")
+
+        self.assertIsNotNone(
+            find_local_paper(parse_target("1512.03385"), self.test_dir)
+        )
+
+    @patch("arxiv_dl.stages.store_pdf")
+    @patch("arxiv_dl.stages.download_pdf")
+    @patch("arxiv_dl.stages.scrape_metadata")
+    def test_listed_paper_skips_scraping(self, mock_scrape, mock_download_pdf, _):
+        add_to_paper_list(self.paper_data, download_dir=self.test_dir)
+        (self.test_dir / self.paper_data.download_name).write_bytes(b"%PDF")
+
+        success = download_paper(
+            "https://alphaxiv.org/abs/1512.03385",
+            download_dir=self.test_dir,
+            set_verbose_level="silent",
+            pdf_only=True,
+        )
+
+        self.assertTrue(success)
+        mock_scrape.assert_not_called()
+
+
+if __name__ == "__main__":
+    unittest.main()
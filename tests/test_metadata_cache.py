@@ -0,0 +1,125 @@
+import shutil
+import tempfile
+import time
+import unittest
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+from arxiv_dl import scrapers
+from arxiv_dl.metadata_cache import MetadataCache
+from arxiv_dl.models import PaperData
+
+
+def _arxiv_paper(**fields):
+    return PaperData(
+        paper_id="1512.03385",
+        src_website="ArXiv",
+        abs_url="https://arxiv.org/abs/1512.03385",
+        **fields,
+    )
+
+
+class TestMetadataCache(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = Path(tempfile.mkdtemp())
+        self.cache = MetadataCache(self.test_dir)
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir, ignore_errors=True)
+
+    def test_put_and_get(self):
+        self.cache.put(_arxiv_paper(title="Deep Residual Learning", year=2015))
+
+        cached = self.cache.get(_arxiv_paper())
+        self.assertEqual(cached.title, "Deep Residual Learning")
+        self.assertEqual(cached.year, 2015)
+        other = PaperData(paper_id="1512.03385", src_website="CVF")
+        self.assertIsNone(self.cache.get(other))
+
+    def test_lifetime_depends_on_source(self):
+        cvf_paper = PaperData(paper_id="Xu_2023", src_website="CVF", title="CVF")
+        self.cache.put(_arxiv_paper(title="arXiv"))
+        self.cache.put(cvf_paper)
+
+        with patch(
+            "arxiv_dl.metadata_cache.time.time",
+            return_value=time.time() + 2 * 24 * 3600,
+        ):
+            self.assertIsNone(self.cache.get(_arxiv_paper()))
+            self.assertEqual(self.cache.get(cvf_paper).title, "CVF")
+
+    def test_refresh_and_disable(self):
+        self.cache.put(_arxiv_paper(title="Old"))
+
+        self.cache.configure(refresh=True)
+        self.assertIsNone(self.cache.get(_arxiv_paper()))
+        self.cache.put(_arxiv_paper(title="New"))
+        self.cache.configure(refresh=False)
+        self.assertEqual(self.cache.get(_arxiv_paper()).title, "New")
+
+        self.cache.configure(enabled=False)
+        self.assertIsNone(self.cache.get(_arxiv_paper()))
+
+    def test_corrupt_entry_is_ignored(self):
+        self.cache.write("ArXiv:1512.03385", b"not json")
+
+        self.assertIsNone(self.cache.get(_arxiv_paper()))
+
+
+class TestScrapeWithCache(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = Path(tempfile.mkdtemp())
+        patcher = patch.object(scrapers, "metadata_cache", MetadataCache(self.test_dir))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir, ignore_errors=True)
+
+    @patch("arxiv_dl.scrapers.scrape_metadata_arxiv")
+    def test_second_scrape_uses_cache(self, scrape_arxiv):
+        def scrape(paper_data):
+            paper_data.title = "Deep Residual Learning"
+            paper_data.authors = ["Kaiming He"]
+            return True
+
+        scrape_arxiv.side_effect = scrape
+
+        self.assertTrue(scrapers.scrape_metadata(_arxiv_paper()))
+        paper_data = _arxiv_paper()
+        self.assertTrue(scrapers.scrape_metadata(paper_data))
+
+        self.assertEqual(scrape_arxiv.call_count, 1)
+        self.assertEqual(paper_data.title, "Deep Residual Learning")
+        self.assertEqual(paper_data.authors, ["Kaiming He"])
+
+    @patch("arxiv_dl.scrapers.check_internet_connection", return_value=True)
+    @patch("arxiv_dl.scrapers.scrape_metadata_arxiv", side_effect=Exception("boom"))
+    def test_failed_scrape_is_not_cached(self, scrape_arxiv, connected):
+        self.assertFalse(scrapers.scrape_metadata(_arxiv_paper()))
+        self.assertFalse(scrapers.scrape_metadata(_arxiv_paper()))
+
+        self.assertEqual(scrape_arxiv.call_count, 2)
+
+    @patch("arxiv_dl.scrapers.http_get", return_value=MagicMock(status_code=503))
+    @patch("arxiv_dl.scrapers._parse_page")
+    @patch("arxiv_dl.scrapers._fetch_page")
+    def test_metadata_missing_its_bibtex_is_not_cached(self, fetch_page, parse_page, _):
+        iclr_paper = PaperData(
+            paper_id="2024-abc123",
+            src_website="ICLR",
+            paper_venue="ICLR",
+            abs_url="https://proceedings.iclr.cc/paper_files/paper/2024/hash/abc123-Abstract-Conference.html",
+        )
+        parse_page.return_value = f"{iclr_paper.abs_url}.bib"
+
+        for paper_data in (_arxiv_paper(), iclr_paper):
+            with self.subTest(paper_data.src_website):
+                self.assertTrue(scrapers.scrape_metadata(paper_data))
+                self.assertIsNone(scrapers.metadata_cache.get(paper_data))
+
+        self.assertEqual(fetch_page.call_count, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
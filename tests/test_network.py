@@ -0,0 +1,624 @@
+import argparse
+import asyncio
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+from email.utils import formatdate
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+import requests
+
+from arxiv_dl import network
+from arxiv_dl.__main__ import _host_limit_arg
+from arxiv_dl.network import (
+    BandwidthLimiter,
+    CircuitBreaker,
+    CircuitOpen,
+    Connectivity,
+    Deadline,
+    DeadlineExceeded,
+    EndpointSelector,
+    HostLimit,
+    HostLimiter,
+    NO_RETRY,
+    RetryPolicy,
+    TransferStalled,
+    deadline_scope,
+    iter_body,
+    parse_endpoint,
+    parse_host_limit,
+    parse_host_rate,
+    parse_rate,
+    parse_retry_after,
+)
+
+
+class TestHostLimiter(unittest.TestCase):
+    def test_limits_fall_back_to_parent_domain_and_default(self):
+        limiter = HostLimiter({"ecva.net": HostLimit(2, 1.0)})
+
+        self.assertEqual(limiter.get_limit("www.ecva.net"), HostLimit(2, 1.0))
+        self.assertEqual(limiter.get_limit("example.com"), limiter.default)
+
+    def test_configure_overrides_single_field(self):
+        limiter = HostLimiter({"arxiv.org": HostLimit(4, 4.0)})
+        limiter.configure("arxiv.org", requests_per_second=1.0)
+
+        self.assertEqual(limiter.get_limit("arxiv.org"), HostLimit(4, 1.0))
+
+    def test_concurrent_requests_are_capped_per_host(self):
+        limiter = HostLimiter({"arxiv.org": HostLimit(max_connections=2)})
+        lock = threading.Lock()
+        active = []
+        peak = []
+
+        def request(url):
+            with limiter.limit(url):
+                with lock:
+                    active.append(1)
+                    peak.append(len(active))
+                time.sleep(0.02)
+                with lock:
+                    active.pop()
+
+        threads = [
+            threading.Thread(target=request, args=("https://arxiv.org/abs/1",))
+            for _ in range(6)
+        ]
+        # another host is not affected by the arxiv.org cap
+        threads += [
+            threading.Thread(target=request, args=("https://example.com/",))
+            for _ in range(2)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertLessEqual(max(peak), 4)
+
+    def test_token_bucket_bounds_request_rate(self):
+        limiter = HostLimiter({"arxiv.org": HostLimit(8, requests_per_second=20.0)})
+
+        start = time.monotonic()
+        for _ in range(30):
+            with limiter.limit("https://arxiv.org/abs/1"):
+                pass
+        elapsed = time.monotonic() - start
+
+        # 20 tokens of burst, then 10 more at 20/s
+        self.assertGreaterEqual(elapsed, 0.45)
+
+    def test_async_limit_caps_concurrency(self):
+        limiter = HostLimiter({"arxiv.org": HostLimit(max_connections=3)})
+        active = []
+        peak = []
+
+        async def request():
+            async with limiter.limit_async("https://arxiv.org/abs/1"):
+                active.append(1)
+                peak.append(len(active))
+                await asyncio.sleep(0.01)
+                active.pop()
+
+        async def main():
+            await asyncio.gather(*(request() for _ in range(10)))
+
+        asyncio.run(main())
+
+        self.assertEqual(max(peak), 3)
+
+
+class TestParseHostLimit(unittest.TestCase):
+    def test_valid_specs(self):
+        self.assertEqual(parse_host_limit("arxiv.org=2:1.5"), ("arxiv.org", 2, 1.5))
+        self.assertEqual(parse_host_limit("*=16"), ("*", 16, None))
+
+    def test_invalid_specs(self):
+        for spec in ("arxiv.org", "=2", "arxiv.org=0", "arxiv.org=2:-1", "a=x"):
+            with self.subTest(spec=spec):
+                with self.assertRaises(ValueError):
+                    parse_host_limit(spec)
+
+    def test_cli_reports_the_expected_format(self):
+        for spec in ("a=x", "arxiv.org=2:fast"):
+            with self.subTest(spec=spec):
+                with self.assertRaises(argparse.ArgumentTypeError) as ctx:
+                    _host_limit_arg(spec)
+                self.assertIn("HOST=CONN[:RPS]", str(ctx.exception))
+                self.assertNotIn("invalid literal", str(ctx.exception))
+
+
+class TestBandwidthLimiter(unittest.TestCase):
+    def test_rate_is_shared_equally_by_active_transfers(self):
+        limiter = BandwidthLimiter()
+        limiter.configure(1000)
+        limiter.configure(300, host="thecvf.com")
+
+        with limiter.transfer("https://arxiv.org/pdf/1"):
+            self.assertEqual(limiter.share("https://arxiv.org/pdf/2"), 1000)
+            with limiter.transfer("https://openaccess.thecvf.com/a.pdf"):
+                with limiter.transfer("https://openaccess.thecvf.com/b.pdf"):
+                    self.assertEqual(limiter.share("https://arxiv.org/pdf/1"), 1000 / 3)
+                    self.assertEqual(
+                        limiter.share("https://openaccess.thecvf.com/a.pdf"), 150
+                    )
+        self.assertEqual(limiter._active, {})
+
+    def test_transfer_is_paced_to_its_share(self):
+        limiter = BandwidthLimiter()
+        limiter.configure(1000)
+
+        with limiter.transfer("https://arxiv.org/pdf/1") as transfer:
+            self.assertAlmostEqual(transfer.delay(500), 0.5, places=2)
+            self.assertAlmostEqual(transfer.delay(500), 1.0, places=2)
+            # lifting the cap applies to the running transfer
+            limiter.configure(None)
+            self.assertEqual(transfer.delay(500), 0.0)
+
+    @patch("arxiv_dl.network.time.sleep")
+    def test_body_is_throttled(self, sleep):
+        limiter = BandwidthLimiter()
+        limiter.configure(1024)
+        response = MagicMock(url="https://arxiv.org/pdf/1")
+        response.iter_content.return_value = [b"x" * 512] * 4
+
+        with patch.object(network, "bandwidth", limiter):
+            body = b"".join(iter_body(response))
+
+        self.assertEqual(len(body), 2048)
+        delays = [call.args[0] for call in sleep.call_args_list]
+        self.assertEqual(len(delays), 4)
+        self.assertAlmostEqual(delays[-1], 2.0, places=1)
+
+    def test_parse_rate(self):
+        self.assertEqual(parse_rate("500"), 500)
+        self.assertEqual(parse_rate("500K"), 500 * 1024)
+        self.assertEqual(parse_rate("1.5MiB"), 1.5 * 1024**2)
+        self.assertEqual(parse_host_rate("ArXiv.org=2m"), ("arxiv.org", 2 * 1024**2))
+        for spec in ("", "fast", "-1M"):
+            with self.subTest(spec=spec):
+                with self.assertRaises(ValueError):
+                    parse_rate(spec)
+        with self.assertRaises(ValueError):
+            parse_host_rate("arxiv.org")
+
+
+class TestSession(unittest.TestCase):
+    def tearDown(self):
+        network.set_session(None)
+
+    def test_session_is_shared_and_identifies_client(self):
+        session = network.get_session()
+
+        self.assertIs(network.get_session(), session)
+        self.assertTrue(session.headers["User-Agent"].startswith("arxiv-dl/"))
+        self.assertEqual(session.get_adapter("https://arxiv.org")._pool_maxsize, 10)
+
+    def test_injected_session_is_used(self):
+        session = MagicMock()
+        network.set_session(session)
+
+        network.http_get("https://example.com/a", timeout=3)
+        with network.http_stream("https://example.com/b"):
+            pass
+
+        session.get.assert_any_call("https://example.com/a", timeout=3)
+        session.get.assert_any_call(
+            "https://example.com/b", stream=True, timeout=(10.0, 30.0)
+        )
+
+    def test_configure_session_resizes_pool(self):
+        old_session = network.get_session()
+        try:
+            network.configure_session(40)
+            session = network.get_session()
+
+            self.assertIsNot(session, old_session)
+            self.assertEqual(session.get_adapter("https://arxiv.org")._pool_maxsize, 40)
+        finally:
+            network.configure_session(network.DEFAULT_POOL_SIZE)
+
+
+def _response(status_code, headers=None):
+    return MagicMock(status_code=status_code, headers=headers or {})
+
+
+@patch("arxiv_dl.network.time.sleep")
+class TestRetries(unittest.TestCase):
+    def setUp(self):
+        self.session = MagicMock()
+        network.set_session(self.session)
+        network.retry_stats.reset()
+
+    def tearDown(self):
+        network.set_session(None)
+        network.retry_stats.reset()
+
+    def test_transient_status_is_retried(self, sleep):
+        self.session.get.side_effect = [_response(503), _response(502), _response(200)]
+
+        response = network.http_get("https://example.com/a")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.session.get.call_count, 3)
+        self.assertEqual(sleep.call_count, 2)
+        self.assertEqual(network.retry_stats.retries, 2)
+        self.assertEqual(network.retry_stats.retried_requests, 1)
+
+    def test_permanent_status_is_not_retried(self, sleep):
+        self.session.get.return_value = _response(404)
+
+        response = network.http_get("https://example.com/a")
+
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(self.session.get.call_count, 1)
+        sleep.assert_not_called()
+
+    def test_retry_after_is_honoured(self, sleep):
+        self.session.get.side_effect = [
+            _response(429, {"Retry-After": "7"}),
+            _response(200),
+        ]
+
+        network.http_get("https://example.com/a")
+
+        self.assertGreaterEqual(sleep.call_args[0][0], 7)
+
+    def test_long_retry_after_fails_fast(self, sleep):
+        self.session.get.return_value = _response(503, {"Retry-After": "3600"})
+
+        response = network.http_get("https://example.com/a")
+
+        self.assertEqual(response.status_code, 503)
+        sleep.assert_not_called()
+        self.assertEqual(network.retry_stats.failed_requests, 1)
+
+    def test_gives_up_after_max_attempts(self, sleep):
+        self.session.get.side_effect = requests.ConnectionError("refused")
+        policy = RetryPolicy(max_attempts=3, base_delay=1.0, max_delay=1.5)
+
+        with self.assertRaises(requests.ConnectionError):
+            network.http_get("https://example.com/a", retry=policy)
+
+        self.assertEqual(self.session.get.call_count, 3)
+        # full jitter within the capped exponential backoff
+        for (delay,), _ in sleep.call_args_list:
+            self.assertLessEqual(delay, 1.5)
+
+    def test_programming_errors_are_not_retried(self, sleep):
+        self.session.get.side_effect = requests.exceptions.InvalidURL("bad")
+
+        with self.assertRaises(requests.exceptions.InvalidURL):
+            network.http_get("https://example.com/a")
+
+        self.assertEqual(self.session.get.call_count, 1)
+
+    def test_stream_is_reopened_after_transient_status(self, sleep):
+        self.session.get.side_effect = [_response(500), _response(200)]
+
+        with network.http_stream("https://example.com/b") as response:
+            self.assertEqual(response.status_code, 200)
+
+        self.assertEqual(self.session.get.call_count, 2)
+
+
+class TestTimeouts(unittest.TestCase):
+    def setUp(self):
+        self.session = MagicMock()
+        self.session.get.return_value = _response(200)
+        network.set_session(self.session)
+
+    def tearDown(self):
+        network.set_session(None)
+        network.configure_timeouts(*network.DEFAULT_TIMEOUTS)
+
+    def test_configured_timeouts_apply_by_default(self):
+        network.configure_timeouts(connect=2, read=5)
+
+        network.http_get("https://example.com/a")
+
+        self.session.get.assert_called_once_with(
+            "https://example.com/a", timeout=(2, 5)
+        )
+
+    def test_deadline_clips_timeouts(self):
+        with deadline_scope(Deadline(1.0)):
+            network.http_get("https://example.com/a")
+
+        connect, read = self.session.get.call_args.kwargs["timeout"]
+        self.assertLessEqual(connect, 1.0)
+        self.assertLessEqual(read, 1.0)
+
+    def test_expired_deadline_cancels_requests(self):
+        deadline = Deadline(0.01)
+        with deadline_scope(deadline):
+            time.sleep(0.02)
+            with self.assertRaises(DeadlineExceeded):
+                network.http_get("https://example.com/a")
+
+        self.session.get.assert_not_called()
+        # outside the scope requests are not bounded
+        network.http_get("https://example.com/a")
+        self.session.get.assert_called_once()
+
+    @patch("arxiv_dl.network.time.sleep")
+    def test_no_retry_past_the_deadline(self, sleep):
+        self.session.get.return_value = _response(503, {"Retry-After": "5"})
+
+        with deadline_scope(Deadline(1.0)):
+            response = network.http_get("https://example.com/a")
+
+        self.assertEqual(response.status_code, 503)
+        sleep.assert_not_called()
+
+    def test_stalled_body_is_dropped(self):
+        network.configure_timeouts(stall=0.05)
+
+        def trickle(chunk_size):
+            while True:
+                time.sleep(0.02)
+                yield b"x"
+
+        response = MagicMock()
+        response.iter_content.side_effect = trickle
+
+        with self.assertRaises(TransferStalled):
+            for _ in iter_body(response):
+                pass
+
+
+class TestCircuitBreaker(unittest.TestCase):
+    def setUp(self):
+        self.session = MagicMock()
+        self.session.get.side_effect = requests.ConnectionError("down")
+        network.set_session(self.session)
+        self.breaker = CircuitBreaker(max_failures=3, cooldown=60)
+        patcher = patch.object(network, "circuit_breaker", self.breaker)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        network.set_session(None)
+
+    def _get(self, url="https://openaccess.thecvf.com/a"):
+        return network.http_get(url, retry=NO_RETRY)
+
+    def test_failing_host_fails_fast(self):
+        for _ in range(3):
+            with self.assertRaises(requests.ConnectionError):
+                self._get()
+
+        with self.assertRaises(CircuitOpen):
+            self._get()
+        self.assertEqual(self.session.get.call_count, 3)
+        # other hosts are not affected
+        with self.assertRaises(requests.ConnectionError):
+            self._get("https://arxiv.org/abs/1")
+
+    def test_any_response_resets_failures(self):
+        self.session.get.side_effect = [
+            requests.ConnectionError("down"),
+            requests.ConnectionError("down"),
+            _response(404),
+            requests.ConnectionError("down"),
+            requests.ConnectionError("down"),
+            _response(200),
+        ]
+
+        for _ in range(6):
+            try:
+                self._get()
+            except requests.ConnectionError:
+                pass
+        self.assertEqual(self.session.get.call_count, 6)
+
+    def test_one_trial_after_cooldown(self):
+        self.breaker.cooldown = 0
+        for _ in range(3):
+            with self.assertRaises(requests.ConnectionError):
+                self._get()
+
+        # the trial fails and reopens the circuit at once
+        with self.assertRaises(requests.ConnectionError):
+            self._get()
+        self.assertEqual(self.session.get.call_count, 4)
+
+        self.session.get.side_effect = None
+        self.session.get.return_value = _response(200)
+        self.assertEqual(self._get().status_code, 200)
+        self.assertEqual(self._get().status_code, 200)
+
+    def test_trial_blocks_other_requests(self):
+        self.breaker.record("https://ecva.net/a", ok=False)
+        self.breaker.record("https://ecva.net/a", ok=False)
+        self.breaker.record("https://ecva.net/a", ok=False)
+        self.breaker.cooldown = 0.05
+        time.sleep(0.06)
+
+        self.breaker.check("https://ecva.net/a")
+        with self.assertRaises(CircuitOpen):
+            self.breaker.check("https://ecva.net/b")
+
+
+class TestConnectivity(unittest.TestCase):
+    @patch("arxiv_dl.network._probe_connectivity", return_value=False)
+    def test_probe_result_is_cached(self, probe):
+        connectivity = Connectivity(ttl=60)
+
+        self.assertFalse(connectivity.is_online())
+        self.assertFalse(connectivity.is_online())
+        self.assertEqual(probe.call_count, 1)
+
+        connectivity.set_online()
+        self.assertTrue(connectivity.is_online())
+        self.assertEqual(probe.call_count, 1)
+
+    @patch("arxiv_dl.network._probe_connectivity", return_value=True)
+    def test_successful_request_skips_probe(self, probe):
+        breaker = CircuitBreaker()
+        with patch.object(network, "connectivity", Connectivity(ttl=60)) as state:
+            breaker.record("https://arxiv.org/abs/1", ok=True)
+            self.assertTrue(state.is_online())
+        probe.assert_not_called()
+
+
+class TestEndpointSelector(unittest.TestCase):
+    ENDPOINTS = {"arxiv.org": ("https://arxiv.org", "https://export.arxiv.org")}
+
+    def setUp(self):
+        self.tmp_dir = Path(tempfile.mkdtemp())
+        self.cache_path = self.tmp_dir / "endpoints.json"
+        self.latencies = {"https://arxiv.org": 0.5, "https://export.arxiv.org": 0.1}
+        self.probed = []
+
+        def probe(endpoint):
+            self.probed.append(endpoint)
+            return self.latencies[endpoint]
+
+        patcher = patch("arxiv_dl.network._probe_endpoint", side_effect=probe)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def _selector(self):
+        return EndpointSelector(self.ENDPOINTS, cache_path=self.cache_path)
+
+    def test_fastest_endpoint_is_used(self):
+        selector = self._selector()
+
+        self.assertEqual(
+            selector.resolve("https://arxiv.org/abs/1512.03385"),
+            "https://export.arxiv.org/abs/1512.03385",
+        )
+        self.assertEqual(
+            selector.resolve("https://example.com/paper.pdf"),
+            "https://example.com/paper.pdf",
+        )
+        self.assertEqual(len(self.probed), 2)
+
+    def test_ranking_is_cached_across_runs(self):
+        self._selector().resolve("https://arxiv.org/abs/1")
+        self.probed.clear()
+
+        url = self._selector().resolve("https://arxiv.org/abs/1")
+
+        self.assertEqual(url, "https://export.arxiv.org/abs/1")
+        self.assertEqual(self.probed, [])
+
+    def test_unreachable_endpoints_are_not_cached(self):
+        self.latencies = dict.fromkeys(self.latencies)
+
+        url = self._selector().resolve("https://arxiv.org/abs/1")
+
+        self.assertEqual(url, "https://arxiv.org/abs/1")
+        self.assertFalse(self.cache_path.exists())
+
+    def test_fails_over_after_repeated_errors(self):
+        selector = self._selector()
+        url = selector.resolve("https://arxiv.org/abs/1")
+
+        selector.report(url, ok=False)
+        self.assertEqual(selector.resolve("https://arxiv.org/abs/1"), url)
+        selector.report(url, ok=False)
+
+        self.assertEqual(
+            selector.resolve("https://arxiv.org/abs/1"), "https://arxiv.org/abs/1"
+        )
+
+    @patch("arxiv_dl.network.time.sleep")
+    def test_retries_fail_over(self, sleep):
+        session = MagicMock()
+        session.get.side_effect = [_response(503), _response(503), _response(200)]
+        network.set_session(session)
+        self.addCleanup(network.set_session, None)
+
+        with patch.object(network, "endpoints", self._selector()):
+            network.http_get("https://arxiv.org/abs/1", cache=False)
+
+        urls = [call.args[0] for call in session.get.call_args_list]
+        self.assertEqual(
+            urls,
+            [
+                "https://export.arxiv.org/abs/1",
+                "https://export.arxiv.org/abs/1",
+                "https://arxiv.org/abs/1",
+            ],
+        )
+
+    def test_parse_endpoint(self):
+        self.assertEqual(
+            parse_endpoint("arxiv.org=https://mirror.example.org/"),
+            ("arxiv.org", "https://mirror.example.org"),
+        )
+        for spec in ("arxiv.org", "arxiv.org=mirror.example.org", "=https://a.b"):
+            with self.subTest(spec=spec):
+                with self.assertRaises(ValueError):
+                    parse_endpoint(spec)
+
+
+class TestHttp2(unittest.TestCase):
+    def setUp(self):
+        self.session = MagicMock()
+        self.client = MagicMock()
+        self.client.get.return_value = _response(200)
+        network.set_session(self.session)
+        with patch("arxiv_dl.network.http2_available", return_value=True):
+            network.configure_http2(True)
+        network.set_http2_client(self.client)
+
+    def tearDown(self):
+        network.set_http2_client(None)
+        network.configure_http2(False)
+        network.set_session(None)
+
+    def test_pages_are_fetched_over_http2(self):
+        response = network.http_get("https://example.com/a", timeout=(3, 5))
+
+        self.assertIs(response, self.client.get.return_value)
+        self.client.get.assert_called_once()
+        timeout = self.client.get.call_args.kwargs["timeout"]
+        self.assertEqual((timeout.connect, timeout.read), (3, 5))
+        self.session.get.assert_not_called()
+
+    def test_pdf_streams_keep_their_own_connections(self):
+        with network.http_stream("https://example.com/paper.pdf"):
+            pass
+
+        self.session.get.assert_called_once()
+        self.client.get.assert_not_called()
+
+    def test_disabling_falls_back_to_session(self):
+        network.configure_http2(False)
+
+        network.http_get("https://example.com/a")
+
+        self.session.get.assert_called_once()
+        self.client.get.assert_not_called()
+
+    def test_missing_dependency_is_reported(self):
+        with patch("arxiv_dl.network.http2_available", return_value=False):
+            with self.assertRaises(ImportError):
+                network.configure_http2(True)
+
+
+class TestParseRetryAfter(unittest.TestCase):
+    def test_delay_seconds(self):
+        self.assertEqual(parse_retry_after("120"), 120.0)
+
+    def test_http_date(self):
+        delay = parse_retry_after(formatdate(time.time() + 30, usegmt=True))
+        self.assertAlmostEqual(delay, 30, delta=2)
+
+    def test_invalid(self):
+        self.assertIsNone(parse_retry_after(None))
+        self.assertIsNone(parse_retry_after("soon"))
+
+
+if __name__ == "__main__":
+    unittest.main()
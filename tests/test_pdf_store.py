@@ -0,0 +1,206 @@
+import os
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+import pymupdf
+
+from arxiv_dl import helpers, pdf_store
+from arxiv_dl.helpers import download_pdf
+from arxiv_dl.pdf_store import PdfStore, file_sha256, link_file
+from arxiv_dl.scrapers import parse_metadata_arxiv
+from arxiv_dl.target_parser import process_arxiv_target
+
+# The parts of an arXiv abstract page the metadata is scraped from.
+ARXIV_ABS_PAGE = """
+<h1 class="title mathjax"><span class="descriptor">Title:</span>Deep Residual Learning for Image Recognition</h1>
+<div class="authors"><span class="descriptor">Authors:</span><a href="https://arxiv.org/a/he_k_1">Kaiming He</a>, <a href="https://arxiv.org/a/zhang_x_1">Xiangyu Zhang</a></div>
+<blockquote class="abstract mathjax"><span class="descriptor">Abstract:</span>Deeper neural networks are more difficult to train.</blockquote>
+<table summary="Additional metadata">
+<tr><td class="tablecell label">Cite as:</td><td class="tablecell arxivid"><span class="arxivid"><a href="https://arxiv.org/abs/1512.03385">arXiv:1512.03385</a> [cs.CV]</span></td></tr>
+<tr><td class="tablecell label">&nbsp;</td><td class="tablecell arxividv">(or <span class="arxivid"><a href="https://arxiv.org/abs/1512.03385v{version}">arXiv:1512.03385v{version}</a> [cs.CV]</span> for this version)</td></tr>
+</table>
+<div class="submission-history"><h2>Submission history</h2><strong>[v{version}]</strong> Thu, 10 Dec 2015 19:51:55 UTC (494 KB)<br/></div>
+"""
+
+
+def _arxiv_paper(version: int = 3, html: str = ARXIV_ABS_PAGE):
+    paper_data = process_arxiv_target("https://arxiv.org/abs/1512.03385")
+    parse_metadata_arxiv(paper_data, html.replace("{version}", str(version)))
+    return paper_data
+
+
+def _write_pdf(path: Path) -> None:
+    doc = pymupdf.open()
+    doc.new_page()
+    doc.save(path)
+    doc.close()
+
+
+class TestPdfStore(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = Path(tempfile.mkdtemp())
+        self.store = PdfStore(self.test_dir / "pdfs", link_mode="hardlink")
+        self.project_a = self.test_dir / "a"
+        self.project_b = self.test_dir / "b"
+        self.project_a.mkdir()
+        self.project_b.mkdir()
+        self.pdf_a = self.project_a / _arxiv_paper().download_name
+        self.pdf_b = self.project_b / _arxiv_paper().download_name
+        _write_pdf(self.pdf_a)
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir, ignore_errors=True)
+
+    def test_stored_pdf_is_linked_into_another_directory(self):
+        self.store.add(_arxiv_paper(), self.pdf_a)
+
+        self.assertEqual(self.store.materialize(_arxiv_paper(), self.pdf_b), "hardlink")
+        self.assertTrue(os.path.samefile(self.pdf_a, self.pdf_b))
+
+    def test_identical_pdfs_are_stored_once(self):
+        self.store.add(_arxiv_paper(), self.pdf_a)
+        shutil.copyfile(self.pdf_a, self.pdf_b)
+        other = _arxiv_paper().model_copy(update={"paper_id": "1512.03386"})
+        self.store.add(other, self.pdf_b)
+
+        objects = list((self.test_dir / "pdfs" / "objects").rglob("*.pdf"))
+        self.assertEqual(len(objects), 1)
+
+    def test_new_version_is_not_served_from_the_store(self):
+        self.store.add(_arxiv_paper(version=3), self.pdf_a)
+
+        self.assertIsNone(self.store.materialize(_arxiv_paper(version=4), self.pdf_b))
+        self.assertFalse(self.pdf_b.exists())
+
+    def test_arxiv_paper_of_unknown_version_is_not_stored(self):
+        history = ARXIV_ABS_PAGE[: ARXIV_ABS_PAGE.index("<table")]
+        self.store.add(_arxiv_paper(html=history), self.pdf_a)
+
+        self.assertIsNone(self.store.lookup(_arxiv_paper(html=history)))
+        self.assertFalse((self.test_dir / "pdfs" / "objects").exists())
+
+    def test_auto_mode_never_hardlinks(self):
+        self.store.add(_arxiv_paper(), self.pdf_a)
+        self.store.configure(link_mode="auto")
+
+        self.assertIn(
+            self.store.materialize(_arxiv_paper(), self.pdf_b), ("reflink", "copy")
+        )
+        self.assertEqual(self.pdf_b.stat().st_nlink, 1)
+
+    def test_replaced_version_is_collected(self):
+        self.store.add(_arxiv_paper(version=3), self.pdf_a)
+        old_object = self.store.lookup(_arxiv_paper(version=3))[1]
+        with self.pdf_a.open("ab") as f:
+            f.write(b"% v4\n")
+        self.store.add(_arxiv_paper(version=4), self.pdf_a)
+
+        # still within the grace period
+        self.assertEqual(self.store.collect_garbage(), 0)
+        with patch.object(pdf_store, "GC_GRACE_PERIOD", 0.0):
+            self.assertEqual(self.store.collect_garbage(), 1)
+        self.assertFalse(old_object.exists())
+        self.assertIsNotNone(
+            self.store.materialize(_arxiv_paper(version=4), self.pdf_b)
+        )
+
+    def test_evicted_records_have_their_pdfs_collected(self):
+        self.store.add(_arxiv_paper(), self.pdf_a)
+        evicted_object = self.store.lookup(_arxiv_paper())[1]
+        for record in self.store.index.directory.iterdir():
+            os.utime(record, (0, 0))
+        self.store.index.max_size = self.store.index._scan_size() * 3 // 2
+        other = _arxiv_paper().model_copy(update={"paper_id": "1512.03386"})
+        _write_pdf(self.pdf_b)
+        with self.pdf_b.open("ab") as f:
+            f.write(b"% other\n")
+
+        with patch.object(pdf_store, "GC_GRACE_PERIOD", 0.0):
+            self.store.add(other, self.pdf_b)
+
+        self.assertIsNone(self.store.lookup(_arxiv_paper()))
+        self.assertFalse(evicted_object.exists())
+        self.assertIsNotNone(self.store.lookup(other))
+
+    def test_least_recently_used_papers_are_evicted_past_the_cap(self):
+        self.store.add(_arxiv_paper(), self.pdf_a)
+        evicted_object = self.store.lookup(_arxiv_paper())[1]
+        for record in self.store.index.directory.iterdir():
+            os.utime(record, (0, 0))
+        self.store.configure(max_size=self.pdf_a.stat().st_size * 3 // 2)
+        other = _arxiv_paper().model_copy(update={"paper_id": "1512.03386"})
+        _write_pdf(self.pdf_b)
+        with self.pdf_b.open("ab") as f:
+            f.write(b"% other\n")
+
+        self.store.add(other, self.pdf_b)
+
+        self.assertIsNone(self.store.lookup(_arxiv_paper()))
+        self.assertFalse(evicted_object.exists())
+        self.assertIsNotNone(self.store.lookup(other))
+
+    def test_store_capped_at_zero_is_not_used(self):
+        self.store.configure(max_size=0)
+        self.store.add(_arxiv_paper(), self.pdf_a)
+
+        self.assertFalse((self.test_dir / "pdfs").exists())
+        self.assertIsNone(self.store.materialize(_arxiv_paper(), self.pdf_b))
+
+    def test_pdf_changed_through_a_hardlink_is_dropped(self):
+        self.store.add(_arxiv_paper(), self.pdf_a)
+        with self.pdf_a.open("ab") as f:
+            f.write(b"% annotated\n")
+
+        self.assertIsNone(self.store.materialize(_arxiv_paper(), self.pdf_b))
+        self.assertIsNone(self.store.lookup(_arxiv_paper()))
+
+    def test_disabled_store_is_not_used(self):
+        self.store.add(_arxiv_paper(), self.pdf_a)
+        self.store.configure(enabled=False)
+
+        self.assertIsNone(self.store.materialize(_arxiv_paper(), self.pdf_b))
+
+    def test_unsupported_link_falls_back_to_copy(self):
+        failing = {
+            "reflink": self._fail,
+            "hardlink": self._fail,
+            "copy": shutil.copyfile,
+        }
+        with patch.dict(pdf_store._LINKERS, failing):
+            mode = link_file(self.pdf_a, self.pdf_b, ("reflink", "hardlink", "copy"))
+
+        self.assertEqual(mode, "copy")
+        self.assertFalse(os.path.samefile(self.pdf_a, self.pdf_b))
+        self.assertEqual(file_sha256(self.pdf_a), file_sha256(self.pdf_b))
+        self.assertEqual(
+            sorted(p.name for p in self.project_b.iterdir()), [self.pdf_b.name]
+        )
+
+    @staticmethod
+    def _fail(src, dst):
+        raise OSError("not supported")
+
+    def test_download_uses_the_store_and_keeps_it_intact(self):
+        self.store.add(_arxiv_paper(), self.pdf_a)
+        stored_sha256 = file_sha256(self.pdf_a)
+
+        with patch.object(helpers, "pdf_store", self.store):
+            with patch.object(helpers, "http_download") as http_download:
+                with patch.object(helpers, "aria2_download") as aria2_download:
+                    download_pdf(_arxiv_paper(), self.project_b)
+
+        http_download.assert_not_called()
+        aria2_download.assert_not_called()
+        # the metadata was embedded in a copy of its own
+        self.assertEqual(self.pdf_b.stat().st_nlink, 1)
+        with pymupdf.open(self.pdf_b) as doc:
+            self.assertEqual(doc.metadata["title"], _arxiv_paper().title)
+        self.assertEqual(file_sha256(self.pdf_a), stored_sha256)
+        self.assertIsNotNone(self.store.lookup(_arxiv_paper()))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,6 +1,7 @@
 import unittest
 from unittest.mock import patch
 
+from arxiv_dl.metadata_cache import MetadataCache
 from arxiv_dl.models import PaperData
 from arxiv_dl.scrapers import scrape_metadata
 from arxiv_dl.target_parser import (
@@ -156,8 +157,9 @@ class TestProcessICLRTarget(unittest.TestCase):
             raise AssertionError(f"Unexpected request: {url}")
 
         paper_data = process_iclr_target(abs_url)
-        with patch("arxiv_dl.scrapers.requests.get", side_effect=fake_get):
-            scrape_metadata(paper_data)
+        with patch("arxiv_dl.scrapers.http_get", side_effect=fake_get):
+            with patch("arxiv_dl.scrapers.metadata_cache", MetadataCache(max_size=0)):
+                scrape_metadata(paper_data)
 
         self.assertEqual(
             paper_data.title,
@@ -295,7 +295,7 @@ class TestProcessNIPSTarget(unittest.TestCase):
 
         paper_data = process_nips_target(abs_url)
 
-        with patch("arxiv_dl.scrapers.requests.get", side_effect=fake_get):
+        with patch("arxiv_dl.scrapers.http_get", side_effect=fake_get):
             scrape_metadata_nips(paper_data)
 
         self.assertEqual(
@@ -0,0 +1,155 @@
+import io
+import shutil
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from arxiv_dl.target_parser import (
+    canonical_target_key,
+    classify_target,
+    process_alphaxiv_target,
+    process_arxiv_target,
+    process_cvf_target,
+    process_huggingface_target,
+    process_iclr_target,
+    process_nips_target,
+    read_targets,
+    unique_targets,
+)
+
+
+class TestCanonicalTargetKey(unittest.TestCase):
+    def test_aliases_share_a_key(self):
+        targets = [
+            "1512.03385",
+            " https://arxiv.org/abs/1512.03385v2 ",
+            "https://arxiv.org/pdf/1512.03385.pdf",
+            "https://alphaxiv.org/abs/1512.03385",
+            "https://huggingface.co/papers/1512.03385",
+        ]
+
+        keys = {canonical_target_key(target) for target in targets}
+
+        self.assertEqual(keys, {"ArXiv:1512.03385"})
+
+    def test_unknown_targets_are_keyed_by_text(self):
+        self.assertEqual(canonical_target_key(" not-a-paper "), "not-a-paper")
+        self.assertEqual(
+            canonical_target_key("https://huggingface.co/papers"),
+            "https://huggingface.co/papers",
+        )
+
+
+class TestClassifyTarget(unittest.TestCase):
+    def test_dispatches_on_host(self):
+        cases = [
+            ("1512.03385", "ArXiv", process_arxiv_target),
+            ("hep-th/9901001", "ArXiv", process_arxiv_target),
+            ("arXiv:1512.03385", "ArXiv", process_arxiv_target),
+            ("https://export.arxiv.org/abs/1512.03385", "ArXiv", process_arxiv_target),
+            ("www.alphaxiv.org/abs/1512.03385", "ArXiv", process_alphaxiv_target),
+            (
+                "https://huggingface.co/papers/1512.03385",
+                "ArXiv",
+                process_huggingface_target,
+            ),
+            (
+                "https://openaccess.thecvf.com/content/CVPR2021/html/A_CVPR_2021_paper.html",
+                "CVF",
+                process_cvf_target,
+            ),
+            (
+                "https://papers.nips.cc/paper/2020/hash/1457c0d6bfcb4967418bfb8ac142f64a-Abstract.html",
+                "NeurIPS",
+                process_nips_target,
+            ),
+        ]
+
+        for target, src_website, process in cases:
+            with self.subTest(target=target):
+                info = classify_target(target)
+                self.assertEqual(info.kind, "paper")
+                self.assertEqual(info.src_website, src_website)
+                self.assertIs(info.process, process)
+
+    def test_listings_and_unknown_targets(self):
+        self.assertEqual(
+            classify_target("https://huggingface.co/papers").kind, "listing"
+        )
+        for target in (
+            "not-a-paper",
+            "https://example.com/paper.html",
+            "https://www.alphaxiv.org/about",
+            "https://huggingface.co.example.com/papers/1512.03385",
+            "https://evil.test/openaccess.thecvf.com/content/CVPR2021/html/A.html",
+            "https://[broken",
+        ):
+            with self.subTest(target=target):
+                self.assertEqual(classify_target(target).kind, "unknown")
+                self.assertIsNone(classify_target(target).process)
+
+    def test_iclr_is_classified_without_processing(self):
+        paper_id = "0123456789abcdef0123456789abcdef"
+        base_url = "https://proceedings.iclr.cc/paper_files/paper/2026"
+        with patch("arxiv_dl.target_parser._process_proceedings_target") as process:
+            info = classify_target(
+                f"{base_url}/hash/{paper_id}-Abstract-Conference.html"
+            )
+            unknown = classify_target(f"{base_url}/file/{paper_id}-Paper.pdf")
+
+        process.assert_not_called()
+        self.assertEqual(info.src_website, "ICLR")
+        self.assertIs(info.process, process_iclr_target)
+        self.assertEqual(unknown.kind, "unknown")
+
+
+class TestReadTargets(unittest.TestCase):
+    def setUp(self):
+        self.root_dir = Path(__file__).resolve().parent.parent
+        self.test_dir = self.root_dir / "tests" / "test_tmp_input"
+        self.test_dir.mkdir(exist_ok=True)
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir, ignore_errors=True)
+
+    def test_skips_blank_and_comment_lines(self):
+        input_file = self.test_dir / "ids.txt"
+        input_file.write_text("# papers\n1512.03385\n\n  2103.15538  \n")
+
+        self.assertEqual(list(read_targets(input_file)), ["1512.03385", "2103.15538"])
+
+    def test_reads_lazily_from_stream(self):
+        stream = io.StringIO("1512.03385\n2103.15538\n")
+
+        targets = read_targets(stream)
+
+        self.assertEqual(next(targets), "1512.03385")
+        self.assertEqual(stream.readline(), "2103.15538\n")
+
+
+class TestUniqueTargets(unittest.TestCase):
+    def test_drops_duplicates_in_order(self):
+        targets = [
+            "2103.15538",
+            "1512.03385",
+            "https://arxiv.org/abs/1512.03385",
+            "2103.15538",
+            "not-a-paper",
+            "not-a-paper",
+        ]
+
+        self.assertEqual(
+            list(unique_targets(targets)),
+            ["2103.15538", "1512.03385", "not-a-paper"],
+        )
+
+    def test_is_lazy(self):
+        def targets():
+            yield "1512.03385"
+            raise AssertionError("read past the first target")
+
+        self.assertEqual(next(unique_targets(targets())), "1512.03385")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,79 @@
+import json
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from arxiv_dl import updater
+
+
+class TestCheckUpdate(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = Path(tempfile.mkdtemp())
+        self.cache_path = self.test_dir / updater.UPDATE_CHECK_NAME
+        for target, value in (
+            ("_update_check_path", self.cache_path),
+            ("check_current_version", "1.0.0"),
+        ):
+            patcher = patch.object(updater, target, return_value=value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        patcher = patch.object(updater.console, "print")
+        self.print = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir, ignore_errors=True)
+
+    def _printed(self) -> str:
+        return " ".join(str(call.args[0]) for call in self.print.call_args_list)
+
+    def test_cached_version_is_used_without_request(self):
+        updater.store_latest_version("2.0.0")
+
+        with patch.object(updater, "check_latest_version") as check_latest_version:
+            update_check = updater.check_update()
+
+        self.assertIsNone(update_check)
+        check_latest_version.assert_not_called()
+        self.assertIn("latest version available: 2.0.0", self._printed())
+
+    def test_stale_cache_is_refreshed_in_background(self):
+        with self.cache_path.open("w") as f:
+            json.dump({"checked": time.time() - 2 * updater.UPDATE_CHECK_TTL}, f)
+        release = threading.Event()
+
+        def check_latest_version(timeout):
+            release.wait(5)
+            return "2.0.0"
+
+        with patch.object(updater, "check_latest_version", check_latest_version):
+            start = time.monotonic()
+            update_check = updater.check_update()
+            self.assertLess(time.monotonic() - start, 1)
+
+            # not ready at exit: nothing is reported
+            update_check.report()
+            self.assertNotIn("latest version", self._printed())
+
+            release.set()
+            update_check.report(wait=5)
+
+        self.assertIn("latest version available: 2.0.0", self._printed())
+        self.assertEqual(updater.load_cached_latest_version(), "2.0.0")
+
+    def test_failed_lookup_is_cached(self):
+        with patch.object(updater, "check_latest_version", return_value=""):
+            update_check = updater.check_update()
+            update_check.report(wait=5)
+
+        self.assertNotIn("latest version", self._printed())
+        self.assertEqual(updater.load_cached_latest_version(), "")
+        self.assertIsNone(updater.load_cached_latest_version(ttl=0))
+
+
+if __name__ == "__main__":
+    unittest.main()